@@ -1,6 +1,7 @@
 __all__ = ['abis_dir', 'download_contract_abi', 'get_abi']
 
 import requests, os, json
+from functools import lru_cache
 
 abis_dir="abis"
 
@@ -26,7 +27,9 @@ def download_contract_abi(name, address, abis_dir=os.path.join("sugar", abis_dir
     with open(os.path.join(abis_dir, f"{name}.json"), "w") as file:
         json.dump(json.loads(response_data.get("result")), file, indent=4)
 
+@lru_cache(maxsize=None)
 def get_abi(name):
+    # ABIs ship with the package and never change at runtime; read each file once per process
     dir, path = None, os.path.abspath(__file__)
     dir_path = os.path.dirname(path)
     abis_locations = [
@@ -0,0 +1,116 @@
+__all__ = ['BASIC_FEE_DENOMINATOR', 'get_amount_out_volatile', 'get_amount_out_stable', 'BasicPoolState', 'quote_path', 'rank_paths']
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .helpers import normalize_address
+from .token import Token
+
+# basic pool fees come from the factory in basis points
+BASIC_FEE_DENOMINATOR = 10_000
+
+# Integer ports of the swap math in Velodrome's Pool.sol:
+# https://github.com/velodrome-finance/contracts/blob/main/contracts/Pool.sol
+# Every division truncates exactly like the solidity version so local results match `getAmountOut`.
+
+E18 = 10 ** 18
+
+def get_amount_out_volatile(amount_in: int, reserve_in: int, reserve_out: int) -> int:
+    """xy=k output for an amount that already had the fee taken out."""
+    return amount_in * reserve_out // (reserve_in + amount_in)
+
+def _k(x: int, y: int, decimals0: int, decimals1: int) -> int:
+    _x, _y = x * E18 // decimals0, y * E18 // decimals1
+    _a = _x * _y // E18
+    _b = _x * _x // E18 + _y * _y // E18
+    return _a * _b // E18  # x3y+y3x >= k
+
+def _f(x0: int, y: int) -> int:
+    _a = x0 * y // E18
+    _b = x0 * x0 // E18 + y * y // E18
+    return _a * _b // E18
+
+def _d(x0: int, y: int) -> int: return 3 * x0 * (y * y // E18) // E18 + (x0 * x0 // E18) * x0 // E18
+
+def _get_y(x0: int, xy: int, y: int, decimals0: int, decimals1: int) -> int:
+    for _ in range(255):
+        k = _f(x0, y)
+        if k < xy:
+            dy = (xy - k) * E18 // _d(x0, y)
+            if dy == 0:
+                if k == xy: return y
+                # Pool.sol re-normalizes through _k here; kept as-is so results stay bit-identical
+                if _k(x0, y + 1, decimals0, decimals1) > xy: return y + 1
+                dy = 1
+            y = y + dy
+        else:
+            dy = (k - xy) * E18 // _d(x0, y)
+            if dy == 0:
+                if k == xy or _f(x0, y - 1) < xy: return y
+                dy = 1
+            y = y - dy
+    raise ValueError("!y")
+
+def get_amount_out_stable(amount_in: int, zero_for_one: bool, reserve0: int, reserve1: int, decimals0: int, decimals1: int) -> int:
+    """x3y+y3x output for an amount that already had the fee taken out. `decimals*` are 10**token decimals."""
+    xy = _k(reserve0, reserve1, decimals0, decimals1)
+    r0, r1 = reserve0 * E18 // decimals0, reserve1 * E18 // decimals1
+    reserve_a, reserve_b = (r0, r1) if zero_for_one else (r1, r0)
+    amount_in = amount_in * E18 // (decimals0 if zero_for_one else decimals1)
+    y = reserve_b - _get_y(amount_in + reserve_a, xy, reserve_b, decimals0, decimals1)
+    return y * (decimals1 if zero_for_one else decimals0) // E18
+
+@dataclass(frozen=True)
+class BasicPoolState:
+    """Reserves and fee of a basic (v2) pool, enough to quote it locally"""
+
+    lp: str
+    token0_address: str
+    token1_address: str
+    reserve0: int
+    reserve1: int
+    # 10**decimals for each token, as stored by Pool.sol
+    decimals0: int
+    decimals1: int
+    stable: bool
+    # basis points
+    fee: int
+
+    def get_amount_out(self, amount_in: int, token_in: str) -> int:
+        zero_for_one = token_in == self.token0_address
+        if self.reserve0 == 0 or self.reserve1 == 0: return 0
+        amount_in -= amount_in * self.fee // BASIC_FEE_DENOMINATOR
+        if self.stable: return get_amount_out_stable(amount_in, zero_for_one, self.reserve0, self.reserve1, self.decimals0, self.decimals1)
+        reserve_in, reserve_out = (self.reserve0, self.reserve1) if zero_for_one else (self.reserve1, self.reserve0)
+        return get_amount_out_volatile(amount_in, reserve_in, reserve_out)
+
+    @classmethod
+    def from_tuple(cls, t: Tuple, tokens: Dict[str, Token]) -> Optional["BasicPoolState"]:
+        """Build from a raw `Sugar.all` tuple (see `LiquidityPool.from_tuple` for the layout). None for CL pools or unknown tokens."""
+        if t[4] > 0: return None
+        token0, token1 = tokens.get(normalize_address(t[7])), tokens.get(normalize_address(t[10]))
+        if not token0 or not token1: return None
+        return BasicPoolState(lp=normalize_address(t[0]), token0_address=token0.token_address, token1_address=token1.token_address,
+                              reserve0=t[8], reserve1=t[11], decimals0=10 ** token0.decimals, decimals1=10 ** token1.decimals,
+                              stable=t[4] == 0, fee=t[22])
+
+def quote_path(path: List[Tuple], amount_in: int, states: Dict) -> Optional[int]:
+    """Chain `get_amount_out` along `path` hops `(token_in, token_out, lp)`. None when a hop has no local state."""
+    amount = amount_in
+    for token_in, _, lp in path:
+        state = states.get(lp)
+        if state is None: return None
+        amount = state.get_amount_out(amount, token_in)
+        if amount is None: return None
+        if amount <= 0: return 0
+    return amount
+
+def rank_paths(paths: List[List[Tuple]], amount_in: int, states: Dict, top_n: int) -> List[List[Tuple]]:
+    """Paths worth confirming on-chain: the `top_n` best locally quoted ones, plus every path that can't be quoted locally."""
+    quoted, unknown = [], []
+    for path in paths:
+        try: out = quote_path(path, amount_in, states)
+        except (ValueError, ZeroDivisionError): out = None
+        if out is None: unknown.append(path)
+        elif out > 0: quoted.append((out, path))
+    quoted.sort(key=lambda q: q[0], reverse=True)
+    return [p for _, p in quoted[:top_n]] + unknown
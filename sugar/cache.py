@@ -0,0 +1,364 @@
+__all__ = ['DiskCache', 'SnapshotMemo', 'QuoteCache', 'PriceCache', 'amount_bucket']
+
+import asyncio, json, os, sqlite3, threading, time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import closing
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from .config import ChainSettings
+
+class DiskCache:
+    """SQLite-backed cache for raw contract reads that survives process restarts.
+
+    Entries read at "latest" expire after `ttl_seconds`; entries pinned to a block never go stale and
+    only leave through size eviction, which drops least recently used entries once the file holds more
+    than `max_bytes` of values. Values must be JSON-serializable; tuples come back as tuples (raw
+    Sugar rows), other sequences as lists."""
+
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int):
+        self.path, self.ttl_seconds, self.max_bytes = path, ttl_seconds, max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                       "accessed REAL NOT NULL, expires REAL)")
+
+    @classmethod
+    def from_settings(cls, settings: ChainSettings) -> Optional["DiskCache"]:
+        """The cache configured by `cache_dir` (shared by all chains), or None when disk caching is off."""
+        if not settings.cache_dir: return None
+        return cls(os.path.join(settings.cache_dir, "sugar-cache.sqlite3"), settings.cache_ttl_seconds, settings.cache_max_mb * 1024 * 1024)
+
+    @staticmethod
+    def make_key(chain_id: str, contract_addr: str, block: Optional[int], name: str, *args) -> str:
+        return ":".join(map(str, [chain_id, contract_addr, "latest" if block is None else block, name, *args]))
+
+    def _connect(self) -> closing: return closing(sqlite3.connect(self.path, timeout=10))
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._connect() as db, db:
+            row = db.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None: return None
+            if row[1] is not None and row[1] <= now:
+                db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                return None
+            db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0], object_hook=_decode)
+
+    def set(self, key: str, value: Any, pinned: bool = False):
+        """Store `value`; `pinned` entries (read at a fixed block) skip the TTL. Unserializable values are not cached."""
+        try: encoded = json.dumps(_encode(value))
+        except (TypeError, ValueError): return
+        now = time.time()
+        with self._connect() as db, db:
+            db.execute("INSERT OR REPLACE INTO entries (key, value, size, accessed, expires) VALUES (?, ?, ?, ?, ?)",
+                       (key, encoded, len(encoded), now, None if pinned else now + self.ttl_seconds))
+            self._evict(db, now)
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        db.execute("DELETE FROM entries WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes: return
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed ASC").fetchall():
+            if total <= self.max_bytes: break
+            db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+
+    def clear(self):
+        with self._connect() as db, db: db.execute("DELETE FROM entries")
+
+class SnapshotMemo:
+    """Values derived from snapshot objects (cached raw rows, price reads), keyed by the snapshots' identity.
+
+    A snapshot is only ever replaced, never changed (except through paths that call `clear`), so
+    `get((rows, rates), build)` returns the value built for those exact objects in O(1) and calls `build`
+    once per new combination. The `maxsize` most recently used entries are kept; they hold references to
+    their snapshots so ids aren't reused while an entry is alive."""
+
+    def __init__(self, maxsize: int = 4):
+        self.maxsize, self.hits, self.misses = maxsize, 0, 0
+        self._entries: "OrderedDict[Tuple[int, ...], Tuple[Tuple, Any]]" = OrderedDict()
+
+    def get(self, snapshots: Tuple, build: Callable[[], Any]) -> Any:
+        key = tuple(map(id, snapshots))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+        self.misses += 1
+        value = build()
+        self._entries[key] = (snapshots, value)
+        if len(self._entries) > self.maxsize: self._entries.popitem(last=False)
+        return value
+
+    def clear(self): self._entries.clear()
+
+    def stats(self) -> Dict[str, int]: return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+def amount_bucket(amount: int) -> int:
+    """Logarithmic bucket of a raw amount, `floor(log2(amount))` (-1 for zero): amounts within 2x of each other
+    mostly share one, so the best routes found for one are a good shortlist for the other."""
+    return int(amount).bit_length() - 1 if amount > 0 else -1
+
+class _QuoteEntry:
+    __slots__ = ("expires", "routes", "amount_in", "quote")
+    def __init__(self, expires: float, routes: List, amount_in: int, quote: Any):
+        self.expires, self.routes, self.amount_in, self.quote = expires, routes, amount_in, quote
+
+class QuoteCache:
+    """Short-lived memo of `get_quote` work, in two LRU maps of at most `maxsize` entries each.
+
+    - paths: route sets per (from, to, excluded tokens), valid while the snapshot objects they were
+      searched on (route index, pool liquidity) are the current ones; see `get_paths`.
+    - routes: the best routes found for a (pair, `amount_bucket`, block) key, plus the last quote made on
+      them, for `ttl` seconds. A hit on the same amount returns that quote; another amount in the bucket
+      only has to re-quote the cached routes instead of every route.
+
+    Counters (`stats()`) tell how much work was skipped: `path_hits`/`path_misses` for route searches,
+    `hits` (quote returned as is), `reverified` (cached routes re-quoted) and `misses` (full quote)."""
+
+    def __init__(self, ttl: float, maxsize: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.ttl, self.maxsize, self.clock = ttl, maxsize, clock
+        self.hits = self.reverified = self.misses = self.path_hits = self.path_misses = 0
+        self._paths: "OrderedDict[Hashable, Tuple[Tuple, List]]" = OrderedDict()
+        self._routes: "OrderedDict[Hashable, _QuoteEntry]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool: return self.ttl > 0
+
+    def get_paths(self, key: Hashable, snapshots: Tuple, build: Callable[[], List]) -> List:
+        entry = self._paths.get(key)
+        if entry is not None and len(entry[0]) == len(snapshots) and all(a is b for a, b in zip(entry[0], snapshots)):
+            self.path_hits += 1
+            self._paths.move_to_end(key)
+            return entry[1]
+        self.path_misses += 1
+        paths = build()
+        self._put(self._paths, key, (snapshots, paths))
+        return paths
+
+    def get_routes(self, key: Hashable, amount_in: int) -> Optional[_QuoteEntry]:
+        """The live entry for `key`, if any; `entry.quote` is usable as is when `entry.amount_in == amount_in`."""
+        entry = self._routes.get(key)
+        if entry is not None and entry.expires <= self.clock():
+            del self._routes[key]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._routes.move_to_end(key)
+        if entry.amount_in == amount_in: self.hits += 1
+        else: self.reverified += 1
+        return entry
+
+    def put_routes(self, key: Hashable, routes: List, amount_in: int, quote: Any):
+        self._put(self._routes, key, _QuoteEntry(self.clock() + self.ttl, routes, amount_in, quote))
+
+    def update(self, entry: _QuoteEntry, amount_in: int, quote: Any):
+        # a re-verified quote doesn't extend the entry: its routes still come from the original search
+        entry.amount_in, entry.quote = amount_in, quote
+
+    def _put(self, entries: OrderedDict, key: Hashable, value: Any):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize: entries.popitem(last=False)
+
+    def clear(self):
+        self._paths.clear()
+        self._routes.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.reverified + self.misses
+        return {"hits": self.hits, "reverified": self.reverified, "misses": self.misses,
+                "hit_rate": (self.hits + self.reverified) / lookups if lookups else 0.0,
+                "path_hits": self.path_hits, "path_misses": self.path_misses,
+                "paths": len(self._paths), "routes": len(self._routes)}
+
+class PriceCache:
+    """Oracle rates per token address, fresh for `ttl` seconds, shared by every caller of one chain.
+
+    Callers ask for any token list (`get_rates` / `aget_rates`) and only the tokens without a fresh rate are
+    fetched. Those go to a queue; the first caller to find it idle drains it with one `fetch` per round, so
+    tokens requested while a fetch is in flight (by other threads or tasks) are merged into the next one, and
+    a token already in flight is awaited instead of being fetched again (single flight).
+
+    Stale-while-revalidate: a rate up to `max_stale` seconds past its expiry is served as is while it's being
+    re-read, or when a refresher (`wake`) will re-read it; see `refresh` for keeping the tokens callers ask for
+    fresh ahead of expiry. Tokens nobody asked for in `idle_after` seconds are no longer refreshed.
+
+    The list returned for a token list is the same object as long as its rates don't change, so it can be
+    used as a snapshot (see `SnapshotMemo`). Counters (`stats()`) are per token: `hits` (fresh), `stale`
+    (served past expiry), `joined` (waited on another caller's fetch), `misses` (fetched), plus `fetches`,
+    `fetch_errors` and the mean / max age of the rates served from the cache."""
+
+    def __init__(self, ttl: float, maxsize: int = 64, clock: Callable[[], float] = time.monotonic,
+                 max_stale: float = 0, idle_after: float = 300):
+        self.ttl, self.maxsize, self.clock, self.max_stale, self.idle_after = ttl, maxsize, clock, max_stale, idle_after
+        self.hits = self.stale = self.joined = self.misses = self.fetches = self.fetch_errors = 0
+        self.age_sum = self.age_max = 0.0
+        # set by a background refresher: callers leave stale tokens to it and call `wake` instead of fetching
+        self.wake: Optional[Callable[[], None]] = None
+        self._rates: Dict[str, Tuple[float, int]] = {}
+        self._tracked: Dict[str, Tuple[Any, float]] = {}
+        self._inflight: Dict[str, Any] = {}
+        self._queue: Dict[str, Any] = {}
+        self._draining = False
+        self._lists: "OrderedDict[Tuple[str, ...], List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _enqueue(self, token: Any, make_future: Callable[[], Any]) -> Any:
+        f = self._inflight[token.token_address] = make_future()
+        self._queue[token.token_address] = token
+        return f
+
+    def _lead(self) -> bool:
+        # the caller drains when something is queued and nobody else is draining
+        lead = bool(self._queue) and not self._draining
+        if lead: self._draining = True
+        return lead
+
+    def _claim(self, tokens: Sequence, make_future: Callable[[], Any]) -> Tuple[Dict[str, int], Dict[str, Any], bool]:
+        # usable rates, futures for the rest (queueing what isn't in flight yet) and whether the caller has to drain
+        fresh, waits, now = {}, {}, self.clock()
+        with self._lock:
+            for t in tokens:
+                a = t.token_address
+                if a in fresh or a in waits: continue
+                self._tracked[a] = (t, now)
+                hit, f = self._rates.get(a), self._inflight.get(a)
+                if hit is not None and (hit[0] > now or (now < hit[0] + self.max_stale and (f is not None or self.wake is not None))):
+                    fresh[a], age = hit[1], now - hit[0] + self.ttl
+                    self.age_sum, self.age_max = self.age_sum + age, max(self.age_max, age)
+                    if hit[0] > now: self.hits += 1
+                    else:
+                        self.stale += 1
+                        if f is None: self._enqueue(t, make_future)
+                    continue
+                if f is None:
+                    f = self._enqueue(t, make_future)
+                    self.misses += 1
+                else: self.joined += 1
+                waits[a] = f
+            # stale tokens alone don't make a caller wait for the oracle when a refresher can re-read them
+            lead, wake = self._lead() if waits or self.wake is None else False, None
+            if not lead and self._queue and not self._draining: wake = self.wake
+        if wake is not None: wake()
+        return fresh, waits, lead
+
+    def _take(self) -> Dict[str, Any]:
+        with self._lock:
+            batch, self._queue = self._queue, {}
+            if not batch: self._draining = False
+            else: self.fetches += 1
+            return batch
+
+    def _settle(self, batch: Dict[str, Any], rates: Optional[List[int]]) -> List[Tuple[Any, Optional[int]]]:
+        with self._lock:
+            expires = self.clock() + self.ttl
+            if rates is not None:
+                for a, r in zip(batch, rates): self._rates[a] = (expires, r)
+            elif batch: self.fetch_errors += 1
+            return [(self._inflight.pop(a), r) for a, r in zip(batch, rates if rates is not None else [None] * len(batch))]
+
+    def _snapshot(self, tokens: Sequence, rates: Dict[str, int]) -> List[int]:
+        key = tuple(t.token_address for t in tokens)
+        out = [rates[a] for a in key]
+        with self._lock:
+            last = self._lists.get(key)
+            if last == out: out = last
+            self._lists[key] = out
+            self._lists.move_to_end(key)
+            while len(self._lists) > self.maxsize: self._lists.popitem(last=False)
+        return out
+
+    def _drain(self, fetch: Callable[[Tuple], List[int]]):
+        while True:
+            batch = self._take()
+            if not batch: return
+            try: settled, error = self._settle(batch, fetch(tuple(batch.values()))), None
+            except BaseException as e: settled, error = self._settle(batch, None), e
+            for f, r in settled:
+                if error is None: f.set_result(r)
+                else: f.set_exception(error)
+
+    async def _adrain(self, fetch: Callable[[Tuple], Awaitable[List[int]]], coalesce: bool = False):
+        batch: Dict[str, Any] = {}
+        try:
+            # let the tasks started in this loop iteration queue their tokens first
+            if coalesce: await asyncio.sleep(0)
+            while True:
+                batch = self._take()
+                if not batch: return
+                try: rates = await fetch(tuple(batch.values()))
+                except asyncio.CancelledError: raise
+                except Exception as e:
+                    for f, _ in self._settle(batch, None):
+                        f.set_exception(e)
+                        # stale tokens queued for a refresher have nobody awaiting them
+                        f.exception()
+                else:
+                    for f, r in self._settle(batch, rates): f.set_result(r)
+                batch = {}
+        except asyncio.CancelledError:
+            # nobody else drains the queue: cancel whatever is waiting on it
+            with self._lock: batch, self._queue = {**batch, **self._queue}, {}
+            for f, _ in self._settle(batch, None): f.cancel()
+            raise
+        finally:
+            with self._lock: self._draining = False
+
+    def get_rates(self, tokens: Sequence, fetch: Callable[[Tuple], List[int]]) -> List[int]:
+        """Rates of `tokens` in order; `fetch(tokens)` reads missing ones (in order) from the oracle."""
+        fresh, waits, lead = self._claim(tokens, Future)
+        if lead: self._drain(fetch)
+        for a, f in waits.items(): fresh[a] = f.result()
+        return self._snapshot(tokens, fresh)
+
+    async def aget_rates(self, tokens: Sequence, fetch: Callable[[Tuple], Awaitable[List[int]]]) -> List[int]:
+        """`get_rates` for tasks: the draining task yields once first, so requests made in the same loop
+        iteration (e.g. by `asyncio.gather`ed getters) share its fetch."""
+        fresh, waits, lead = self._claim(tokens, asyncio.get_running_loop().create_future)
+        if lead: await self._adrain(fetch, coalesce=True)
+        for a, f in waits.items(): fresh[a] = await f
+        return self._snapshot(tokens, fresh)
+
+    def _queue_due(self, horizon: float, make_future: Callable[[], Any]) -> bool:
+        with self._lock:
+            now = self.clock()
+            for a, (t, asked) in list(self._tracked.items()):
+                if now - asked > self.idle_after: del self._tracked[a]
+                elif a not in self._inflight and (a not in self._rates or self._rates[a][0] <= now + horizon): self._enqueue(t, make_future)
+            return self._lead()
+
+    def refresh(self, fetch: Callable[[Tuple], List[int]], horizon: float = 0):
+        """Re-read the tracked tokens whose rates expire within `horizon` seconds (plus anything queued),
+        e.g. every `horizon` seconds from a background thread. Fetch errors are counted, not raised."""
+        if self._queue_due(horizon, Future): self._drain(fetch)
+
+    async def arefresh(self, fetch: Callable[[Tuple], Awaitable[List[int]]], horizon: float = 0):
+        """`refresh` for a background task."""
+        if self._queue_due(horizon, asyncio.get_running_loop().create_future): await self._adrain(fetch)
+
+    def clear(self):
+        """Forget cached rates; fetches in flight still complete."""
+        with self._lock:
+            self._rates.clear()
+            self._lists.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.stale + self.joined + self.misses
+        served = self.hits + self.stale
+        return {"hits": self.hits, "stale": self.stale, "joined": self.joined, "misses": self.misses,
+                "fetches": self.fetches, "fetch_errors": self.fetch_errors,
+                "hit_rate": (served + self.joined) / lookups if lookups else 0.0,
+                "mean_age": self.age_sum / served if served else 0.0, "max_age": self.age_max,
+                "tokens": len(self._rates), "tracked": len(self._tracked)}
+
+def _encode(value: Any) -> Any:
+    # JSON has no tuples; tag them so raw rows round-trip with the types web3 returned
+    if isinstance(value, tuple): return {"__t": [_encode(v) for v in value]}
+    if isinstance(value, list): return [_encode(v) for v in value]
+    return value
+
+def _decode(d: dict) -> Any: return tuple(d["__t"]) if "__t" in d else d
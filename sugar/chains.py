@@ -1,4 +1,5 @@
-__all__ = ['original_format_batched_response', 'T', 'safe_format_batched_response', 'require_context', 'require_async_context',
+__all__ = ['original_format_batched_response', 'T', 'safe_format_batched_response', 'require_context', 'require_async_context', 'require_async_iter_context',
+           'in_offset_order', 'in_requested_pages', 'cache_per_block',
            'CommonChain', 'AsyncChain', 'Chain', 'OPChainCommon', 'AsyncOPChain', 'OPChain', 'BaseChainCommon',
            'AsyncBaseChain', 'BaseChain', 'LiskChainCommon', 'AsyncLiskChain', 'LiskChain', 'UniChainCommon',
            'AsyncUniChain', 'UniChain', 'LiskChainSimnet', 'AsyncLiskChainSimnet',
@@ -9,17 +10,20 @@ __all__ = ['original_format_batched_response', 'T', 'safe_format_batched_respons
            'SoneiumChainCommon', 'AsyncSoneiumChain', 'SoneiumChain',
            'SuperseedChainCommon', 'AsyncSuperseedChain', 'SuperseedChain',
            'CeloChainCommon', 'AsyncCeloChain', 'CeloChain',
-           'get_chain', 'get_async_chain',
+           'CHAIN_CLASSES', 'get_chain', 'get_async_chain',
            'get_simnet_chain', 'get_async_simnet_chain', 'get_chain_from_token', 'get_async_chain_from_token',
            'get_simnet_chain_from_token', 'get_async_simnet_chain_from_token']
 
-import asyncio
+import asyncio, heapq, threading, time
+from bisect import bisect_right
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import wraps, lru_cache
+from contextlib import contextmanager, asynccontextmanager
+from dataclasses import replace
 from async_lru import alru_cache
-from cachetools import cached, TTLCache
-from typing import List, TypeVar, Callable, Optional, Tuple, Dict
-from web3 import Web3, HTTPProvider, AsyncWeb3, AsyncHTTPProvider
+import numpy as np
+from typing import List, TypeVar, Callable, Optional, Tuple, Dict, Set, Iterable, Iterator, AsyncIterator, Union
+from web3 import Web3, AsyncWeb3
 from web3.eth.async_eth import AsyncContract
 from web3.eth import Contract
 from web3.manager import RequestManager, RequestBatcher
@@ -27,17 +31,28 @@ from .config import ChainSettings, make_op_chain_settings, make_base_chain_setti
 from .config import make_mode_chain_settings, make_fraxtal_chain_settings, make_ink_chain_settings
 from .config import make_soneium_chain_settings, make_superseed_chain_settings, make_celo_chain_settings
 from .config import XCHAIN_GAS_LIMIT_UPPERBOUND
-from .helpers import normalize_address, MAX_UINT128, apply_slippage, get_future_timestamp, ADDRESS_ZERO, chunk, Pair
-from .helpers import find_all_paths, to_bytes32, price_to_tick, nearest_tick, sqrt_ratio_x96_from_price
+from .helpers import normalize_address, MAX_UINT128, apply_slippage, get_future_timestamp, ADDRESS_ZERO, chunk
+from .helpers import to_bytes32, price_to_tick, nearest_tick, sqrt_ratio_x96_from_price
 from .abi import get_abi
+from .cache import DiskCache, SnapshotMemo, QuoteCache, PriceCache, amount_bucket
+from .pagination import PageSizer
+from .providers import provider_pool
 from .token import Token
 from .pool import LiquidityPool, LiquidityPoolForSwap, LiquidityPoolEpoch
+from .pool_table import PoolTable
+from .index import TokenIndex, PoolIndex
 from .position import Position
 from .withdraw import Withdrawal
-from .price import Price
+from .price import Price, normalize_rates, rates_to_prices
 from .deposit import DepositQuote
-from .quote import QuoteInput, Quote
-from .swap import setup_planner
+from .quote import QuoteInput, Quote, DepthQuotes, SplitQuote
+from .swap import setup_planner, setup_split_planner
+from .route import RouteIndex, rank_paths_by_liquidity
+from .split import optimize_split, split_amounts
+from .pipeline import CallList, QuoteBatchError, QuoteBatchSizer, run_pipelined
+from .amm import BasicPoolState, rank_paths
+from .clmm import CLPoolState
+from .events import POOL_EVENT_TOPICS, PoolSync
 
 # monkey patching how web3 handles errors in batched requests
 # re: https://github.com/ethereum/web3.py/issues/3657
@@ -49,6 +64,11 @@ RequestManager._format_batched_response = safe_format_batched_response
 
 T = TypeVar('T')
 
+# ERC20 / basic gauge `balanceOf(address)` and CL gauge `stakedLength(address)`, read as raw `eth_call`s by `get_wallet_positions`
+BALANCE_OF_SELECTOR, STAKED_LENGTH_SELECTOR = bytes(Web3.keccak(text="balanceOf(address)")[:4]), bytes(Web3.keccak(text="stakedLength(address)")[:4])
+# calls per JSON-RPC batch for the wallet scan
+WALLET_SCAN_BATCH_SIZE = 500
+
 def require_context(f: Callable[..., T]) -> Callable[..., T]:
     @wraps(f)
     def wrapper(self: 'CommonChain', *args, **kwargs) -> T:
@@ -63,6 +83,49 @@ def require_async_context(f: Callable[..., T]) -> Callable[..., T]:
         return await f(self, *args, **kwargs)
     return wrapper
 
+def require_async_iter_context(f: Callable[..., AsyncIterator[T]]) -> Callable[..., AsyncIterator[T]]:
+    @wraps(f)
+    async def wrapper(self: 'CommonChain', *args, **kwargs) -> AsyncIterator[T]:
+        if not self._in_context: raise RuntimeError("Chain methods can only be accessed within 'async with' block")
+        async for item in f(self, *args, **kwargs): yield item
+    return wrapper
+
+def in_offset_order(pages: Iterable[Tuple[int, List]]) -> List:
+    """Rows of `(offset, rows)` pages (as yielded by `aiter_pages`/`iter_pages`) concatenated in offset order."""
+    rows = []
+    for _, page in sorted(pages, key=lambda p: p[0]): rows.extend(page)
+    return rows
+
+def in_requested_pages(pages: List[Tuple[int, int]], read: Iterable[Tuple[int, List]]) -> List[Tuple[Tuple[int, int], List]]:
+    """Rows of `(offset, rows)` pages read over the `(offset, limit)` `pages` (failing ones possibly split
+    into smaller reads), grouped back under the requested page each came from."""
+    requested = sorted(pages)
+    grouped = {page: [] for page in requested}
+    for offset, rows in sorted(read, key=lambda p: p[0]):
+        grouped[requested[bisect_right(requested, (offset, float("inf"))) - 1]].extend(rows)
+    return list(grouped.items())
+
+def cache_per_block(cache: Callable[[Callable], Callable]) -> Callable[[Callable], Callable]:
+    """Apply `cache` (`lru_cache`/`alru_cache`) per chain instance, keyed by the pinned block as well as the call
+    args, so reads made under `at_block` never mix with "latest" ones. Cleared with `CommonChain.clear_block_caches`,
+    which leaves other instances' caches (pinned snapshots included) alone."""
+    def decorator(f: Callable[..., T]) -> Callable[..., T]:
+        def cached(self: 'CommonChain') -> Callable:
+            caches = self.__dict__.setdefault("_block_caches", {})
+            if keyed not in caches: caches.setdefault(keyed, cache(keyed.__get__(self)))
+            return caches[keyed]
+        if asyncio.iscoroutinefunction(f):
+            async def keyed(self, block, *args, **kwargs): return await f(self, *args, **kwargs)
+            @wraps(f)
+            async def wrapper(self: 'CommonChain', *args, **kwargs) -> T: return await cached(self)(self.block, *args, **kwargs)
+        else:
+            def keyed(self, block, *args, **kwargs): return f(self, *args, **kwargs)
+            @wraps(f)
+            def wrapper(self: 'CommonChain', *args, **kwargs) -> T: return cached(self)(self.block, *args, **kwargs)
+        wrapper.block_cache_key = keyed
+        return wrapper
+    return decorator
+
 class CommonChain:
     is_simnet: bool = False  # simnet subclasses override to True; Superswap reads this to pick the simnet factory for read-side contexts
 
@@ -74,15 +137,63 @@ class CommonChain:
 
     pools: Optional[List[LiquidityPool]] = None
     pools_for_swap: Optional[List[LiquidityPoolForSwap]] = None
+    # block every read is pinned to (see `at_block`); None reads "latest"
+    block: Optional[int] = None
+    # live `Sugar.all` rows once `refresh_pools` has run
+    pool_sync: Optional[PoolSync] = None
 
     def __init__(self, settings: ChainSettings, **kwargs):
         self.settings, self._in_context = settings, False
         sa = kwargs.get("signer_address")
         self.signer_address: str = normalize_address(sa) if sa else ""
 
+        self.disk_cache = DiskCache.from_settings(settings)
+        self.page_sizer = PageSizer.for_settings(settings, self.disk_cache)
+        self.quote_sizer = QuoteBatchSizer.for_settings(settings)
+        # quoter batches the last `get_quote` / `get_quotes` couldn't get answered
+        self.quote_errors: List[QuoteBatchError] = []
+        # `get_pools()` results per (raw rows, tokens, oracle rates) snapshot
+        self.prepared_pools = SnapshotMemo()
+        # `get_pool_liquidity()` TVL scores per (raw rows, tokens, oracle rates) snapshot
+        self.pool_liquidity = SnapshotMemo()
+        # route sets and best routes of recent quotes (disabled unless `quote_cache_ttl_seconds` > 0)
+        self.quote_cache = QuoteCache(settings.quote_cache_ttl_seconds, settings.quote_cache_size)
+        # fresh ("latest") oracle rates per token, fetched for concurrent callers at once
+        self.price_cache = PriceCache(settings.pricing_cache_timeout_seconds, max_stale=settings.price_max_stale_seconds)
+
         if "pools" in kwargs: self.pools = kwargs["pools"]
         if "pools_for_swap" in kwargs: self.pools_for_swap = kwargs["pools_for_swap"] 
     
+    @require_context
+    @contextmanager
+    def at_block(self, block: int):
+        """Pin every read (paginated Sugar calls, oracle prices, quotes) to `block` until the context exits.
+        Cached getters are keyed by block, so pinned results can be kept for good. The pin is per chain
+        instance: don't share one instance between tasks reading at different blocks."""
+        previous = self.block
+        self._pin_block(block)
+        try: yield block
+        finally: self._pin_block(previous)
+
+    def _pin_block(self, block: Optional[int]):
+        self.block = block
+        # contract `.call()`s (batched or not) read web3's default block when no block is given
+        self.web3.eth.default_block = "latest" if block is None else block
+
+    def clear_block_caches(self, *methods: Callable):
+        """Forget what this chain's `cache_per_block` `methods` (e.g. `self.get_pool_index`) cached, at every block."""
+        caches = self.__dict__.get("_block_caches", {})
+        for method in methods: caches.pop(method.block_cache_key, None)
+
+    @require_context
+    def refresh(self):
+        """Forget memoized `get_pools()` results, cached quotes and the fresh ("latest") oracle prices, so the next call
+        re-reads prices and rebuilds the pools. Raw pool rows follow their own caches (`refresh_pools`, `at_block`)."""
+        self.prepared_pools.clear()
+        self.pool_liquidity.clear()
+        self.quote_cache.clear()
+        self.price_cache.clear()
+
     def prepare_set_token_allowance_contract(self, token: Token, contract_wrapper):
         return contract_wrapper(address=token.wrapped_token_address or token.token_address, abi=get_abi("erc20"))
 
@@ -112,14 +223,19 @@ class CommonChain:
         if burn: calls.append(nfpm.encode_abi("burn", args=[position_id]))
         return calls
     
-    def prepare_tokens(self, tokens: List[Tuple], listed_only: bool) -> List[Token]:
-        native = Token.make_native_token(self.settings.native_token_symbol,
-                                         self.settings.wrapped_native_token_addr,
-                                         self.settings.native_token_decimals,
-                                         chain_id=self.chain_id,
-                                         chain_name=self.name)
+    def get_native_token(self) -> Token:
+        return Token.make_native_token(self.settings.native_token_symbol,
+                                       self.settings.wrapped_native_token_addr,
+                                       self.settings.native_token_decimals,
+                                       chain_id=self.chain_id,
+                                       chain_name=self.name)
+
+    def prepare_token_page(self, tokens: List[Tuple], listed_only: bool) -> List[Token]:
         ts = list(map(lambda t: Token.from_tuple(t, chain_id=self.chain_id, chain_name=self.name), tokens))
-        return [native] + (list(filter(lambda t: t.listed, ts)) if listed_only else ts)
+        return list(filter(lambda t: t.listed, ts)) if listed_only else ts
+
+    def prepare_tokens(self, tokens: List[Tuple], listed_only: bool) -> List[Token]:
+        return [self.get_native_token()] + self.prepare_token_page(tokens, listed_only)
     
     def find_token_by_address(self, tokens: List[Token], address: str) -> Optional[Token]:
         address = normalize_address(address)
@@ -130,29 +246,30 @@ class CommonChain:
         if not connector: raise ValueError(f"Superswap bridge token not found on {self.name} chain.")
         return connector
 
-    def _prepare_prices(self, tokens: List[Token], rates: List[int]) -> Dict[str, int]:
-        # token_address => normalized rate
-        result = {}
+    def _prepare_prices(self, tokens: List[Token], rates: List[int]) -> List[int]:
         # rates are returned multiplied by eth decimals + the difference in decimals to eth
-        # we want them all normalized to 18 decimals
-        for cnt, rate in enumerate(rates):
-            t, eth_decimals = tokens[cnt], self.settings.native_token_decimals
-            if t.decimals == eth_decimals: nr = rate
-            elif t.decimals < eth_decimals: nr = rate // (10 ** (eth_decimals - t.decimals))
-            else: nr = rate * (10 ** (t.decimals - eth_decimals))
-            result[t.token_address] = nr
-        return result
+        # we want them all normalized to eth decimals
+        return normalize_rates(rates, [t.decimals for t in tokens], self.settings.native_token_decimals)
 
-    def prepare_prices(self, tokens: List[Token], prices: List[int]) -> List[Price]:
-        """Get prices for tokens in target stable token"""
+    def prepare_price_values(self, tokens: List[Token], prices: List[int]) -> List[float]:
+        """Prices of `tokens` in target stable token, in order"""
         eth_decimals = self.settings.native_token_decimals
-        # all rates in EHT: token => rate
-        rates_in_eth = self._prepare_prices(tokens, prices)
+        normalized = self._prepare_prices(tokens, prices)
+        # all rates in ETH: token => rate
+        rates_in_eth = dict(zip((t.token_address for t in tokens), normalized))
         eth_rate, usd_rate = rates_in_eth[self.settings.native_token_symbol], rates_in_eth[self.settings.stable_token_addr]
         # this gives us the price of 1 eth in usd with 18 decimals precision
         eth_usd_price = (eth_rate * 10 ** eth_decimals) // usd_rate
         # finally convert to prices in terms of stable
-        return [Price(token=t, price=(rates_in_eth[t.token_address] * eth_usd_price // 10 ** eth_decimals) / 10 ** eth_decimals) for t in tokens]
+        return rates_to_prices(normalized, eth_usd_price, eth_decimals)
+
+    def prepare_prices(self, tokens: List[Token], prices: List[int]) -> List[Price]:
+        """Get prices for tokens in target stable token"""
+        return [Price(token=t, price=p) for t, p in zip(tokens, self.prepare_price_values(tokens, prices))]
+
+    def prepare_price_array(self, tokens: List[Token], prices: List[int]) -> np.ndarray:
+        """`prepare_prices` as a float64 array indexed like `tokens` (no `Price` objects)"""
+        return np.array(self.prepare_price_values(tokens, prices), dtype=np.float64)
     
     def prepare_pools(self, pools: List[Tuple], tokens: List[Token], prices: List[Price]) -> List[LiquidityPool]:
         tokens, prices = {t.token_address: t for t in tokens}, {price.token.token_address: price for price in prices}
@@ -166,11 +283,63 @@ class CommonChain:
         return list(map(lambda p: LiquidityPoolEpoch.from_tuple(p, pools, tokens, prices), epochs))
 
     def prepare_positions(self, raw: List[Tuple], pools: List[LiquidityPool]) -> List[Position]:
-        pools_d = {p.lp: p for p in pools}
-        return list(filter(None, [Position.from_tuple(p, pools_d, self.chain_id, self.name) for p in raw]))
+        return self.prepare_position_page(raw, {p.lp: p for p in pools})
+
+    def prepare_position_page(self, raw: List[Tuple], pools: Dict[str, LiquidityPool]) -> List[Position]:
+        return list(filter(None, [Position.from_tuple(p, pools, self.chain_id, self.name) for p in raw]))
+
+    @staticmethod
+    def check_reads(results: List, what: str):
+        bad = [r for r in results if isinstance(r, Exception)]
+        if bad: raise RuntimeError(f"{what} read failed: {len(bad)}/{len(results)} calls ({type(bad[0]).__name__}: {bad[0]})")
+
+    def get_wallet_balance_calls(self, rows: List[Tuple], owner: str) -> List[Tuple[int, Dict]]:
+        """(row index, `eth_call` tx) pairs; a non-zero result means `owner` has a position in that pool: LP, basic
+        gauge and ALM balances, staked CL NFT counts. Unstaked CL NFTs are found through their NFPM instead."""
+        arg = bytes(12) + bytes.fromhex(owner[2:])
+        balance_of, staked_length = BALANCE_OF_SELECTOR + arg, STAKED_LENGTH_SELECTOR + arg
+        calls = []
+        for i, r in enumerate(rows):
+            if r[4] <= 0: calls.append((i, {"to": r[0], "data": balance_of}))
+            if r[13] != ADDRESS_ZERO: calls.append((i, {"to": r[13], "data": staked_length if r[4] > 0 else balance_of}))
+            if r[30] != ADDRESS_ZERO: calls.append((i, {"to": r[30], "data": balance_of}))
+        return calls
+
+    def get_wallet_nfpms(self, rows: List[Tuple]) -> Dict[Tuple[str, Tuple[str, str], int], int]:
+        """(nfpm, token pair, tick spacing) => row index of every CL pool, to resolve NFPM positions to pools."""
+        return {(normalize_address(r[29]), PoolIndex.pair_key(r[7], r[10]), r[4]): i for i, r in enumerate(rows) if r[4] > 0 and r[29] != ADDRESS_ZERO}
+
+    def find_wallet_pools(self, calls: List[Tuple[int, Dict]], balances: List, nfpms: Dict[Tuple[str, Tuple[str, str], int], int],
+                          nfts: List[Tuple[str, object]]) -> Set[int]:
+        """Row indices of the pools `owner` holds something in, from `get_wallet_balance_calls` results and the
+        `(nfpm, positions(tokenId))` reads of its NFTs. A failed balance read keeps its pool, so no position is missed."""
+        found = {i for (i, _), r in zip(calls, balances) if not isinstance(r, bytes) or int.from_bytes(r, "big") > 0}
+        self.check_reads([p for _, p in nfts], "NFPM position")
+        for nfpm, p in nfts:
+            i = nfpms.get((nfpm, PoolIndex.pair_key(p[2], p[3]), p[4]))
+            if i is not None: found.add(i)
+        return found
+
+    def get_position_windows(self, found: Iterable[int], slack: int) -> List[Tuple[int, int]]:
+        """(offset, limit) ranges of Sugar pool offsets to read `positions` over. Row i of `Sugar.all` is the pool at
+        offset i, or up to `slack` (pools missing from the rows) later if `all` left pools out before it."""
+        windows: List[Tuple[int, int]] = []
+        for i in sorted(set(found)):
+            if windows and i <= sum(windows[-1]): windows[-1] = (windows[-1][0], i + slack + 1 - windows[-1][0])
+            else: windows.append((i, slack + 1))
+        return windows
+
+    def get_position_pool_rows(self, raw: List[Tuple], index: PoolIndex) -> List[Tuple]:
+        """`Sugar.all` rows of the pools of raw positions."""
+        return list(filter(None, map(index.find, dict.fromkeys(p[1] for p in raw))))
+
+    def get_latest_epoch_lps(self, raw_epochs: List[Tuple]) -> List[str]: return list(dict.fromkeys(e[1] for e in raw_epochs))
     
+    def get_swap_match_tokens(self, from_token: Token, to_token: Token) -> set:
+        return set(self.settings.connector_tokens_addrs + [from_token.token_address, to_token.token_address])
+
     def filter_pools_for_swap(self, pools: List[LiquidityPoolForSwap], from_token: Token, to_token: Token) -> List[LiquidityPoolForSwap]:
-        match_tokens = set(self.settings.connector_tokens_addrs + [from_token.token_address, to_token.token_address])
+        match_tokens = self.get_swap_match_tokens(from_token, to_token)
         return list(filter(lambda p: p.token0_address in match_tokens or p.token1_address in match_tokens, pools))
     
     def paths_to_pools(self, pools: List[LiquidityPoolForSwap], paths: List[List[Tuple]]) -> List[LiquidityPoolForSwap]:
@@ -188,6 +357,51 @@ class CommonChain:
             inputs.append(q)
         return batcher, inputs
 
+    def prepare_multi_quote_batch(self, from_token: Token, to_token: Token, batcher: RequestBatcher, pools: List[List[LiquidityPoolForSwap]],
+                                  amounts: List[int], paths: List[List[Tuple]], calls: List[Tuple[int, int]]):
+        """`prepare_quote_batch` for (amount index, path index) `calls` (routes are packed once, see `QuoteInput.route`)."""
+        inputs = []
+        for a, i in calls:
+            path = [(p, p.token0_address != paths[i][j][0]) for j, p in enumerate(pools[i])]
+            q = QuoteInput(from_token=from_token, to_token=to_token, amount_in=amounts[a], path=path,
+                           slipstream_factory_addr=self.settings.slipstream_factory_addr,
+                           old_slipstream_factory_addr=self.settings.old_slipstream_factory_addr)
+            batcher.add(self.quoter.functions.quoteExactInput(q.route.encoded, amounts[a]))
+            inputs.append(q)
+        return batcher, inputs
+
+    def get_quote_calls(self, amounts: List[int], paths: List[List[Tuple]], states: Optional[Dict]) -> List[Tuple[int, int]]:
+        """(amount index, path index) pairs to send to the quoter: every route for every amount, or per amount the
+        routes `select_paths_for_quote` keeps when local ranking is on."""
+        if self.settings.quote_local_top_n <= 0 or not states: return [(a, i) for a in range(len(amounts)) for i in range(len(paths))]
+        ids = {id(path): i for i, path in enumerate(paths)}
+        return [(a, ids[id(path)]) for a, amount in enumerate(amounts) for path in self.select_paths_for_quote(paths, amount, states)]
+
+    def prepare_depth_quotes(self, amounts: List[int], paths: List[List[Tuple]], results: List[Tuple[Tuple[int, int], QuoteInput, object]],
+                             filter_quotes: Optional[Callable[[Quote], bool]] = None, with_matrix: bool = False) -> DepthQuotes:
+        matrix: List[List[Optional[Quote]]] = [[None] * len(paths) for _ in amounts]
+        for (a, i), q, r in results:
+            if not isinstance(r, Exception): matrix[a][i] = Quote(input=q, amount_out=r[0])
+        best = []
+        for row in matrix:
+            quotes = [q for q in row if q is not None and (filter_quotes is None or filter_quotes(q))]
+            best.append(max(quotes, key=lambda q: q.amount_out) if quotes else None)
+        return DepthQuotes(amounts=list(amounts), paths=paths, best=best, matrix=matrix if with_matrix else None)
+
+    def prepare_split_legs(self, depth: DepthQuotes, amount: int, max_routes: int) -> List[Tuple[List[Tuple], int]]:
+        """(route, amount in) per leg of the best split of `amount`, from a `get_quotes` matrix sampled at even fractions of it."""
+        curves = [[(a, row[j].amount_out if row[j] is not None else 0) for a, row in zip(depth.amounts, depth.matrix)] for j in range(len(depth.paths))]
+        shares = optimize_split(curves, amount, len(depth.amounts), max_routes, [[h[2] for h in path] for path in depth.paths])
+        if not any(shares): return []
+        legs = [(path, s) for path, s in zip(depth.paths, shares) if s > 0]
+        return [(path, a) for (path, _), a in zip(legs, split_amounts(amount, [s for _, s in legs]))]
+
+    def prepare_split_quote(self, depth: DepthQuotes, results: List[Tuple[Tuple[int, int], QuoteInput, object]]) -> Optional[SplitQuote]:
+        # a leg failing its final quote falls back to the best single route
+        quotes = [Quote(input=q, amount_out=r[0]) for _, q, r in results if not isinstance(r, Exception)]
+        if results and len(quotes) == len(results): return SplitQuote(quotes)
+        return SplitQuote([depth.best[-1]]) if depth.best and depth.best[-1] is not None else None
+
     def prepare_quotes(self, quote_inputs: List[QuoteInput], responses):
         if len(responses) != len(quote_inputs): raise ValueError(f"Number of responses {len(responses)} does not match number of quote inputs {len(quote_inputs)}")
         quotes = []
@@ -196,26 +410,121 @@ class CommonChain:
             else: quotes.append(Quote(input=quote_inputs[i], amount_out=r[0]))
         return quotes
     
-    def get_paths_for_quote(self, from_token: Token, to_token: Token, pools: List[LiquidityPoolForSwap], exclude_tokens: List[str]) -> List[List[Tuple]]:
+    def get_paths_for_quote(self, from_token: Token, to_token: Token, pools: List[LiquidityPoolForSwap], exclude_tokens: List[str],
+                            index: Optional[RouteIndex] = None, pool_liquidity: Optional[Dict[str, float]] = None) -> List[List[Tuple]]:
+        """Routes from `from_token` to `to_token`. Without an `index`, `pools` are searched as given (callers pre-filter them);
+        with a prebuilt index over all swap pools the connector filter from `filter_pools_for_swap` is applied during the search.
+        Given `pool_liquidity` (TVL by LP), only the `quote_max_parallel_pools` deepest parallel pools per hop are followed."""
+        return list(self.iter_paths_for_quote(from_token, to_token, pools, exclude_tokens, index, pool_liquidity))
+
+    def iter_paths_for_quote(self, from_token: Token, to_token: Token, pools: List[LiquidityPoolForSwap], exclude_tokens: List[str],
+                             index: Optional[RouteIndex] = None, pool_liquidity: Optional[Dict[str, float]] = None) -> Iterator[List[Tuple]]:
+        """`get_paths_for_quote`, yielding routes as the search finds them."""
         exclude_tokens_set = set(map(lambda t: normalize_address(t), exclude_tokens))
 
         if from_token.token_address in exclude_tokens: exclude_tokens_set.remove(from_token.token_address)
         if to_token.token_address in exclude_tokens: exclude_tokens_set.remove(to_token.token_address)
 
-        pairs = [Pair(p.token0_address, p.token1_address, p.lp) for p in pools]
-        paths = find_all_paths(pairs, from_token.wrapped_token_address or from_token.token_address, to_token.wrapped_token_address or to_token.token_address)
-        # filter out paths with excluded tokens
-        return list(filter(lambda p: len(set(map(lambda t: t[0], p)) & exclude_tokens_set) == 0, paths))
+        start, end = from_token.wrapped_token_address or from_token.token_address, to_token.wrapped_token_address or to_token.token_address
+        # excluded tokens are pruned as intermediate hops during the search
+        cap = self.settings.quote_max_parallel_pools if pool_liquidity is not None else 0
+        if index is None: return RouteIndex.from_pools(pools).iter_paths(start, end, exclude_tokens=exclude_tokens_set, max_parallel=cap, pool_scores=pool_liquidity)
+        return index.iter_paths(start, end, exclude_tokens=exclude_tokens_set, match_tokens=self.get_swap_match_tokens(from_token, to_token),
+                                max_parallel=cap, pool_scores=pool_liquidity)
+
+    @property
+    def streams_quote_paths(self) -> bool:
+        # pruning, local ranking and the quote cache all work on the complete route set
+        return not (self.prunes_quote_paths or self.quote_cache.enabled or self.settings.quote_local_top_n > 0)
+
+    @property
+    def prunes_quote_paths(self) -> bool:
+        return self.settings.quote_max_paths > 0 or self.settings.quote_max_parallel_pools > 0
+
+    def prune_paths_for_quote(self, paths: List[List[Tuple]], pool_liquidity: Dict[str, float]) -> List[List[Tuple]]:
+        """Keep the `quote_max_paths` routes through the deepest pools (see `rank_paths_by_liquidity`)."""
+        return rank_paths_by_liquidity(paths, pool_liquidity, self.settings.quote_max_paths)
+
+    def get_quote_paths(self, from_token: Token, to_token: Token, pools: List[LiquidityPoolForSwap], index: RouteIndex,
+                        pool_liquidity: Optional[Dict[str, float]]) -> List[List[Tuple]]:
+        """Routes worth quoting (`get_paths_for_quote`, then `prune_paths_for_quote`). With the quote cache on, the route set
+        is reused per (from, to, excluded tokens) for as long as `index` and `pool_liquidity` are the current snapshots."""
+        excluded = self.settings.excluded_tokens_addrs
+        def build() -> List[List[Tuple]]:
+            paths = self.get_paths_for_quote(from_token, to_token, pools, excluded, index=index, pool_liquidity=pool_liquidity)
+            return paths if pool_liquidity is None else self.prune_paths_for_quote(paths, pool_liquidity)
+        if not self.quote_cache.enabled: return build()
+        return self.quote_cache.get_paths((from_token.token_address, to_token.token_address, tuple(excluded)), (index, pool_liquidity), build)
+
+    def quote_cache_key(self, from_token: Token, to_token: Token, amount: int) -> Tuple:
+        return (from_token.token_address, to_token.token_address, amount_bucket(amount), self.block)
+
+    def best_quote_routes(self, quotes: List[Quote], paths: List[List[Tuple]], n: int = 3) -> List[List[Tuple]]:
+        """Routes of the `n` best `quotes`, as hops from `paths`, for the quote cache to re-verify."""
+        by_pools = {tuple(h[2] for h in path): path for path in paths}
+        return [by_pools[tuple(p.lp for p, _ in q.input.path)] for q in heapq.nlargest(n, quotes, key=lambda q: q.amount_out)]
+
+    def prepare_pool_liquidity(self, raw_pools: List[Tuple], tokens: List[Token], prices: List[Price]) -> Dict[str, float]:
+        return PoolTable.from_tuples(raw_pools, tokens, prices, self.chain_id, self.name).tvl_by_lp()
+
+    def prepare_local_pool_states(self, raw_pools: List[Tuple], tokens: List[Token]) -> Dict:
+        """Locally quotable pool states keyed by LP, from raw `Sugar.all` tuples. CL states start without ticks (see `load_cl_ticks`)."""
+        tokens_d = {t.token_address: t for t in tokens}
+        states = (CLPoolState.from_tuple(p) if p[4] > 0 else BasicPoolState.from_tuple(p, tokens_d) for p in raw_pools)
+        return {s.lp: s for s in states if s}
+
+    def get_unloaded_cl_states(self, states: Dict, paths: List[List[Tuple]]) -> List[CLPoolState]:
+        lps = {lp for path in paths for _, _, lp in path}
+        return [s for s in map(states.get, lps) if isinstance(s, CLPoolState) and s.ticks is None]
+
+    def prepare_populated_ticks_batch(self, batcher: RequestBatcher, cl_states: List[CLPoolState]) -> RequestBatcher:
+        for s in cl_states: batcher.add(self.slipstream.functions.getPopulatedTicks(s.lp, s.tick))
+        return batcher
+
+    def apply_populated_ticks(self, states: Dict, cl_states: List[CLPoolState], responses):
+        # failed reads get an empty window so the pool is quoted on-chain instead of refetched on every quote
+        for s, r in zip(cl_states, responses): states[s.lp] = s.with_ticks([] if isinstance(r, Exception) else r)
+
+    def select_paths_for_quote(self, paths: List[List[Tuple]], amount_in: int, states: Dict) -> List[List[Tuple]]:
+        """Trim `paths` to the ones worth an on-chain quote (see `quote_local_top_n`)."""
+        top_n = self.settings.quote_local_top_n
+        if top_n <= 0 or not states: return paths
+        return rank_paths(paths, amount_in, states, top_n)
+
+    def get_pool_log_filters(self, from_block: int, to_block: int) -> List[Dict]:
+        """`eth_getLogs` filters for pool events of every synced pool, split into `pool_logs_block_range` windows and address chunks."""
+        step, lps = self.settings.pool_logs_block_range, list(self.pool_sync.index)
+        return [{"fromBlock": start, "toBlock": min(start + step - 1, to_block), "address": addrs, "topics": [POOL_EVENT_TOPICS]}
+                for start in range(from_block, to_block + 1, step) for addrs in chunk(lps, 1000)]
+
+    def apply_pool_sync(self, states: Dict, lps: Set[str], dirty: Set[str], tokens: List[Token]) -> Dict:
+        """Carry refreshed rows over to local quote states. CL tick windows survive swaps; mints/burns get them refetched."""
+        tokens_d = {t.token_address: t for t in tokens}
+        for lp in lps:
+            row = self.pool_sync.rows[self.pool_sync.index[lp]]
+            s, old = CLPoolState.from_tuple(row) if row[4] > 0 else BasicPoolState.from_tuple(row, tokens_d), states.get(lp)
+            if isinstance(s, CLPoolState) and isinstance(old, CLPoolState) and lp not in dirty:
+                s = replace(s, ticks=old.ticks, bitmap=old.bitmap, liquidity_net=old.liquidity_net)
+            if s: states[lp] = s
+            else: states.pop(lp, None)
+        return states
 
     def calculate_optimal_batch_size(self, pool_count: int) -> int:
-        """Per-batch page size targeting ~target_calls reads, clamped to [min, max]."""
+        """Per-batch page size: the one learned for this RPC (see `PageSizer`), else ~target_calls reads clamped to [min, max]."""
+        if self.page_sizer.page_size: return self.page_sizer.page_size
         target_calls = self.settings.pool_pagination_target_calls
         min_size, max_size = self.settings.pool_pagination_min_size, self.settings.pool_pagination_max_size
         return max(min_size, min(pool_count // target_calls, max_size))
 
-    def get_pool_paginator(self, pool_count: int, batch_size: int = 5) -> List[List[Tuple]]:
+    def get_pool_paginator(self, pool_count: int, batch_size: Optional[int] = None) -> List[List[Tuple]]:
         upper_bound, limit = pool_count + 10, self.calculate_optimal_batch_size(pool_count)
-        return chunk(list(map(lambda x: (x, limit), list(range(0, upper_bound, limit)))), batch_size)
+        return chunk(list(map(lambda x: (x, limit), list(range(0, upper_bound, limit)))), batch_size or self.page_sizer.batch_size)
+
+    def get_window_paginator(self, windows: List[Tuple[int, int]], pool_count: int) -> List[List[Tuple]]:
+        """`get_pool_paginator` over `(offset, limit)` windows: each window is cut into pages of the usual page size."""
+        size = self.calculate_optimal_batch_size(pool_count)
+        pages = [(o, min(size, offset + limit - o)) for offset, limit in windows for o in range(offset, offset + limit, size)]
+        return list(chunk(pages, self.page_sizer.batch_size))
 
     def get_price_connectors(self) -> List[str]:
         """Oracle routing tokens + stable (so stable-paired tokens still resolve)."""
@@ -262,7 +571,7 @@ class AsyncChain(CommonChain):
     async def __aenter__(self):
         """Async context manager entry"""
         self._in_context = True
-        self.web3 = AsyncWeb3(AsyncHTTPProvider(self.settings.rpc_uri))
+        self.web3 = AsyncWeb3(await provider_pool.get_async(self.settings.rpc_uri, self.settings.rpc_max_connections, self.settings.rpc_uris))
         self.sugar = self.web3.eth.contract(address=self.settings.sugar_contract_addr, abi=get_abi("sugar"))
         self.sugar_rewards = self.web3.eth.contract(address=self.settings.sugar_rewards_contract_addr, abi=get_abi("sugar_rewards"))
         self.slipstream = self.web3.eth.contract(address=self.settings.slipstream_contract_addr, abi=get_abi("slipstream"))
@@ -274,27 +583,121 @@ class AsyncChain(CommonChain):
             # TODO: clean this up when interchain jazz is fully implemented
             self.ica_router = self.web3.eth.contract(address=self.settings.interchain_router_contract_addr, abi=get_abi("interchain_router"))
 
-        # set up caching for price oracle
-        self._get_prices = alru_cache(ttl=self.settings.pricing_cache_timeout_seconds)(self._get_prices)
+        # prices read at a pinned block never go stale, so those are kept; fresh ones go through `price_cache`
+        self._get_block_prices = alru_cache(maxsize=None)(self._get_prices)
+        if self.settings.price_refresh_interval_seconds > 0: self.start_price_refresher()
 
         return self
 
+    @require_context
+    @asynccontextmanager
+    async def snapshot(self):
+        """`at_block` for the current head: `async with chain.snapshot() as block: ...`"""
+        with self.at_block(await self.web3.eth.block_number) as block: yield block
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
+        await self.stop_price_refresher()
+        # the provider (and its keep-alive session) is shared through `provider_pool`, so it stays open
         self._in_context = False
-        await self.web3.provider.disconnect()
         return None
 
-    async def apaginate(self, f: Callable):
-        pool_count = await self.get_pool_count()
-        async def process_batch(batch: List[Tuple]):
-            async with self.web3.batch_requests() as batcher:
-                for offset, limit in batch: batcher.add(f(limit, offset))
-                return sum(await batcher.async_execute(), [])
-        return sum(await asyncio.gather(*[process_batch(batch) for batch in self.get_pool_paginator(pool_count)]), [])
+    _price_refresher: Optional[asyncio.Task] = None
+
+    async def _refresh_prices(self, interval: float):
+        wake = asyncio.Event()
+        self.price_cache.wake = wake.set
+        try:
+            while True:
+                try: await asyncio.wait_for(wake.wait(), interval)
+                except asyncio.TimeoutError: pass
+                wake.clear()
+                # only "latest" prices are refreshed; `_get_prices` reads them at "latest" even if a pin lands mid-fetch
+                if self.block is None: await self.price_cache.arefresh(self._get_prices, interval)
+        finally: self.price_cache.wake = None
+
+    @require_context
+    def start_price_refresher(self, interval: Optional[float] = None):
+        """Re-read the prices callers ask for from a background task every `interval` seconds (default
+        `price_refresh_interval_seconds`), ahead of their expiry, so reads don't wait for the oracle. Rates
+        up to `price_max_stale_seconds` past expiry are served while it catches up. Stopped on context exit."""
+        interval = interval or self.settings.price_refresh_interval_seconds
+        if interval <= 0: raise ValueError("price refresher needs an interval > 0")
+        if self._price_refresher is None: self._price_refresher = asyncio.get_running_loop().create_task(self._refresh_prices(interval))
+
+    async def stop_price_refresher(self):
+        task, self._price_refresher = self._price_refresher, None
+        if task is None: return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def aiter_pages(self, f: Callable, batches: Optional[List[List[Tuple[int, int]]]] = None) -> AsyncIterator[Tuple[int, List]]:
+        """`(offset, rows)` for every page of the paginated Sugar read `f(limit, offset)`, yielded as batches complete
+        (not in offset order). Failed batches are retried in halves and failed pages split (see `PageSizer`).
+        `batches` of `(offset, limit)` pages default to every pool (`get_pool_paginator`)."""
+        if batches is None: batches = self.get_pool_paginator(await self.get_pool_count())
+        async def process_batch(batch: List[Tuple]) -> List[Tuple[int, List]]:
+            start = time.perf_counter()
+            try:
+                async with self.web3.batch_requests() as batcher:
+                    for offset, limit in batch: batcher.add(f(limit, offset))
+                    responses = await batcher.async_execute()
+            except Exception as e:
+                if len(batch) > 1:
+                    self.page_sizer.batch_failed(len(batch))
+                    return await process_batch(batch[:len(batch) // 2]) + await process_batch(batch[len(batch) // 2:])
+                responses = [e]
+            else:
+                if not any(isinstance(r, Exception) for r in responses): self.page_sizer.observe(batch, time.perf_counter() - start)
+            pages = []
+            for (offset, limit), r in zip(batch, responses):
+                if not isinstance(r, Exception):
+                    pages.append((offset, r))
+                    continue
+                limits = self.page_sizer.page_failed(limit)
+                if not limits: raise r
+                pages.extend(await process_batch([(offset, limits[0]), (offset + limits[0], limits[1])]))
+            return pages
+        tasks = [asyncio.ensure_future(process_batch(batch)) for batch in batches]
+        try:
+            for done in asyncio.as_completed(tasks):
+                for page in await done: yield page
+        finally:
+            # the consumer stopped early (or a batch failed): don't leave the other batches running
+            for t in tasks: t.cancel()
+
+    async def apaginate(self, f: Callable) -> List:
+        return in_offset_order([page async for page in self.aiter_pages(f)])
+
+    async def aiter_pages_cached(self, name: str, f: Callable, contract_addr: str) -> AsyncIterator[Tuple[int, List]]:
+        """`aiter_pages` through the disk cache: a hit comes back as one page, a miss is stored once every page arrived.
+        Cache reads/writes (sqlite + JSON) run in a worker thread so they don't block the event loop."""
+        if not self.disk_cache:
+            async for page in self.aiter_pages(f): yield page
+            return
+        key, pinned = DiskCache.make_key(self.chain_id, contract_addr, self.block, name), self.block is not None
+        raw = await asyncio.to_thread(self.disk_cache.get, key)
+        if raw is not None:
+            yield 0, raw
+            return
+        pages = []
+        async for page in self.aiter_pages(f):
+            pages.append(page)
+            yield page
+        await asyncio.to_thread(self.disk_cache.set, key, in_offset_order(pages), pinned=pinned)
+
+    async def apaginate_cached(self, name: str, f: Callable, contract_addr: str) -> List:
+        """`apaginate` through the disk cache (when `cache_dir` is set), keyed by chain, contract, block and `name`."""
+        if not self.disk_cache: return await self.apaginate(f)
+        key = DiskCache.make_key(self.chain_id, contract_addr, self.block, name)
+        raw = await asyncio.to_thread(self.disk_cache.get, key)
+        if raw is None:
+            raw = await self.apaginate(f)
+            await asyncio.to_thread(self.disk_cache.set, key, raw, pinned=self.block is not None)
+        return raw
 
     @require_async_context
-    @alru_cache(maxsize=None)
+    @cache_per_block(alru_cache(maxsize=None))
     async def get_pool_count(self) -> int:
         """Pool count, cached per chain instance."""
         return await self.sugar.functions.count().call()
@@ -365,24 +768,38 @@ class AsyncChain(CommonChain):
         return await self.balance_of(token_address=self.settings.bridge_token_addr, owner_address=user_ica)
 
     @require_async_context
-    @alru_cache(maxsize=None)
+    @cache_per_block(alru_cache(maxsize=None))
     async def get_all_tokens(self, listed_only: bool = False) -> List[Token]:
         def get_tokens(limit, offset): return self.sugar.functions.tokens(limit, offset, ADDRESS_ZERO, [])
-        return self.prepare_tokens(await self.apaginate(get_tokens), listed_only)
+        return self.prepare_tokens(await self.apaginate_cached("tokens", get_tokens, self.settings.sugar_contract_addr), listed_only)
     
+    @require_async_context
+    @cache_per_block(alru_cache(maxsize=None))
+    async def get_token_index(self) -> TokenIndex: return TokenIndex(await self.get_all_tokens())
+
     @require_async_context
     async def get_token(self, ref) -> Optional[Token]:
         """Resolve a token by 0x address, symbol (case-insensitive), or int (hex address as integer). Returns None if not found."""
-        if not ref: return None
-        if isinstance(ref, int): ref = '0x' + format(ref, '040x')
-        tokens = await self.get_all_tokens()
-        if ref.startswith("0x"): return self.find_token_by_address(tokens, ref)
-        return next((t for t in tokens if t.symbol.lower() == ref.lower()), None)
-    
+        return (await self.get_token_index()).find(ref)
+
+    @require_async_context
+    @cache_per_block(alru_cache(maxsize=None))
+    async def get_pool_index(self) -> PoolIndex: return PoolIndex(await self.get_raw_pools(False))
+
     @require_async_context
     async def get_pool_by_address(self, address: str) -> Optional[LiquidityPool]:
         """Find a pool by LP address (case-insensitive). Returns None if not found."""
-        return next((p for p in await self.get_pools() if p.lp.lower() == address.lower()), None)
+        row = (await self.get_pool_index()).find(address)
+        return next(iter(await self._prepare_rows([row])), None) if row else None
+
+    @require_async_context
+    async def get_pools_by_pair(self, token_a: Token, token_b: Token) -> List[LiquidityPool]:
+        """Every pool between the two tokens (either order)."""
+        return await self._prepare_rows((await self.get_pool_index()).find_by_pair(token_a.token_address, token_b.token_address))
+
+    async def _prepare_rows(self, rows: List[Tuple]) -> List[LiquidityPool]:
+        tokens = await self.get_all_tokens()
+        return self.prepare_pools(rows, tokens, await self.get_prices(tokens)) if rows else []
 
     @require_async_context
     async def get_token_balance(self, token: Token, owner_address: Optional[str] = None) -> int:
@@ -395,8 +812,9 @@ class AsyncChain(CommonChain):
     @require_async_context
     async def get_bridge_token(self) -> Token: return self._get_bridge_token(await self.get_all_tokens())
 
-    async def _get_prices(self, tokens: Tuple[Token], max_retries: int = 3) -> List[int]:
-        """Batched oracle reads, filtered to priceable tokens. Result is mapped back to input order (filtered tokens get 0)."""
+    async def _get_prices(self, tokens: Tuple[Token], block: Optional[int] = None, max_retries: int = 3) -> List[int]:
+        """Batched oracle reads, filtered to priceable tokens. Result is mapped back to input order (filtered tokens get 0).
+        Reads at `block`, else "latest" even under `at_block`, so a background refresh never stores pinned rates as fresh."""
         request_tokens = self.get_price_request_tokens(list(tokens))
         chunks = list(chunk(request_tokens, self.settings.price_batch_size))
         async def _exec(cs):
@@ -404,7 +822,8 @@ class AsyncChain(CommonChain):
                 for c in cs:
                     b.add(self.prices.functions.getManyRatesToEthWithCustomConnectors(
                         [t.wrapped_token_address or t.token_address for t in c],
-                        False, self.get_price_connectors(), self.settings.price_threshold_filter))
+                        False, self.get_price_connectors(), self.settings.price_threshold_filter
+                    ).call(block_identifier="latest" if block is None else block))
                 return await b.async_execute()
         results = await _exec(chunks) if chunks else []
         for _ in range(max_retries):
@@ -419,26 +838,95 @@ class AsyncChain(CommonChain):
         rates = {t.token_address: r for c, rs in zip(chunks, results) for t, r in zip(c, rs)}
         return [rates.get(t.token_address, 0) for t in tokens]
 
+    async def _get_rates(self, tokens: List[Token]) -> List[int]:
+        # cached oracle reads: the same list comes back while the rates don't change, so it also identifies the price snapshot
+        if self.block is None: return await self.price_cache.aget_rates(tokens, self._get_prices)
+        return await self._get_block_prices(tuple(tokens), self.block)
+
     @require_async_context
     async def get_prices(self, tokens: List[Token]) -> List[Price]:
         """Get prices for tokens in target stable token"""
-        return self.prepare_prices(tokens, await self._get_prices(tuple(tokens)))
+        return self.prepare_prices(tokens, await self._get_rates(tokens))
+
+    @require_async_context
+    async def get_price_array(self, tokens: List[Token]) -> np.ndarray:
+        """`get_prices` as a float64 array: `get_price_array(tokens)[i]` is the price of `tokens[i]`"""
+        return self.prepare_price_array(tokens, await self._get_rates(tokens))
 
-    @alru_cache(maxsize=None)
     async def get_raw_pools(self, for_swaps: bool):
+        # once `refresh_pools` follows the head, "latest" `Sugar.all` reads come from its live rows
+        if not for_swaps and self.block is None and self.pool_sync is not None: return self.pool_sync.rows
+        return await self._get_raw_pools(for_swaps)
+
+    @cache_per_block(alru_cache(maxsize=None))
+    async def _get_raw_pools(self, for_swaps: bool):
         def get_all(limit, offset): return self.sugar.functions.all(limit, offset, 0)
-        return await self.apaginate(self.sugar.functions.forSwaps if for_swaps else get_all)
+        name, f = ("forSwaps", self.sugar.functions.forSwaps) if for_swaps else ("all", get_all)
+        return await self.apaginate_cached(name, f, self.settings.sugar_contract_addr)
+
+    async def _read_pool_pages(self, pages: List[Tuple[int, int]]) -> List[Tuple[Tuple[int, int], List[Tuple]]]:
+        """`Sugar.all` rows of `pages`, read through `aiter_pages` (batched per `page_sizer`, failing pages split)."""
+        def get_all(limit, offset): return self.sugar.functions.all(limit, offset, 0)
+        return in_requested_pages(pages, [page async for page in self.aiter_pages(get_all, chunk(pages, self.page_sizer.batch_size))])
+
+    @require_async_context
+    async def refresh_pools(self) -> List[Tuple]:
+        """Bring the "latest" pool set (`get_pools`, `get_raw_pools(False)`, local quote states) up to the head.
+
+        The first call reads every `Sugar.all` page pinned at the head and starts tracking it. Later calls pull
+        Sync/Swap/Mint/Burn logs of the known pools since the last synced block, patch reserves and CL
+        slot0/liquidity in place, and re-read only the pages holding pools whose liquidity moved or that are new."""
+        if self.block is not None: raise RuntimeError("refresh_pools follows the head, call it outside at_block")
+        head = await self.web3.eth.block_number
+        if self.pool_sync is not None and head <= self.pool_sync.block: return self.pool_sync.rows
+        with self.at_block(head):
+            count = await self.sugar.functions.count().call()
+            if self.pool_sync is None:
+                self.pool_sync = PoolSync.from_pages(head, count, await self._read_pool_pages(sum(self.get_pool_paginator(count), [])))
+                # "latest" states and the pool index were built from the paginated set
+                self.clear_block_caches(self.get_local_pool_states, self.get_pool_index)
+                return self.pool_sync.rows
+            filters = self.get_pool_log_filters(self.pool_sync.block + 1, head)
+            with self.pool_sync.advance(head, count) as sync:
+                patched, dirty = sync.apply_logs(sum(await asyncio.gather(*[self.web3.eth.get_logs(f) for f in filters]), []))
+                new_pages = sync.new_pages(count, self.calculate_optimal_batch_size(count))
+                touched = sync.apply_pages(await self._read_pool_pages(sync.pages_for(dirty) + new_pages))
+        # the live rows were patched in place, so pools prepared from them (and quotes made on them) are stale
+        self.prepared_pools.clear()
+        self.pool_liquidity.clear()
+        self.quote_cache.clear()
+        if new_pages:
+            # new pools also change the swap set and the pool index: drop them and the route index built on the swap set
+            self.clear_block_caches(self._get_raw_pools, self.get_route_index, self.get_pool_index)
+        if self.settings.quote_local_top_n > 0:
+            self.apply_pool_sync(await self.get_local_pool_states(), patched | touched, dirty, await self.get_all_tokens(listed_only=False))
+        return self.pool_sync.rows
     
     @require_async_context
     async def get_pools(self, for_swaps: bool = False) -> List[LiquidityPool]:
+        """Pools with prices. Within a price cache window (and until `refresh`) the same list is returned."""
         pools = await self.get_raw_pools(for_swaps)
         if not for_swaps:
             tokens = await self.get_all_tokens()
-            return self.prepare_pools(pools, tokens, await self.get_prices(tokens))
+            rates = await self._get_rates(tokens)
+            return self.prepared_pools.get((pools, tokens, rates), lambda: self.prepare_pools(pools, tokens, self.prepare_prices(tokens, rates)))
         else: return self.prepare_pools_for_swap(pools)
 
     @require_async_context
-    @alru_cache(maxsize=None)
+    async def get_pool_table(self) -> PoolTable:
+        """`get_pools` as a columnar `PoolTable`: vectorized tvl/apr/volume, `LiquidityPool`s only built on row access."""
+        tokens = await self.get_all_tokens()
+        return PoolTable.from_tuples(await self.get_raw_pools(False), tokens, await self.get_prices(tokens), self.chain_id, self.name)
+
+    @require_async_context
+    async def get_pool_liquidity(self) -> Dict[str, float]:
+        """TVL by LP (priced sides only), the liquidity score used to prune quote routes. Memoized like `get_pools`."""
+        pools, tokens = await self.get_raw_pools(False), await self.get_all_tokens()
+        rates = await self._get_rates(tokens)
+        return self.pool_liquidity.get((pools, tokens, rates), lambda: self.prepare_pool_liquidity(pools, tokens, self.prepare_prices(tokens, rates)))
+
+    @require_async_context
+    @cache_per_block(alru_cache(maxsize=None))
     async def get_pool_epochs(self, lp: str, offset: int = 0, limit: int = 10) -> List[LiquidityPoolEpoch]:
         tokens, pools = await self.get_all_tokens(listed_only=False), await self.get_pools()
         prices = await self.get_prices(tokens)
@@ -446,20 +934,74 @@ class AsyncChain(CommonChain):
         return self.prepare_pool_epochs(r, pools, tokens, prices)
 
     @require_async_context
-    @alru_cache(maxsize=None)
+    @cache_per_block(alru_cache(maxsize=None))
     async def get_latest_pool_epochs(self) -> List[LiquidityPoolEpoch]:
         raw_epochs = await self.apaginate(self.sugar_rewards.functions.epochsLatest)
         if not raw_epochs: return []
-        tokens = await self.get_all_tokens(listed_only=False)
-        epoch_lp_addresses = {normalize_address(epoch[1]) for epoch in raw_epochs}
-        raw_pools = [p for p in await self.get_raw_pools(False) if normalize_address(p[0]) in epoch_lp_addresses]
+        return await self._prepare_latest_epochs(raw_epochs, await self.get_all_tokens(listed_only=False))
+
+    async def _prepare_latest_epochs(self, raw_epochs: List[Tuple], tokens: List[Token]) -> List[LiquidityPoolEpoch]:
+        # only the epochs' pools (and tokens) are built and priced
+        index = await self.get_pool_index()
+        raw_pools = list(filter(None, map(index.find, self.get_latest_epoch_lps(raw_epochs))))
         prices = await self.get_prices(self.get_latest_epoch_price_tokens(raw_epochs, raw_pools, tokens))
-        pools = self.prepare_pools(raw_pools, tokens, prices)
-        return self.prepare_pool_epochs(raw_epochs, pools, tokens, prices)
-    
+        return self.prepare_pool_epochs(raw_epochs, self.prepare_pools(raw_pools, tokens, prices), tokens, prices)
+
+    @require_async_iter_context
+    async def iter_raw_pools(self, for_swaps: bool = False) -> AsyncIterator[List[Tuple]]:
+        """`get_raw_pools` page by page, as pages arrive (a cached or live pool set comes back as one page)."""
+        if not for_swaps and self.block is None and self.pool_sync is not None:
+            yield self.pool_sync.rows
+            return
+        def get_all(limit, offset): return self.sugar.functions.all(limit, offset, 0)
+        name, f = ("forSwaps", self.sugar.functions.forSwaps) if for_swaps else ("all", get_all)
+        async for _, rows in self.aiter_pages_cached(name, f, self.settings.sugar_contract_addr): yield rows
+
+    @require_async_iter_context
+    async def iter_tokens(self, listed_only: bool = False) -> AsyncIterator[List[Token]]:
+        """`get_all_tokens` page by page, as pages arrive; the native token comes first, on its own."""
+        def get_tokens(limit, offset): return self.sugar.functions.tokens(limit, offset, ADDRESS_ZERO, [])
+        yield [self.get_native_token()]
+        async for _, rows in self.aiter_pages_cached("tokens", get_tokens, self.settings.sugar_contract_addr):
+            yield self.prepare_token_page(rows, listed_only)
+
+    @require_async_iter_context
+    async def iter_positions(self, owner: Optional[str] = None) -> AsyncIterator[List[Position]]:
+        """`get_positions` page by page, as pages arrive."""
+        owner = owner or self.signer_address
+        def get_p(limit, offset): return self.sugar.functions.positions(limit, offset, owner)
+        pools = {p.lp: p for p in await self.get_pools()}
+        async for _, rows in self.aiter_pages(get_p): yield self.prepare_position_page(rows, pools)
+
+    @require_async_iter_context
+    async def iter_latest_epochs(self) -> AsyncIterator[List[LiquidityPoolEpoch]]:
+        """`get_latest_pool_epochs` page by page, as pages arrive; each page prices just its own pools."""
+        tokens = await self.get_all_tokens(listed_only=False)
+        async for _, raw_epochs in self.aiter_pages(self.sugar_rewards.functions.epochsLatest):
+            if raw_epochs: yield await self._prepare_latest_epochs(raw_epochs, tokens)
+
     @require_async_context
     async def get_pools_for_swaps(self) -> List[LiquidityPoolForSwap]: return await self.get_pools(for_swaps=True)
 
+    @require_async_context
+    @cache_per_block(alru_cache(maxsize=None))
+    async def get_route_index(self) -> RouteIndex: return RouteIndex.from_pools(await self.get_pools_for_swaps())
+
+    @require_async_context
+    @cache_per_block(alru_cache(maxsize=None))
+    async def get_local_pool_states(self) -> Dict:
+        raw_pools, tokens = await self.get_raw_pools(False), await self.get_all_tokens(listed_only=False)
+        return self.prepare_local_pool_states(raw_pools, tokens)
+
+    @require_async_context
+    async def load_cl_ticks(self, states: Dict, paths: List[List[Tuple]]) -> Dict:
+        """Fetch populated ticks for the CL pools on `paths` that don't have them yet; cached in `states` for later quotes."""
+        async def load(cl_states: List[CLPoolState]):
+            async with self.web3.batch_requests() as batch:
+                self.apply_populated_ticks(states, cl_states, await self.prepare_populated_ticks_batch(batch, cl_states).async_execute())
+        await asyncio.gather(*[load(c) for c in chunk(self.get_unloaded_cl_states(states, paths), 100)])
+        return states
+
     @require_async_context
     async def _get_quotes_for_paths(self, from_token: Token, to_token: Token, amount_in: int, pools: List[LiquidityPoolForSwap], paths: List[List[Tuple]]) -> List[Optional[Quote]]:
         path_pools = self.paths_to_pools(pools, paths)
@@ -469,13 +1011,60 @@ class AsyncChain(CommonChain):
 
     @require_async_context
     async def get_quote(self, from_token: Token, to_token: Token, amount: int, filter_quotes: Optional[Callable[[Quote], bool]] = None) -> Optional[Quote]:
-        pools = self.filter_pools_for_swap(from_token=from_token, to_token=to_token, pools=await self.get_pools_for_swaps())
-        paths = self.get_paths_for_quote(from_token, to_token, pools, self.settings.excluded_tokens_addrs)
-        quotes = sum(await asyncio.gather(*[self._get_quotes_for_paths(from_token, to_token, amount, pools, paths) for paths in chunk(paths, 500)]), [])
+        # filtered quotes aren't cached: the best route under one filter says nothing about another
+        cache, key = (self.quote_cache, self.quote_cache_key(from_token, to_token, amount)) if self.quote_cache.enabled and filter_quotes is None else (None, None)
+        entry = cache.get_routes(key, amount) if cache is not None else None
+        if entry is not None:
+            if entry.amount_in == amount: return entry.quote
+            quotes = [q for q in await self._get_quotes_for_paths(from_token, to_token, amount, await self.get_pools_for_swaps(), entry.routes) if q is not None]
+            if quotes:
+                cache.update(entry, amount, max(quotes, key=lambda q: q.amount_out))
+                return entry.quote
+        pools, index = await self.get_pools_for_swaps(), await self.get_route_index()
+        liquidity = await self.get_pool_liquidity() if self.prunes_quote_paths else None
+        paths = self.get_quote_paths(from_token, to_token, pools, index, liquidity)
+        if self.settings.quote_local_top_n > 0:
+            states = await self.load_cl_ticks(await self.get_local_pool_states(), paths)
+            paths = self.select_paths_for_quote(paths, amount, states)
+        quotes = sum(await asyncio.gather(*[self._get_quotes_for_paths(from_token, to_token, amount, pools, paths) for paths in chunk(paths, self.quote_sizer.batch_size)]), [])
         quotes = list(filter(lambda q: q is not None, quotes))
         if filter_quotes is not None: quotes = list(filter(filter_quotes, quotes))
-        return max(quotes, key=lambda q: q.amount_out) if len(quotes) > 0 else None
+        best = max(quotes, key=lambda q: q.amount_out) if len(quotes) > 0 else None
+        if cache is not None and best is not None: cache.put_routes(key, self.best_quote_routes(quotes, paths), amount, best)
+        return best
     
+    async def _execute_quote_calls(self, from_token: Token, to_token: Token, pools: List[List[LiquidityPoolForSwap]], amounts: List[int],
+                                   paths: List[List[Tuple]], calls: List[Tuple[int, int]]) -> List[Tuple[Tuple[int, int], QuoteInput, object]]:
+        async with self.web3.batch_requests() as batch:
+            batch, inputs = self.prepare_multi_quote_batch(from_token, to_token, batch, pools, amounts, paths, calls)
+            return list(zip(calls, inputs, await batch.async_execute()))
+
+    @require_async_context
+    async def get_quotes(self, from_token: Token, to_token: Token, amounts: List[int], filter_quotes: Optional[Callable[[Quote], bool]] = None,
+                         with_matrix: bool = False) -> DepthQuotes:
+        """Best quote for each of `amounts` (e.g. a depth curve). Routes are searched once and every (route, amount) quoter
+        call goes out in shared JSON-RPC batches (sized by `quote_sizer`), instead of a full `get_quote` per amount."""
+        pools, index = await self.get_pools_for_swaps(), await self.get_route_index()
+        liquidity = await self.get_pool_liquidity() if self.prunes_quote_paths else None
+        paths = self.get_quote_paths(from_token, to_token, pools, index, liquidity)
+        states = await self.load_cl_ticks(await self.get_local_pool_states(), paths) if self.settings.quote_local_top_n > 0 else None
+        calls, path_pools = self.get_quote_calls(amounts, paths, states), self.paths_to_pools(pools, paths)
+        results = await asyncio.gather(*[self._execute_quote_calls(from_token, to_token, path_pools, amounts, paths, c) for c in chunk(calls, self.quote_sizer.batch_size)])
+        return self.prepare_depth_quotes(amounts, paths, [r for rs in results for r in rs], filter_quotes, with_matrix)
+
+    @require_async_context
+    async def get_split_quote(self, from_token: Token, to_token: Token, amount: int, max_routes: int = 3, steps: int = 10) -> Optional[SplitQuote]:
+        """Best way to swap `amount` across up to `max_routes` pool-disjoint routes (see `sugar.split.optimize_split`).
+        Every route is sampled at `steps` even fractions of `amount` with `get_quotes`, the chosen legs are quoted again
+        at their exact amounts. A split that doesn't beat the best single route comes back as that one route."""
+        depth = await self.get_quotes(from_token, to_token, [amount * k // steps for k in range(1, steps + 1)], with_matrix=True)
+        legs = self.prepare_split_legs(depth, amount, max_routes)
+        if not legs: return None
+        paths, amounts = [path for path, _ in legs], [a for _, a in legs]
+        pools = await self.get_pools_for_swaps()
+        results = await self._execute_quote_calls(from_token, to_token, self.paths_to_pools(pools, paths), amounts, paths, [(i, i) for i in range(len(legs))])
+        return self.prepare_split_quote(depth, results)
+
     @require_async_context
     async def swap(self, from_token: Token, to_token: Token, amount: int, slippage: Optional[float] = None):
         q = await self.get_quote(from_token, to_token, amount=amount)
@@ -483,7 +1072,7 @@ class AsyncChain(CommonChain):
         return await self.swap_from_quote(q, slippage=slippage)
         
     @require_async_context
-    async def swap_from_quote(self, quote: Quote, slippage: Optional[float] = None):
+    async def swap_from_quote(self, quote: Union[Quote, SplitQuote], slippage: Optional[float] = None):
         """Build txs for a swap. Pools always route WETH, so the input side has two shapes:
         - **Native (ETH)**: amount goes as `msg.value`; the swapper wraps to WETH internally. No approval.
         - **WETH / ERC20**: requires the swapper to have an ERC20 allowance for `amount_in`; `value=0`.
@@ -491,14 +1080,15 @@ class AsyncChain(CommonChain):
         Returns `[approve_tx, swap_tx]` for ERC20 input, or `[swap_tx]` for native (or when allowance already covers `amount_in`)."""
         swapper, from_token = self.settings.swapper_contract_addr, quote.from_token
         slippage = slippage if slippage is not None else self.settings.swap_slippage
-        planner = setup_planner(quote=quote, slippage=slippage, account=self.signer_address, router_address=swapper,
-                                slipstream_factory_addr=self.settings.slipstream_factory_addr,
-                                old_slipstream_factory_addr=self.settings.old_slipstream_factory_addr)
+        plan = setup_split_planner if isinstance(quote, SplitQuote) else setup_planner
+        planner = plan(quote=quote, slippage=slippage, account=self.signer_address, router_address=swapper,
+                       slipstream_factory_addr=self.settings.slipstream_factory_addr,
+                       old_slipstream_factory_addr=self.settings.old_slipstream_factory_addr)
         execute = self.swapper.functions.execute(planner.commands, planner.inputs)
         if from_token.wrapped_token_address:  # native: swapper wraps msg.value to WETH
-            return [await self.build_tx(execute, value=quote.input.amount_in)]
+            return [await self.build_tx(execute, value=quote.amount_in)]
         # ERC20 (incl. WETH): approve the wrapped token to the swapper, then execute with value=0
-        approval_tx = await self.set_token_allowance(from_token, swapper, quote.input.amount_in)
+        approval_tx = await self.set_token_allowance(from_token, swapper, quote.amount_in)
         main = await self.build_tx(execute)
         return [t for t in (approval_tx, main) if t is not None]
 
@@ -672,6 +1262,44 @@ class AsyncChain(CommonChain):
         def get_p(limit, offset): return self.sugar.functions.positions(limit, offset, owner)
         return self.prepare_positions(await self.apaginate(get_p), await self.get_pools())
 
+    async def _batch_call(self, items: List, make: Callable) -> List:
+        async def run(batch: List):
+            async with self.web3.batch_requests() as b:
+                for item in batch: b.add(make(item))
+                return await b.async_execute()
+        return [r for rs in await asyncio.gather(*[run(c) for c in chunk(items, WALLET_SCAN_BATCH_SIZE)]) for r in rs]
+
+    @require_async_context
+    async def get_wallet_positions(self, owner: Optional[str] = None) -> List[Position]:
+        """`get_positions` for a single wallet without a Sugar `positions` scan over every pool or `get_pools()`.
+
+        The wallet's pools are found with light balance reads (LP / gauge / ALM balances, staked CL NFT counts, and
+        `balanceOf` / `tokenOfOwnerByIndex` / `positions` on the NFPMs), `positions` is read over just those pools'
+        Sugar offsets, and only their pools are built, priced by their own tokens. Uses the (cached) raw pool rows."""
+        owner = normalize_address(owner or self.signer_address)
+        index = await self.get_pool_index()
+        calls, nfpms = self.get_wallet_balance_calls(index.rows, owner), self.get_wallet_nfpms(index.rows)
+        managers = [self.web3.eth.contract(address=a, abi=get_abi("nfpm")) for a in dict.fromkeys(k[0] for k in nfpms)]
+        balances, counts = await asyncio.gather(self._batch_call([tx for _, tx in calls], lambda tx: self.web3.eth.call(tx, ccip_read_enabled=False)),
+                                                self._batch_call(managers, lambda m: m.functions.balanceOf(owner)))
+        self.check_reads(counts, "NFPM balance")
+        owned = [(m, k) for m, c in zip(managers, counts) for k in range(c)]
+        ids = await self._batch_call(owned, lambda mk: mk[0].functions.tokenOfOwnerByIndex(owner, mk[1]))
+        self.check_reads(ids, "NFPM token")
+        nfts = await self._batch_call([(m, i) for (m, _), i in zip(owned, ids)], lambda mi: mi[0].functions.positions(mi[1]))
+        found = self.find_wallet_pools(calls, balances, nfpms, [(m.address, p) for (m, _), p in zip(owned, nfts)])
+        pool_count = await self.get_pool_count()
+        windows = self.get_position_windows(found, max(0, pool_count - len(index.rows)))
+        def get_p(limit, offset): return self.sugar.functions.positions(limit, offset, owner)
+        # windows don't overlap, so every position comes back once
+        raw = in_offset_order([page async for page in self.aiter_pages(get_p, self.get_window_paginator(windows, pool_count))]) if windows else []
+        if not raw: return []
+        rows = self.get_position_pool_rows(raw, index)
+        tokens = await self.get_all_tokens()
+        # same token set as the epoch view: stable, native and each pool's token0/1/emissions token
+        prices = await self.get_prices(self.get_latest_epoch_price_tokens([], rows, tokens))
+        return self.prepare_positions(raw, self.prepare_pools(rows, tokens, prices))
+
     @require_async_context
     async def withdraw(self, withdrawal: Withdrawal, delay_in_minutes: float = 30, slippage: float = 0.01, collect: bool = True, unwrap_native: bool = False):
         """Execute a withdrawal. Dispatches on `withdrawal.pool.is_cl`."""
@@ -792,7 +1420,7 @@ class Chain(CommonChain):
     def __enter__(self):
         """Sync context manager entry"""
         self._in_context = True
-        self.web3 = Web3(HTTPProvider(self.settings.rpc_uri))
+        self.web3 = Web3(provider_pool.get(self.settings.rpc_uri, self.settings.rpc_max_connections, self.settings.rpc_uris))
         self.sugar = self.web3.eth.contract(address=self.settings.sugar_contract_addr, abi=get_abi("sugar"))
         self.sugar_rewards = self.web3.eth.contract(address=self.settings.sugar_rewards_contract_addr, abi=get_abi("sugar_rewards"))
         self.slipstream = self.web3.eth.contract(address=self.settings.slipstream_contract_addr, abi=get_abi("slipstream"))
@@ -805,41 +1433,120 @@ class Chain(CommonChain):
             # TODO: clean this up when interchain jazz is fully implemented
             self.ica_router = self.web3.eth.contract(address=self.settings.interchain_router_contract_addr, abi=get_abi("interchain_router"))
 
-        # set up caching for price oracle
-        self._get_prices = cached(TTLCache(ttl=self.settings.pricing_cache_timeout_seconds, maxsize=self.settings.price_batch_size * 10))(self._get_prices)
+        # prices read at a pinned block never go stale, so those are kept; fresh ones go through `price_cache`
+        self._get_block_prices = lru_cache(maxsize=None)(self._get_prices)
+        if self.settings.price_refresh_interval_seconds > 0: self.start_price_refresher()
 
         return self
 
+    @require_context
+    @contextmanager
+    def snapshot(self):
+        """`at_block` for the current head: `with chain.snapshot() as block: ...`"""
+        with self.at_block(self.web3.eth.block_number) as block: yield block
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Sync context manager exit"""
+        self.stop_price_refresher()
         self._in_context = False
         return None
-    
-    def paginate(self, f: Callable):
-        pool_count = self.get_pool_count()
-        results, batches = [], self.get_pool_paginator(pool_count)
 
-        def process_batch(batch: List[Tuple]):
-            with self.web3.batch_requests() as batcher:
-                for offset, limit in batch: batcher.add(f(limit, offset))
-                return sum(batcher.execute(), [])
+    _price_refresher: Optional[Tuple[threading.Thread, threading.Event, threading.Event]] = None
 
-        
-        with ThreadPoolExecutor(max_workers=self.settings.threading_max_workers) as executor:
-            future_to_batch = {
-                executor.submit(process_batch, batch): batch
-                for batch in batches
-            }
-            for future in as_completed(future_to_batch):
-                try: results.extend(future.result())
-                except Exception as e:
-                    print(f"Error processing path chunk: {e}")
-                    continue
+    def _refresh_prices(self, interval: float, stop: threading.Event, wake: threading.Event):
+        while not stop.is_set():
+            wake.wait(interval)
+            wake.clear()
+            # only "latest" prices are refreshed; `_get_prices` reads them at "latest" even if a pin lands mid-fetch
+            if not stop.is_set() and self.block is None: self.price_cache.refresh(self._get_prices, interval)
 
-        return results
+    @require_context
+    def start_price_refresher(self, interval: Optional[float] = None):
+        """Re-read the prices callers ask for from a background thread every `interval` seconds (default
+        `price_refresh_interval_seconds`), ahead of their expiry, so reads don't wait for the oracle. Rates
+        up to `price_max_stale_seconds` past expiry are served while it catches up. Stopped on context exit."""
+        interval = interval or self.settings.price_refresh_interval_seconds
+        if interval <= 0: raise ValueError("price refresher needs an interval > 0")
+        if self._price_refresher is not None: return
+        stop, wake = threading.Event(), threading.Event()
+        thread = threading.Thread(target=self._refresh_prices, args=(interval, stop, wake), name=f"sugar-prices-{self.chain_id}", daemon=True)
+        self._price_refresher, self.price_cache.wake = (thread, stop, wake), wake.set
+        thread.start()
+
+    def stop_price_refresher(self):
+        if self._price_refresher is None: return
+        (thread, stop, wake), self._price_refresher = self._price_refresher, None
+        self.price_cache.wake = None
+        stop.set()
+        wake.set()
+        thread.join()
+    
+    def iter_pages(self, f: Callable, batches: Optional[List[List[Tuple[int, int]]]] = None) -> Iterator[Tuple[int, List]]:
+        """`(offset, rows)` for every page of the paginated Sugar read `f(limit, offset)`, yielded as batches complete
+        (not in offset order). Failed batches are retried in halves and failed pages split (see `PageSizer`).
+        `batches` of `(offset, limit)` pages default to every pool (`get_pool_paginator`)."""
+        if batches is None: batches = self.get_pool_paginator(self.get_pool_count())
+        def process_batch(batch: List[Tuple]) -> List[Tuple[int, List]]:
+            start = time.perf_counter()
+            try:
+                with self.web3.batch_requests() as batcher:
+                    for offset, limit in batch: batcher.add(f(limit, offset))
+                    responses = batcher.execute()
+            except Exception as e:
+                if len(batch) > 1:
+                    self.page_sizer.batch_failed(len(batch))
+                    return process_batch(batch[:len(batch) // 2]) + process_batch(batch[len(batch) // 2:])
+                responses = [e]
+            else:
+                if not any(isinstance(r, Exception) for r in responses): self.page_sizer.observe(batch, time.perf_counter() - start)
+            pages = []
+            for (offset, limit), r in zip(batch, responses):
+                if not isinstance(r, Exception):
+                    pages.append((offset, r))
+                    continue
+                limits = self.page_sizer.page_failed(limit)
+                if not limits: raise r
+                pages.extend(process_batch([(offset, limits[0]), (offset + limits[0], limits[1])]))
+            return pages
+
+        executor = ThreadPoolExecutor(max_workers=self.settings.threading_max_workers)
+        try:
+            # a batch that still fails raises (as in `aiter_pages`): a partial read must not pass for the full set
+            for future in as_completed([executor.submit(process_batch, batch) for batch in batches]): yield from future.result()
+        finally:
+            # the consumer may stop early (or a batch failed): drop batches that haven't started
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def paginate(self, f: Callable) -> List: return in_offset_order(list(self.iter_pages(f)))
+
+    def iter_pages_cached(self, name: str, f: Callable, contract_addr: str) -> Iterator[Tuple[int, List]]:
+        """`iter_pages` through the disk cache: a hit comes back as one page, a miss is stored once every page arrived."""
+        if not self.disk_cache:
+            yield from self.iter_pages(f)
+            return
+        key, pinned = DiskCache.make_key(self.chain_id, contract_addr, self.block, name), self.block is not None
+        raw = self.disk_cache.get(key)
+        if raw is not None:
+            yield 0, raw
+            return
+        pages = []
+        for page in self.iter_pages(f):
+            pages.append(page)
+            yield page
+        self.disk_cache.set(key, in_offset_order(pages), pinned=pinned)
+
+    def paginate_cached(self, name: str, f: Callable, contract_addr: str) -> List:
+        """`paginate` through the disk cache (when `cache_dir` is set), keyed by chain, contract, block and `name`."""
+        if not self.disk_cache: return self.paginate(f)
+        key = DiskCache.make_key(self.chain_id, contract_addr, self.block, name)
+        raw = self.disk_cache.get(key)
+        if raw is None:
+            raw = self.paginate(f)
+            self.disk_cache.set(key, raw, pinned=self.block is not None)
+        return raw
 
     @require_context
-    @lru_cache(maxsize=None)
+    @cache_per_block(lru_cache(maxsize=None))
     def get_pool_count(self) -> int:
         """Pool count, cached per chain instance."""
         return self.sugar.functions.count().call()
@@ -914,24 +1621,38 @@ class Chain(CommonChain):
         return self._approve_if_needed(self.prepare_set_token_allowance_contract(token, self.web3.eth.contract), addr, amount)
 
     @require_context
-    @lru_cache(maxsize=None)
+    @cache_per_block(lru_cache(maxsize=None))
     def get_all_tokens(self, listed_only: bool = False) -> List[Token]:
         def get_tokens(limit, offset): return self.sugar.functions.tokens(limit, offset, ADDRESS_ZERO, [])
-        return self.prepare_tokens(self.paginate(get_tokens), listed_only)
+        return self.prepare_tokens(self.paginate_cached("tokens", get_tokens, self.settings.sugar_contract_addr), listed_only)
+
+    @require_context
+    @cache_per_block(lru_cache(maxsize=None))
+    def get_token_index(self) -> TokenIndex: return TokenIndex(self.get_all_tokens())
 
     @require_context
     def get_token(self, ref) -> Optional[Token]:
         """Resolve a token by 0x address, symbol (case-insensitive), or int (hex address as integer). Returns None if not found."""
-        if not ref: return None
-        if isinstance(ref, int): ref = '0x' + format(ref, '040x')
-        tokens = self.get_all_tokens()
-        if ref.startswith("0x"): return self.find_token_by_address(tokens, ref)
-        return next((t for t in tokens if t.symbol.lower() == ref.lower()), None)
-    
+        return self.get_token_index().find(ref)
+
+    @require_context
+    @cache_per_block(lru_cache(maxsize=None))
+    def get_pool_index(self) -> PoolIndex: return PoolIndex(self.get_raw_pools(False))
+
     @require_context
     def get_pool_by_address(self, address: str) -> Optional[LiquidityPool]:
         """Find a pool by LP address (case-insensitive). Returns None if not found."""
-        return next((p for p in self.get_pools() if p.lp.lower() == address.lower()), None)
+        row = self.get_pool_index().find(address)
+        return next(iter(self._prepare_rows([row])), None) if row else None
+
+    @require_context
+    def get_pools_by_pair(self, token_a: Token, token_b: Token) -> List[LiquidityPool]:
+        """Every pool between the two tokens (either order)."""
+        return self._prepare_rows(self.get_pool_index().find_by_pair(token_a.token_address, token_b.token_address))
+
+    def _prepare_rows(self, rows: List[Tuple]) -> List[LiquidityPool]:
+        tokens = self.get_all_tokens(listed_only=False)
+        return self.prepare_pools(rows, tokens, self.get_prices(tokens)) if rows else []
 
     @require_context
     def balance_of(self, token_address: str, owner_address: str) -> int:
@@ -950,8 +1671,9 @@ class Chain(CommonChain):
     @require_context
     def get_bridge_token(self) -> Token: return self._get_bridge_token(self.get_all_tokens())
 
-    def _get_prices(self, tokens: Tuple[Token], max_retries: int = 3) -> List[int]:
-        """Batched oracle reads, filtered to priceable tokens. Result is mapped back to input order (filtered tokens get 0)."""
+    def _get_prices(self, tokens: Tuple[Token], block: Optional[int] = None, max_retries: int = 3) -> List[int]:
+        """Batched oracle reads, filtered to priceable tokens. Result is mapped back to input order (filtered tokens get 0).
+        Reads at `block`, else "latest" even under `at_block`, so a background refresh never stores pinned rates as fresh."""
         request_tokens = self.get_price_request_tokens(list(tokens))
         chunks = list(chunk(request_tokens, self.settings.price_batch_size))
         def _exec(cs):
@@ -959,7 +1681,8 @@ class Chain(CommonChain):
                 for c in cs:
                     b.add(self.prices.functions.getManyRatesToEthWithCustomConnectors(
                         [t.wrapped_token_address or t.token_address for t in c],
-                        False, self.get_price_connectors(), self.settings.price_threshold_filter))
+                        False, self.get_price_connectors(), self.settings.price_threshold_filter
+                    ).call(block_identifier="latest" if block is None else block))
                 return b.execute()
         results = _exec(chunks) if chunks else []
         for _ in range(max_retries):
@@ -974,29 +1697,115 @@ class Chain(CommonChain):
         rates = {t.token_address: r for c, rs in zip(chunks, results) for t, r in zip(c, rs)}
         return [rates.get(t.token_address, 0) for t in tokens]
 
+    def _get_rates(self, tokens: List[Token]) -> List[int]:
+        # cached oracle reads: the same list comes back while the rates don't change, so it also identifies the price snapshot
+        if self.block is None: return self.price_cache.get_rates(tokens, self._get_prices)
+        return self._get_block_prices(tuple(tokens), self.block)
+
     @require_context
     def get_prices(self, tokens: List[Token]) -> List[Price]:
         """Get prices for tokens in target stable token"""
-        return self.prepare_prices(tokens, self._get_prices(tuple(tokens)))
+        return self.prepare_prices(tokens, self._get_rates(tokens))
+
+    @require_context
+    def get_price_array(self, tokens: List[Token]) -> np.ndarray:
+        """`get_prices` as a float64 array: `get_price_array(tokens)[i]` is the price of `tokens[i]`"""
+        return self.prepare_price_array(tokens, self._get_rates(tokens))
     
-    @lru_cache(maxsize=None)
     def get_raw_pools(self, for_swaps: bool):
+        # once `refresh_pools` follows the head, "latest" `Sugar.all` reads come from its live rows
+        if not for_swaps and self.block is None and self.pool_sync is not None: return self.pool_sync.rows
+        return self._get_raw_pools(for_swaps)
+
+    @cache_per_block(lru_cache(maxsize=None))
+    def _get_raw_pools(self, for_swaps: bool):
         def get_all(limit, offset): return self.sugar.functions.all(limit, offset, 0)
-        return self.paginate(self.sugar.functions.forSwaps if for_swaps else get_all)
+        name, f = ("forSwaps", self.sugar.functions.forSwaps) if for_swaps else ("all", get_all)
+        return self.paginate_cached(name, f, self.settings.sugar_contract_addr)
+
+    def _read_pool_pages(self, pages: List[Tuple[int, int]]) -> List[Tuple[Tuple[int, int], List[Tuple]]]:
+        """`Sugar.all` rows of `pages`, read through `iter_pages` (batched per `page_sizer`, failing pages split)."""
+        def get_all(limit, offset): return self.sugar.functions.all(limit, offset, 0)
+        return in_requested_pages(pages, self.iter_pages(get_all, chunk(pages, self.page_sizer.batch_size)))
+
+    @require_context
+    def refresh_pools(self) -> List[Tuple]:
+        """Bring the "latest" pool set (`get_pools`, `get_raw_pools(False)`, local quote states) up to the head.
+
+        The first call reads every `Sugar.all` page pinned at the head and starts tracking it. Later calls pull
+        Sync/Swap/Mint/Burn logs of the known pools since the last synced block, patch reserves and CL
+        slot0/liquidity in place, and re-read only the pages holding pools whose liquidity moved or that are new."""
+        if self.block is not None: raise RuntimeError("refresh_pools follows the head, call it outside at_block")
+        head = self.web3.eth.block_number
+        if self.pool_sync is not None and head <= self.pool_sync.block: return self.pool_sync.rows
+        with self.at_block(head):
+            count = self.sugar.functions.count().call()
+            if self.pool_sync is None:
+                self.pool_sync = PoolSync.from_pages(head, count, self._read_pool_pages(sum(self.get_pool_paginator(count), [])))
+                # "latest" states and the pool index were built from the paginated set
+                self.clear_block_caches(self.get_local_pool_states, self.get_pool_index)
+                return self.pool_sync.rows
+            filters = self.get_pool_log_filters(self.pool_sync.block + 1, head)
+            with self.pool_sync.advance(head, count) as sync:
+                patched, dirty = sync.apply_logs(sum([self.web3.eth.get_logs(f) for f in filters], []))
+                new_pages = sync.new_pages(count, self.calculate_optimal_batch_size(count))
+                touched = sync.apply_pages(self._read_pool_pages(sync.pages_for(dirty) + new_pages))
+        # the live rows were patched in place, so pools prepared from them (and quotes made on them) are stale
+        self.prepared_pools.clear()
+        self.pool_liquidity.clear()
+        self.quote_cache.clear()
+        if new_pages:
+            # new pools also change the swap set and the pool index: drop them and the route index built on the swap set
+            self.clear_block_caches(self._get_raw_pools, self.get_route_index, self.get_pool_index)
+        if self.settings.quote_local_top_n > 0:
+            self.apply_pool_sync(self.get_local_pool_states(), patched | touched, dirty, self.get_all_tokens(listed_only=False))
+        return self.pool_sync.rows
 
     @require_context
     def get_pools(self, for_swaps: bool = False) -> List[LiquidityPool]:
+        """Pools with prices. Within a price cache window (and until `refresh`) the same list is returned."""
         pools = self.get_raw_pools(for_swaps)
         if not for_swaps:
             tokens = self.get_all_tokens(listed_only=False)
-            return self.prepare_pools(pools, tokens, self.get_prices(tokens))
+            rates = self._get_rates(tokens)
+            return self.prepared_pools.get((pools, tokens, rates), lambda: self.prepare_pools(pools, tokens, self.prepare_prices(tokens, rates)))
         else: return self.prepare_pools_for_swap(pools)
 
+    @require_context
+    def get_pool_table(self) -> PoolTable:
+        """`get_pools` as a columnar `PoolTable`: vectorized tvl/apr/volume, `LiquidityPool`s only built on row access."""
+        tokens = self.get_all_tokens(listed_only=False)
+        return PoolTable.from_tuples(self.get_raw_pools(False), tokens, self.get_prices(tokens), self.chain_id, self.name)
+
+    @require_context
+    def get_pool_liquidity(self) -> Dict[str, float]:
+        """TVL by LP (priced sides only), the liquidity score used to prune quote routes. Memoized like `get_pools`."""
+        pools, tokens = self.get_raw_pools(False), self.get_all_tokens()
+        rates = self._get_rates(tokens)
+        return self.pool_liquidity.get((pools, tokens, rates), lambda: self.prepare_pool_liquidity(pools, tokens, self.prepare_prices(tokens, rates)))
+
     @require_context
     def get_pools_for_swaps(self) -> List[LiquidityPoolForSwap]: return self.get_pools(for_swaps=True)
 
     @require_context
-    @lru_cache(maxsize=None)
+    @cache_per_block(lru_cache(maxsize=None))
+    def get_route_index(self) -> RouteIndex: return RouteIndex.from_pools(self.get_pools_for_swaps())
+
+    @require_context
+    @cache_per_block(lru_cache(maxsize=None))
+    def get_local_pool_states(self) -> Dict:
+        return self.prepare_local_pool_states(self.get_raw_pools(False), self.get_all_tokens(listed_only=False))
+
+    @require_context
+    def load_cl_ticks(self, states: Dict, paths: List[List[Tuple]]) -> Dict:
+        """Fetch populated ticks for the CL pools on `paths` that don't have them yet; cached in `states` for later quotes."""
+        for cl_states in chunk(self.get_unloaded_cl_states(states, paths), 100):
+            with self.web3.batch_requests() as batch:
+                self.apply_populated_ticks(states, cl_states, self.prepare_populated_ticks_batch(batch, cl_states).execute())
+        return states
+
+    @require_context
+    @cache_per_block(lru_cache(maxsize=None))
     def get_pool_epochs(self, lp: str, offset: int = 0, limit: int = 10) -> List[LiquidityPoolEpoch]:
         tokens, pools = self.get_all_tokens(listed_only=False), self.get_pools()
         prices = self.get_prices(tokens)
@@ -1004,57 +1813,134 @@ class Chain(CommonChain):
         return self.prepare_pool_epochs(r, pools, tokens, prices)
 
     @require_context
-    @lru_cache(maxsize=None)
+    @cache_per_block(lru_cache(maxsize=None))
     def get_latest_pool_epochs(self) -> List[LiquidityPoolEpoch]:
         raw_epochs = self.paginate(self.sugar_rewards.functions.epochsLatest)
         if not raw_epochs: return []
-        tokens = self.get_all_tokens(listed_only=False)
-        epoch_lp_addresses = {normalize_address(epoch[1]) for epoch in raw_epochs}
-        raw_pools = [p for p in self.get_raw_pools(False) if normalize_address(p[0]) in epoch_lp_addresses]
+        return self._prepare_latest_epochs(raw_epochs, self.get_all_tokens(listed_only=False))
+
+    def _prepare_latest_epochs(self, raw_epochs: List[Tuple], tokens: List[Token]) -> List[LiquidityPoolEpoch]:
+        # only the epochs' pools (and tokens) are built and priced
+        index = self.get_pool_index()
+        raw_pools = list(filter(None, map(index.find, self.get_latest_epoch_lps(raw_epochs))))
         prices = self.get_prices(self.get_latest_epoch_price_tokens(raw_epochs, raw_pools, tokens))
-        pools = self.prepare_pools(raw_pools, tokens, prices)
-        return self.prepare_pool_epochs(raw_epochs, pools, tokens, prices)
+        return self.prepare_pool_epochs(raw_epochs, self.prepare_pools(raw_pools, tokens, prices), tokens, prices)
 
     @require_context
-    def _get_quotes_for_paths(self, from_token: Token, to_token: Token, amount_in: int, pools: List[LiquidityPoolForSwap], paths: List[List[Tuple]]) -> List[Optional[Quote]]:
-        path_pools = self.paths_to_pools(pools, paths)
+    def iter_raw_pools(self, for_swaps: bool = False) -> Iterator[List[Tuple]]:
+        """`get_raw_pools` page by page, as pages arrive (a cached or live pool set comes back as one page)."""
+        if not for_swaps and self.block is None and self.pool_sync is not None: return iter([self.pool_sync.rows])
+        def get_all(limit, offset): return self.sugar.functions.all(limit, offset, 0)
+        name, f = ("forSwaps", self.sugar.functions.forSwaps) if for_swaps else ("all", get_all)
+        return (rows for _, rows in self.iter_pages_cached(name, f, self.settings.sugar_contract_addr))
+
+    @require_context
+    def iter_tokens(self, listed_only: bool = False) -> Iterator[List[Token]]:
+        """`get_all_tokens` page by page, as pages arrive; the native token comes first, on its own."""
+        def get_tokens(limit, offset): return self.sugar.functions.tokens(limit, offset, ADDRESS_ZERO, [])
+        yield [self.get_native_token()]
+        for _, rows in self.iter_pages_cached("tokens", get_tokens, self.settings.sugar_contract_addr):
+            yield self.prepare_token_page(rows, listed_only)
+
+    @require_context
+    def iter_positions(self, owner: Optional[str] = None) -> Iterator[List[Position]]:
+        """`get_positions` page by page, as pages arrive."""
+        owner = owner or self.signer_address
+        def get_p(limit, offset): return self.sugar.functions.positions(limit, offset, owner)
+        pools = {p.lp: p for p in self.get_pools()}
+        for _, rows in self.iter_pages(get_p): yield self.prepare_position_page(rows, pools)
+
+    @require_context
+    def iter_latest_epochs(self) -> Iterator[List[LiquidityPoolEpoch]]:
+        """`get_latest_pool_epochs` page by page, as pages arrive; each page prices just its own pools."""
+        tokens = self.get_all_tokens(listed_only=False)
+        for _, raw_epochs in self.iter_pages(self.sugar_rewards.functions.epochsLatest):
+            if raw_epochs: yield self._prepare_latest_epochs(raw_epochs, tokens)
+
+    @require_context
+    def _execute_quote_batch(self, calls: List, inputs: List[QuoteInput]) -> List[Quote]:
         with self.web3.batch_requests() as batch:
-            batch, inputs = self.prepare_quote_batch(from_token, to_token, batch, path_pools, amount_in, paths)
+            for call in calls: batch.add(call)
             return self.prepare_quotes(inputs, batch.execute())
+
+    @require_context
+    def _get_quotes_for_paths(self, from_token: Token, to_token: Token, amount_in: int, pools: List[LiquidityPoolForSwap], paths: List[List[Tuple]]) -> List[Optional[Quote]]:
+        calls, inputs = self.prepare_quote_batch(from_token, to_token, CallList(), self.paths_to_pools(pools, paths), amount_in, paths)
+        return self._execute_quote_batch(calls, inputs)
+
+    def _run_quote_batches(self, items: Iterable, prepare: Callable, execute: Callable) -> List:
+        """`run_pipelined` with this chain's `quote_sizer`. Failed batches are kept in `quote_errors` (per call); when
+        nothing could be quoted because of them, the first one is raised."""
+        results, self.quote_errors = run_pipelined(items, prepare, execute, self.quote_sizer)
+        if self.quote_errors and not results:
+            first = self.quote_errors[0]
+            raise RuntimeError(f"quoter batches failed: {len(self.quote_errors)} unresolved ({first})") from first.error
+        return results
     
     @require_context
     def get_quote(self, from_token: Token, to_token: Token, amount: int, filter_quotes: Optional[Callable[[Quote], bool]] = None) -> Optional[Quote]:
-        pools = self.filter_pools_for_swap(from_token=from_token, to_token=to_token, pools=self.get_pools_for_swaps())
-        paths = self.get_paths_for_quote(from_token, to_token, pools, self.settings.excluded_tokens_addrs)
-        path_chunks = list(chunk(paths, 500))
+        # filtered quotes aren't cached: the best route under one filter says nothing about another
+        cache, key = (self.quote_cache, self.quote_cache_key(from_token, to_token, amount)) if self.quote_cache.enabled and filter_quotes is None else (None, None)
+        entry = cache.get_routes(key, amount) if cache is not None else None
+        if entry is not None:
+            if entry.amount_in == amount: return entry.quote
+            quotes = [q for q in self._get_quotes_for_paths(from_token, to_token, amount, self.get_pools_for_swaps(), entry.routes) if q is not None]
+            if quotes:
+                cache.update(entry, amount, max(quotes, key=lambda q: q.amount_out))
+                return entry.quote
+        pools, index = self.get_pools_for_swaps(), self.get_route_index()
+        if self.streams_quote_paths:
+            # nothing needs the whole route set up front: quote routes while the search is still finding them
+            paths = self.iter_paths_for_quote(from_token, to_token, pools, self.settings.excluded_tokens_addrs, index=index)
+        else:
+            liquidity = self.get_pool_liquidity() if self.prunes_quote_paths else None
+            paths = self.get_quote_paths(from_token, to_token, pools, index, liquidity)
+            if self.settings.quote_local_top_n > 0:
+                states = self.load_cl_ticks(self.get_local_pool_states(), paths)
+                paths = self.select_paths_for_quote(paths, amount, states)
+        pools_d = {p.lp: p for p in pools}
 
-        def get_quotes_for_chunk(paths_chunk):
-            return self._get_quotes_for_paths(from_token, to_token, amount, pools, paths_chunk)
-        
-        all_quotes = []
-        
-        with ThreadPoolExecutor(max_workers=self.settings.threading_max_workers) as executor:
-            # Submit all chunk processing tasks
-            future_to_chunk = {
-                executor.submit(get_quotes_for_chunk, chunk_paths): chunk_paths 
-                for chunk_paths in path_chunks
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_chunk):
-                try:
-                    all_quotes.extend(future.result())
-                except Exception as e:
-                    print(f"Error processing path chunk: {e}")
-                    continue
+        def prepare(batch: List[List[Tuple]]):
+            return self.prepare_quote_batch(from_token, to_token, CallList(), [[pools_d[h[2]] for h in path] for path in batch], amount, batch)
 
-        # Filter out None quotes
-        all_quotes = [q for q in all_quotes if q is not None]
-    
-        if filter_quotes is not None:  all_quotes = list(filter(filter_quotes, all_quotes))
+        quotes = self._run_quote_batches(paths, prepare, lambda prepared: self._execute_quote_batch(*prepared))
+        if filter_quotes is not None: quotes = list(filter(filter_quotes, quotes))
+        best = max(quotes, key=lambda q: q.amount_out) if len(quotes) > 0 else None
+        if cache is not None and best is not None: cache.put_routes(key, self.best_quote_routes(quotes, paths), amount, best)
+        return best
+
+    def _execute_quote_calls(self, from_token: Token, to_token: Token, pools: List[List[LiquidityPoolForSwap]], amounts: List[int],
+                             paths: List[List[Tuple]], calls: List[Tuple[int, int]]) -> List[Tuple[Tuple[int, int], QuoteInput, object]]:
+        with self.web3.batch_requests() as batch:
+            batch, inputs = self.prepare_multi_quote_batch(from_token, to_token, batch, pools, amounts, paths, calls)
+            return list(zip(calls, inputs, batch.execute()))
 
-        return max(all_quotes, key=lambda q: q.amount_out) if len(all_quotes) > 0 else None
+    @require_context
+    def get_quotes(self, from_token: Token, to_token: Token, amounts: List[int], filter_quotes: Optional[Callable[[Quote], bool]] = None,
+                   with_matrix: bool = False) -> DepthQuotes:
+        """Best quote for each of `amounts` (e.g. a depth curve). Routes are searched once and every (route, amount) quoter
+        call goes out in shared JSON-RPC batches (sized by `quote_sizer`), instead of a full `get_quote` per amount."""
+        pools, index = self.get_pools_for_swaps(), self.get_route_index()
+        liquidity = self.get_pool_liquidity() if self.prunes_quote_paths else None
+        paths = self.get_quote_paths(from_token, to_token, pools, index, liquidity)
+        states = self.load_cl_ticks(self.get_local_pool_states(), paths) if self.settings.quote_local_top_n > 0 else None
+        calls, path_pools = self.get_quote_calls(amounts, paths, states), self.paths_to_pools(pools, paths)
+        results = self._run_quote_batches(calls, lambda batch: batch, lambda batch: self._execute_quote_calls(from_token, to_token, path_pools, amounts, paths, batch))
+        return self.prepare_depth_quotes(amounts, paths, results, filter_quotes, with_matrix)
     
+    @require_context
+    def get_split_quote(self, from_token: Token, to_token: Token, amount: int, max_routes: int = 3, steps: int = 10) -> Optional[SplitQuote]:
+        """Best way to swap `amount` across up to `max_routes` pool-disjoint routes (see `sugar.split.optimize_split`).
+        Every route is sampled at `steps` even fractions of `amount` with `get_quotes`, the chosen legs are quoted again
+        at their exact amounts. A split that doesn't beat the best single route comes back as that one route."""
+        depth = self.get_quotes(from_token, to_token, [amount * k // steps for k in range(1, steps + 1)], with_matrix=True)
+        legs = self.prepare_split_legs(depth, amount, max_routes)
+        if not legs: return None
+        paths, amounts = [path for path, _ in legs], [a for _, a in legs]
+        pools = self.get_pools_for_swaps()
+        results = self._execute_quote_calls(from_token, to_token, self.paths_to_pools(pools, paths), amounts, paths, [(i, i) for i in range(len(legs))])
+        return self.prepare_split_quote(depth, results)
+
     @require_context
     def swap(self, from_token: Token, to_token: Token, amount: int, slippage: Optional[float] = None):
         q = self.get_quote(from_token, to_token, amount=amount)
@@ -1062,7 +1948,7 @@ class Chain(CommonChain):
         return self.swap_from_quote(q, slippage=slippage)
         
     @require_context
-    def swap_from_quote(self, quote: Quote, slippage: Optional[float] = None):
+    def swap_from_quote(self, quote: Union[Quote, SplitQuote], slippage: Optional[float] = None):
         """Build txs for a swap. Pools always route WETH, so the input side has two shapes:
         - **Native (ETH)**: amount goes as `msg.value`; the swapper wraps to WETH internally. No approval.
         - **WETH / ERC20**: requires the swapper to have an ERC20 allowance for `amount_in`; `value=0`.
@@ -1070,14 +1956,15 @@ class Chain(CommonChain):
         Returns `[approve_tx, swap_tx]` for ERC20 input, or `[swap_tx]` for native (or when allowance already covers `amount_in`)."""
         swapper, from_token = self.settings.swapper_contract_addr, quote.from_token
         slippage = slippage if slippage is not None else self.settings.swap_slippage
-        planner = setup_planner(quote=quote, slippage=slippage, account=self.signer_address, router_address=swapper,
-                                slipstream_factory_addr=self.settings.slipstream_factory_addr,
-                                old_slipstream_factory_addr=self.settings.old_slipstream_factory_addr)
+        plan = setup_split_planner if isinstance(quote, SplitQuote) else setup_planner
+        planner = plan(quote=quote, slippage=slippage, account=self.signer_address, router_address=swapper,
+                       slipstream_factory_addr=self.settings.slipstream_factory_addr,
+                       old_slipstream_factory_addr=self.settings.old_slipstream_factory_addr)
         execute = self.swapper.functions.execute(planner.commands, planner.inputs)
         if from_token.wrapped_token_address:  # native: swapper wraps msg.value to WETH
-            return [self.build_tx(execute, value=quote.input.amount_in)]
+            return [self.build_tx(execute, value=quote.amount_in)]
         # ERC20 (incl. WETH): approve the wrapped token to the swapper, then execute with value=0
-        approval_tx = self.set_token_allowance(from_token, swapper, quote.input.amount_in)
+        approval_tx = self.set_token_allowance(from_token, swapper, quote.amount_in)
         main = self.build_tx(execute)
         return [t for t in (approval_tx, main) if t is not None]
     @require_context
@@ -1227,6 +2114,45 @@ class Chain(CommonChain):
         def get_p(limit, offset): return self.sugar.functions.positions(limit, offset, owner)
         return self.prepare_positions(self.paginate(get_p), self.get_pools())
 
+    def _batch_call(self, items: List, make: Callable) -> List:
+        def run(batch: List):
+            with self.web3.batch_requests() as b:
+                for item in batch: b.add(make(item))
+                return b.execute()
+        with ThreadPoolExecutor(max_workers=self.settings.threading_max_workers) as executor:
+            return [r for rs in executor.map(run, chunk(items, WALLET_SCAN_BATCH_SIZE)) for r in rs]
+
+    @require_context
+    def get_wallet_positions(self, owner: Optional[str] = None) -> List[Position]:
+        """`get_positions` for a single wallet without a Sugar `positions` scan over every pool or `get_pools()`.
+
+        The wallet's pools are found with light balance reads (LP / gauge / ALM balances, staked CL NFT counts, and
+        `balanceOf` / `tokenOfOwnerByIndex` / `positions` on the NFPMs), `positions` is read over just those pools'
+        Sugar offsets, and only their pools are built, priced by their own tokens. Uses the (cached) raw pool rows."""
+        owner = normalize_address(owner or self.signer_address)
+        index = self.get_pool_index()
+        calls, nfpms = self.get_wallet_balance_calls(index.rows, owner), self.get_wallet_nfpms(index.rows)
+        managers = [self.web3.eth.contract(address=a, abi=get_abi("nfpm")) for a in dict.fromkeys(k[0] for k in nfpms)]
+        balances = self._batch_call([tx for _, tx in calls], lambda tx: self.web3.eth.call(tx, ccip_read_enabled=False))
+        counts = self._batch_call(managers, lambda m: m.functions.balanceOf(owner))
+        self.check_reads(counts, "NFPM balance")
+        owned = [(m, k) for m, c in zip(managers, counts) for k in range(c)]
+        ids = self._batch_call(owned, lambda mk: mk[0].functions.tokenOfOwnerByIndex(owner, mk[1]))
+        self.check_reads(ids, "NFPM token")
+        nfts = self._batch_call([(m, i) for (m, _), i in zip(owned, ids)], lambda mi: mi[0].functions.positions(mi[1]))
+        found = self.find_wallet_pools(calls, balances, nfpms, [(m.address, p) for (m, _), p in zip(owned, nfts)])
+        pool_count = self.get_pool_count()
+        windows = self.get_position_windows(found, max(0, pool_count - len(index.rows)))
+        def get_p(limit, offset): return self.sugar.functions.positions(limit, offset, owner)
+        # windows don't overlap, so every position comes back once
+        raw = in_offset_order(self.iter_pages(get_p, self.get_window_paginator(windows, pool_count))) if windows else []
+        if not raw: return []
+        rows = self.get_position_pool_rows(raw, index)
+        tokens = self.get_all_tokens()
+        # same token set as the epoch view: stable, native and each pool's token0/1/emissions token
+        prices = self.get_prices(self.get_latest_epoch_price_tokens([], rows, tokens))
+        return self.prepare_positions(raw, self.prepare_pools(rows, tokens, prices))
+
     @require_context
     def withdraw(self, withdrawal: Withdrawal, delay_in_minutes: float = 30, slippage: float = 0.01,
                  collect: bool = True, unwrap_native: bool = False):
@@ -1483,31 +2409,27 @@ class AsyncCeloChain(AsyncChain, CeloChainCommon):
 class CeloChain(Chain, CeloChainCommon):
     def __init__(self, **kwargs): super().__init__(make_celo_chain_settings(**kwargs), **kwargs)
 
+# chain id -> (sync, async) chain class, the one list of supported chains (`sugar.multichain` fans out over it)
+CHAIN_CLASSES: Dict[str, Tuple[type, type]] = {
+    '10': (OPChain, AsyncOPChain),
+    '8453': (BaseChain, AsyncBaseChain),
+    '1135': (LiskChain, AsyncLiskChain),
+    '130': (UniChain, AsyncUniChain),
+    '34443': (ModeChain, AsyncModeChain),
+    '252': (FraxtalChain, AsyncFraxtalChain),
+    '57073': (InkChain, AsyncInkChain),
+    '1868': (SoneiumChain, AsyncSoneiumChain),
+    '5330': (SuperseedChain, AsyncSuperseedChain),
+    '42220': (CeloChain, AsyncCeloChain),
+}
+
 def get_chain(chain_id: str, **kwargs) -> Chain:
-    if chain_id == '10': return OPChain(**kwargs)
-    elif chain_id == '8453': return BaseChain(**kwargs)
-    elif chain_id == '130': return UniChain(**kwargs)
-    elif chain_id == '1135': return LiskChain(**kwargs)
-    elif chain_id == '34443': return ModeChain(**kwargs)
-    elif chain_id == '252': return FraxtalChain(**kwargs)
-    elif chain_id == '57073': return InkChain(**kwargs)
-    elif chain_id == '1868': return SoneiumChain(**kwargs)
-    elif chain_id == '5330': return SuperseedChain(**kwargs)
-    elif chain_id == '42220': return CeloChain(**kwargs)
-    else: raise ValueError(f"Unsupported chain ID: {chain_id}")
+    if chain_id not in CHAIN_CLASSES: raise ValueError(f"Unsupported chain ID: {chain_id}")
+    return CHAIN_CLASSES[chain_id][0](**kwargs)
 
 def get_async_chain(chain_id: str, **kwargs) -> AsyncChain:
-    if chain_id == '10': return AsyncOPChain(**kwargs)
-    elif chain_id == '8453': return AsyncBaseChain(**kwargs)
-    elif chain_id == '130': return AsyncUniChain(**kwargs)
-    elif chain_id == '1135': return AsyncLiskChain(**kwargs)
-    elif chain_id == '34443': return AsyncModeChain(**kwargs)
-    elif chain_id == '252': return AsyncFraxtalChain(**kwargs)
-    elif chain_id == '57073': return AsyncInkChain(**kwargs)
-    elif chain_id == '1868': return AsyncSoneiumChain(**kwargs)
-    elif chain_id == '5330': return AsyncSuperseedChain(**kwargs)
-    elif chain_id == '42220': return AsyncCeloChain(**kwargs)
-    else: raise ValueError(f"Unsupported chain ID: {chain_id}")
+    if chain_id not in CHAIN_CLASSES: raise ValueError(f"Unsupported chain ID: {chain_id}")
+    return CHAIN_CLASSES[chain_id][1](**kwargs)
 
 def get_simnet_chain(chain_id: str, **kwargs) -> Chain:
     if chain_id == '130': return UniChainSimnet(**kwargs)
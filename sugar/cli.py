@@ -255,11 +255,15 @@ class CLI:
                 if t is None: raise SystemExit(f'token not found: {ref}')
                 return t.token_address.lower()
             wanted = {a for a in (_resolve(token0), _resolve(token1)) if a}
-            pools = c.get_pools() if full else c.get_pools_for_swaps()
-            addrs = ((lambda p: {p.token0.token_address.lower(), p.token1.token_address.lower()}) if full
-                     else (lambda p: {p.token0_address.lower(), p.token1_address.lower()}))
-            out = [p for p in pools if wanted.issubset(addrs(p)) and type_match(p.type)]
-            if limit is not None: out = out[:limit]
+            if full:
+                # filter columns first so only the matching pools get built
+                table = c.get_pool_table()
+                table = table.where(table.token_mask(wanted) & type_match(table.type))
+                out = [table[i] for i in range(len(table) if limit is None else min(limit, len(table)))]
+            else:
+                addrs = lambda p: {p.token0_address.lower(), p.token1_address.lower()}
+                out = [p for p in c.get_pools_for_swaps() if wanted.issubset(addrs(p)) and type_match(p.type)]
+                if limit is not None: out = out[:limit]
             return [_pool_dict(p, full) for p in out]
 
     def epochs_latest(self, *, chain: int, pool_type: str = None):
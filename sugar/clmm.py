@@ -0,0 +1,167 @@
+__all__ = ['MIN_TICK', 'MAX_TICK', 'MIN_SQRT_RATIO', 'MAX_SQRT_RATIO', 'CL_FEE_DENOMINATOR', 'get_sqrt_ratio_at_tick',
+           'get_tick_at_sqrt_ratio', 'compute_swap_step', 'next_initialized_tick_within_one_word', 'CLPoolState']
+
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Tuple
+from .helpers import normalize_address
+
+# Integer ports of the Uniswap v3 libraries Slipstream pools swap with (TickMath, SqrtPriceMath,
+# SwapMath, TickBitmap). Exact-input only; every division rounds the same way as the solidity code
+# so a simulated swap matches the quoter to the wei.
+
+MIN_TICK, MAX_TICK = -887272, 887272
+MIN_SQRT_RATIO, MAX_SQRT_RATIO = 4295128739, 1461446703485210103287273052203988822378723970342
+Q96, UINT256 = 1 << 96, 1 << 256
+# CL fees are in pips (hundredths of a basis point)
+CL_FEE_DENOMINATOR = 1_000_000
+
+_RATIO_STEPS = [
+    (0x2, 0xfff97272373d413259a46990580e213a), (0x4, 0xfff2e50f5f656932ef12357cf3c7fdcc),
+    (0x8, 0xffe5caca7e10e4e61c3624eaa0941cd0), (0x10, 0xffcb9843d60f6159c9db58835c926644),
+    (0x20, 0xff973b41fa98c081472e6896dfb254c0), (0x40, 0xff2ea16466c96a3843ec78b326b52861),
+    (0x80, 0xfe5dee046a99a2a811c461f1969c3053), (0x100, 0xfcbe86c7900a88aedcffc83b479aa3a4),
+    (0x200, 0xf987a7253ac413176f2b074cf7815e54), (0x400, 0xf3392b0822b70005940c7a398e4b70f3),
+    (0x800, 0xe7159475a2c29b7443b29c7fa6e889d9), (0x1000, 0xd097f3bdfd2022b8845ad8f792aa5825),
+    (0x2000, 0xa9f746462d870fdf8a65dc1f90e061e5), (0x4000, 0x70d869a156d2a1b890bb3df62baf32f7),
+    (0x8000, 0x31be135f97d08fd981231505542fcfa6), (0x10000, 0x9aa508b5b7a84e1c677de54f3e99bc9),
+    (0x20000, 0x5d6af8dedb81196699c329225ee604), (0x40000, 0x2216e584f5fa1ea926041bedfe98),
+    (0x80000, 0x48a170391f7dc42444e8fa2),
+]
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK: raise ValueError("T")
+    ratio = 0xfffcb933bd6fad37aa2d162d1a594001 if abs_tick & 0x1 else 1 << 128
+    for mask, factor in _RATIO_STEPS:
+        if abs_tick & mask: ratio = (ratio * factor) >> 128
+    if tick > 0: ratio = (UINT256 - 1) // ratio
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+def get_tick_at_sqrt_ratio(sqrt_ratio: int) -> int:
+    """Greatest tick whose sqrt ratio is <= `sqrt_ratio` (the TickMath definition, found by bisection)."""
+    if not MIN_SQRT_RATIO <= sqrt_ratio < MAX_SQRT_RATIO: raise ValueError("R")
+    lo, hi = MIN_TICK, MAX_TICK
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if get_sqrt_ratio_at_tick(mid) <= sqrt_ratio: lo = mid
+        else: hi = mid - 1
+    return lo
+
+def _div_up(a: int, b: int) -> int: return -(-a // b)
+
+def _amount0_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b: sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    numerator1, numerator2 = liquidity << 96, sqrt_b - sqrt_a
+    if round_up: return _div_up(_div_up(numerator1 * numerator2, sqrt_b), sqrt_a)
+    return numerator1 * numerator2 // sqrt_b // sqrt_a
+
+def _amount1_delta(sqrt_a: int, sqrt_b: int, liquidity: int, round_up: bool) -> int:
+    if sqrt_a > sqrt_b: sqrt_a, sqrt_b = sqrt_b, sqrt_a
+    return _div_up(liquidity * (sqrt_b - sqrt_a), Q96) if round_up else liquidity * (sqrt_b - sqrt_a) // Q96
+
+def _next_sqrt_from_input(sqrt_p: int, liquidity: int, amount_in: int, zero_for_one: bool) -> int:
+    if amount_in == 0: return sqrt_p
+    if not zero_for_one: return sqrt_p + (amount_in << 96) // liquidity
+    numerator1, product = liquidity << 96, amount_in * sqrt_p
+    # the solidity fast path only applies while the product and denominator fit in 256 bits
+    if product < UINT256 and numerator1 + product < UINT256: return _div_up(numerator1 * sqrt_p, numerator1 + product)
+    return _div_up(numerator1, numerator1 // sqrt_p + amount_in)
+
+def compute_swap_step(sqrt_current: int, sqrt_target: int, liquidity: int, amount_remaining: int, fee: int) -> Tuple[int, int, int, int]:
+    """One exact-input swap step. Returns `(sqrt_next, amount_in, amount_out, fee_amount)`."""
+    zero_for_one = sqrt_current >= sqrt_target
+    remaining_less_fee = amount_remaining * (CL_FEE_DENOMINATOR - fee) // CL_FEE_DENOMINATOR
+    amount_in = _amount0_delta(sqrt_target, sqrt_current, liquidity, True) if zero_for_one else _amount1_delta(sqrt_current, sqrt_target, liquidity, True)
+    if remaining_less_fee >= amount_in: sqrt_next = sqrt_target
+    else: sqrt_next = _next_sqrt_from_input(sqrt_current, liquidity, remaining_less_fee, zero_for_one)
+    reached = sqrt_next == sqrt_target
+    if zero_for_one:
+        if not reached: amount_in = _amount0_delta(sqrt_next, sqrt_current, liquidity, True)
+        amount_out = _amount1_delta(sqrt_next, sqrt_current, liquidity, False)
+    else:
+        if not reached: amount_in = _amount1_delta(sqrt_current, sqrt_next, liquidity, True)
+        amount_out = _amount0_delta(sqrt_current, sqrt_next, liquidity, False)
+    fee_amount = amount_remaining - amount_in if not reached else _div_up(amount_in * fee, CL_FEE_DENOMINATOR - fee)
+    return sqrt_next, amount_in, amount_out, fee_amount
+
+def next_initialized_tick_within_one_word(bitmap: Dict[int, int], tick: int, tick_spacing: int, lte: bool) -> Tuple[int, bool]:
+    """TickBitmap.nextInitializedTickWithinOneWord over a `{word: bits}` map of compressed ticks."""
+    compressed = tick // tick_spacing
+    if lte:
+        word, bit = compressed >> 8, compressed & 0xff
+        masked = bitmap.get(word, 0) & ((1 << (bit + 1)) - 1)
+        if masked: return (compressed - (bit - (masked.bit_length() - 1))) * tick_spacing, True
+        return (compressed - bit) * tick_spacing, False
+    word, bit = (compressed + 1) >> 8, (compressed + 1) & 0xff
+    masked = bitmap.get(word, 0) & ~((1 << bit) - 1)
+    if masked: return (compressed + 1 + ((masked & -masked).bit_length() - 1 - bit)) * tick_spacing, True
+    return (compressed + 1 + (255 - bit)) * tick_spacing, False
+
+@dataclass(frozen=True)
+class CLPoolState:
+    """Slot0, active liquidity and (once loaded) the initialized ticks around the current price of a CL pool"""
+
+    lp: str
+    token0_address: str
+    token1_address: str
+    tick_spacing: int
+    # pips
+    fee: int
+    sqrt_ratio: int
+    tick: int
+    liquidity: int
+    # sorted `(tick, liquidity_net)` pairs from `getPopulatedTicks`; None until loaded
+    ticks: Optional[Tuple[Tuple[int, int], ...]] = None
+    bitmap: Dict[int, int] = field(default_factory=dict, compare=False, repr=False)
+    liquidity_net: Dict[int, int] = field(default_factory=dict, compare=False, repr=False)
+
+    def with_ticks(self, populated: List[Tuple]) -> "CLPoolState":
+        """Attach `getPopulatedTicks` output (tick, sqrtRatioX96, liquidityNet, liquidityGross)."""
+        ticks = tuple(sorted((t[0], t[2]) for t in populated))
+        bitmap = {}
+        for tick, _ in ticks:
+            compressed = tick // self.tick_spacing
+            bitmap[compressed >> 8] = bitmap.get(compressed >> 8, 0) | (1 << (compressed & 0xff))
+        return replace(self, ticks=ticks, bitmap=bitmap, liquidity_net=dict(ticks))
+
+    def _bound(self, zero_for_one: bool) -> int:
+        # the loaded window only vouches for prices between its outermost ticks
+        if zero_for_one: return get_sqrt_ratio_at_tick(self.ticks[0][0]) if self.ticks[0][0] <= self.tick else self.sqrt_ratio
+        return get_sqrt_ratio_at_tick(self.ticks[-1][0]) if self.ticks[-1][0] > self.tick else self.sqrt_ratio
+
+    def get_amount_out(self, amount_in: int, token_in: str) -> Optional[int]:
+        """Simulated exact-input swap. None when ticks aren't loaded or the swap would leave the loaded window."""
+        if not self.ticks: return None
+        zero_for_one = token_in == self.token0_address
+        limit = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+        bound = self._bound(zero_for_one)
+        remaining, amount_out, sqrt_p, tick, liquidity = amount_in, 0, self.sqrt_ratio, self.tick, self.liquidity
+        while remaining != 0 and sqrt_p != limit:
+            tick_next, initialized = next_initialized_tick_within_one_word(self.bitmap, tick, self.tick_spacing, zero_for_one)
+            tick_next = max(MIN_TICK, min(MAX_TICK, tick_next))
+            sqrt_next = get_sqrt_ratio_at_tick(tick_next)
+            target = max(sqrt_next, limit) if zero_for_one else min(sqrt_next, limit)
+            # a step whose result doesn't reach its target doesn't depend on the target, so clamping to the
+            # window is exact unless the swap actually gets there
+            outside = target < bound if zero_for_one else target > bound
+            if outside: target = bound
+            sqrt_start = sqrt_p
+            sqrt_p, step_in, step_out, step_fee = compute_swap_step(sqrt_p, target, liquidity, remaining, self.fee)
+            remaining, amount_out = remaining - step_in - step_fee, amount_out + step_out
+            if outside:
+                if sqrt_p == target: return None
+            elif sqrt_p == sqrt_next:
+                if initialized:
+                    net = self.liquidity_net.get(tick_next, 0)
+                    liquidity += -net if zero_for_one else net
+                    if liquidity < 0: return None
+                tick = tick_next - 1 if zero_for_one else tick_next
+            elif sqrt_p != sqrt_start: tick = get_tick_at_sqrt_ratio(sqrt_p)
+        return amount_out
+
+    @classmethod
+    def from_tuple(cls, t: Tuple) -> Optional["CLPoolState"]:
+        """Build from a raw `Sugar.all` tuple (see `LiquidityPool.from_tuple` for the layout). None for basic pools."""
+        if t[4] <= 0: return None
+        return CLPoolState(lp=normalize_address(t[0]), token0_address=normalize_address(t[7]), token1_address=normalize_address(t[10]),
+                           tick_spacing=t[4], fee=t[22], sqrt_ratio=t[6], tick=t[5], liquidity=t[3])
@@ -22,11 +22,40 @@ base_default_settings = {
   "pool_pagination_target_calls": int(os.getenv("SUGAR_POOL_PAGINATION_TARGET_CALLS","90")),
   "pool_pagination_min_size": int(os.getenv("SUGAR_POOL_PAGINATION_MIN_SIZE","10")),
   "pool_pagination_max_size": int(os.getenv("SUGAR_POOL_PAGINATION_MAX_SIZE","400")),
+  # resize pages from observed batch latency per rpc_uri (0 disables it and keeps the static size above)
+  "pool_pagination_target_latency_ms": int(os.getenv("SUGAR_POOL_PAGINATION_TARGET_LATENCY_MS","0")),
   "native_token_symbol": "ETH",
   "native_token_decimals": 18,
   "swap_slippage": 0.01,
   "pricing_cache_timeout_seconds": 5,
-  "threading_max_workers": 5
+  # re-read requested prices in the background this often, ahead of expiry (0 disables the refresher)
+  "price_refresh_interval_seconds": int(os.getenv("SUGAR_PRICE_REFRESH_INTERVAL_SECONDS","0")),
+  # serve prices up to this long past expiry while they're being re-read (0 always waits for fresh ones)
+  "price_max_stale_seconds": int(os.getenv("SUGAR_PRICE_MAX_STALE_SECONDS","0")),
+  "threading_max_workers": 5,
+  # extra endpoints for reads (comma separated); requests are balanced and hedged across rpc_uri + these
+  "rpc_uris": "",
+  # keep-alive connections per rpc_uri, shared by every chain in the process
+  "rpc_max_connections": int(os.getenv("SUGAR_RPC_MAX_CONNECTIONS","20")),
+  # rank routes locally (basic pool reserves, CL tick data) and only send the best N to the quoter (0 disables local ranking)
+  "quote_local_top_n": int(os.getenv("SUGAR_QUOTE_LOCAL_TOP_N","0")),
+  # quote only the N routes with the deepest pools (TVL of the shallowest hop, discounted per hop); 0 quotes every route
+  "quote_max_paths": int(os.getenv("SUGAR_QUOTE_MAX_PATHS","0")),
+  # expand at most N parallel pools (highest TVL first) per hop while searching routes; 0 expands all of them
+  "quote_max_parallel_pools": int(os.getenv("SUGAR_QUOTE_MAX_PARALLEL_POOLS","0")),
+  # quoter calls per JSON-RPC batch (the start point when batches grow/shrink to meet the target latency)
+  "quote_batch_size": int(os.getenv("SUGAR_QUOTE_BATCH_SIZE","500")),
+  # resize quoter batches from observed latency per rpc_uri (0 disables it and keeps quote_batch_size fixed)
+  "quote_batch_target_latency_ms": int(os.getenv("SUGAR_QUOTE_BATCH_TARGET_LATENCY_MS","0")),
+  # reuse route sets and best routes of recent quotes for this many seconds (0 disables the quote cache)
+  "quote_cache_ttl_seconds": int(os.getenv("SUGAR_QUOTE_CACHE_TTL_SECONDS","0")),
+  "quote_cache_size": int(os.getenv("SUGAR_QUOTE_CACHE_SIZE","1024")),
+  # max blocks per eth_getLogs request when `refresh_pools` catches up
+  "pool_logs_block_range": int(os.getenv("SUGAR_POOL_LOGS_BLOCK_RANGE","2000")),
+  # persistent cache for tokens/pools across restarts; empty disables it
+  "cache_dir": os.getenv("SUGAR_CACHE_DIR", ""),
+  "cache_ttl_seconds": int(os.getenv("SUGAR_CACHE_TTL_SECONDS","300")),
+  "cache_max_mb": int(os.getenv("SUGAR_CACHE_MAX_MB","256"))
 }
 
 # Settings shared across Velo "leaf" superchain deployments (Lisk, Uni, Mode,
@@ -90,12 +119,44 @@ class ChainSettings:
     pool_pagination_target_calls: int
     pool_pagination_min_size: int
     pool_pagination_max_size: int
+    # batch latency the adaptive page sizer aims for; 0 disables adaptation
+    pool_pagination_target_latency_ms: int
     native_token_symbol: str
     native_token_decimals: int
     # how often to check for new prices
     pricing_cache_timeout_seconds: int
+    # background price refresh period (0 = no refresher, see `start_price_refresher`)
+    price_refresh_interval_seconds: int
+    # stale-while-revalidate bound for oracle prices
+    price_max_stale_seconds: int
     # how many max workers to use for threading in sync methods
     threading_max_workers: int
+    # extra read endpoints, load-balanced and hedged together with `rpc_uri` (see `sugar.transport`)
+    rpc_uris: List[str]
+    # connection cap of the shared per-rpc_uri HTTP session (see `sugar.providers`)
+    rpc_max_connections: int
+    # how many locally ranked routes get confirmed by the on-chain quoter (0 = quote every route on-chain)
+    quote_local_top_n: int
+    # routes kept for quoting after liquidity ranking (0 = no pruning)
+    quote_max_paths: int
+    # parallel pools per hop kept during the route search (0 = no cap)
+    quote_max_parallel_pools: int
+    # initial quoter calls per batch (see `sugar.pipeline.QuoteBatchSizer`)
+    quote_batch_size: int
+    # quoter batch latency to size batches and in-flight batches for (0 = fixed size, `threading_max_workers` in flight)
+    quote_batch_target_latency_ms: int
+    # lifetime of cached best routes (0 = no quote cache, see `sugar.cache.QuoteCache`)
+    quote_cache_ttl_seconds: int
+    # max cached route sets / best-route entries
+    quote_cache_size: int
+    # block window per eth_getLogs call made by `refresh_pools`
+    pool_logs_block_range: int
+    # directory for the persistent (SQLite) read cache; empty = disabled
+    cache_dir: str
+    # how long "latest" entries stay fresh; entries pinned to a block don't expire
+    cache_ttl_seconds: int
+    # size cap; least recently used entries are evicted first
+    cache_max_mb: int
 
     def __str__(self):
         # go over all attributes of self
@@ -116,8 +177,10 @@ def validate_settings(settings: ChainSettings) -> ChainSettings:
     # TODO: this should actually validate stuff, duh
     floats = ["swap_slippage"]
     ints = ["price_batch_size", "price_threshold_filter", "pagination_limit", "native_token_decimals",
-            "pricing_cache_timeout_seconds", "threading_max_workers",
-            "pool_pagination_target_calls", "pool_pagination_min_size", "pool_pagination_max_size"]
+            "pricing_cache_timeout_seconds", "price_refresh_interval_seconds", "price_max_stale_seconds", "threading_max_workers", "rpc_max_connections",
+            "pool_pagination_target_calls", "pool_pagination_min_size", "pool_pagination_max_size", "pool_pagination_target_latency_ms", "quote_local_top_n",
+            "quote_max_paths", "quote_max_parallel_pools",
+            "quote_batch_size", "quote_batch_target_latency_ms", "quote_cache_ttl_seconds", "quote_cache_size", "pool_logs_block_range", "cache_ttl_seconds", "cache_max_mb"]
     for k in floats: setattr(settings, k, float(getattr(settings, k)))
     for k in ints: setattr(settings, k, int(getattr(settings, k)))
     return settings
@@ -142,6 +205,8 @@ def make_settings(chain_id: str, chain_name: str, chain_settings: Dict[str, Any]
         if k.endswith("_addr"): d[k] = normalize_address(d[k]) if d[k] else None
         # anything that ends in "_addrs", should be a list of normalized addresses
         if k.endswith("_addrs"): d[k] = list(map(lambda a: normalize_address(a), d[k].split(","))) if d[k] else []
+        # same for "_uris", minus the normalization
+        if k.endswith("_uris") and isinstance(d[k], str): d[k] = [u.strip() for u in d[k].split(",") if u.strip()]
 
     # we only want fields that are in the ChainSettings dataclass
     d =  {k: v for k, v in d.items() if k in [field.name for field in fields(ChainSettings)]}
@@ -0,0 +1,111 @@
+__all__ = ['SYNC_TOPIC', 'CL_SWAP_TOPIC', 'LIQUIDITY_TOPICS', 'POOL_EVENT_TOPICS', 'apply_pool_logs', 'PoolSync']
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Set, Tuple
+from eth_abi import decode
+from web3 import Web3
+from .helpers import normalize_address
+
+def _topic(signature: str) -> str: return Web3.to_hex(Web3.keccak(text=signature))
+
+# basic pools emit Sync with the new reserves after every swap, mint and burn
+SYNC_TOPIC = _topic("Sync(uint256,uint256)")
+# CL pools report the post-swap slot0 and active liquidity on Swap
+CL_SWAP_TOPIC = _topic("Swap(address,address,int256,int256,uint160,uint128,int24)")
+# liquidity changes (basic + CL flavours); these aren't patchable from the log alone
+LIQUIDITY_TOPICS = [
+    _topic("Mint(address,uint256,uint256)"),
+    _topic("Burn(address,address,uint256,uint256)"),
+    _topic("Mint(address,address,int24,int24,uint128,uint256,uint256)"),
+    _topic("Burn(address,int24,int24,uint128,uint256,uint256)"),
+]
+POOL_EVENT_TOPICS = [SYNC_TOPIC, CL_SWAP_TOPIC, *LIQUIDITY_TOPICS]
+
+def _hex(v) -> str: return v if isinstance(v, str) else Web3.to_hex(v)
+
+def apply_pool_logs(rows: List[Tuple], index: Dict[str, int], logs: List) -> Tuple[Set[str], Set[str]]:
+    """Patch raw `Sugar.all` rows (see `LiquidityPool.from_tuple`) in place from pool logs, oldest first.
+
+    Sync sets basic pool reserves; a CL Swap sets tick, sqrt_ratio and active liquidity and moves the
+    reserves by the swapped amounts. Returns `(patched, dirty)` LP sets: dirty pools had liquidity
+    added/removed and need their page re-read. Fees and emissions are left to those re-reads."""
+    patched, dirty = set(), set()
+    for log in sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"])):
+        lp = normalize_address(log["address"])
+        i = index.get(lp)
+        if i is None or not log["topics"]: continue
+        topic, data, row = _hex(log["topics"][0]), bytes(log["data"]), list(rows[i])
+        if topic == SYNC_TOPIC:
+            row[8], row[11] = decode(["uint256", "uint256"], data)
+        elif topic == CL_SWAP_TOPIC:
+            amount0, amount1, row[6], row[3], row[5] = decode(["int256", "int256", "uint160", "uint128", "int24"], data)
+            row[8], row[11] = max(row[8] + amount0, 0), max(row[11] + amount1, 0)
+        elif topic in LIQUIDITY_TOPICS:
+            dirty.add(lp)
+            continue
+        else: continue
+        rows[i] = tuple(row)
+        patched.add(lp)
+    return patched, dirty
+
+Page = Tuple[int, int]
+
+@dataclass
+class PoolSync:
+    """Live `Sugar.all` rows kept at `block` by `refresh_pools`, with the page each pool was read from
+    so liquidity changes only cost a re-read of their own page."""
+    block: int
+    # pool count at `block`; pools created later show up past it
+    count: int
+    rows: List[Tuple]
+    index: Dict[str, int]
+    pages: Dict[str, Page]
+
+    @classmethod
+    def from_pages(cls, block: int, count: int, results: List[Tuple[Page, List[Tuple]]]) -> "PoolSync":
+        sync = cls(block=block, count=count, rows=[], index={}, pages={})
+        sync.apply_pages(results)
+        return sync
+
+    @contextmanager
+    def advance(self, block: int, count: int) -> Iterator["PoolSync"]:
+        """Move the sync to `block`/`count` once the body (log patches, page re-reads) completes. If it raises,
+        the rows are rolled back and `block` stays put, so the retry replaying the same logs doesn't move CL
+        reserves by the swapped amounts twice."""
+        rows, index, pages = list(self.rows), dict(self.index), dict(self.pages)
+        try: yield self
+        except BaseException:
+            self.rows[:] = rows
+            self.index.clear()
+            self.index.update(index)
+            self.pages.clear()
+            self.pages.update(pages)
+            raise
+        self.block, self.count = block, count
+
+    def apply_logs(self, logs: List) -> Tuple[Set[str], Set[str]]: return apply_pool_logs(self.rows, self.index, logs)
+
+    def apply_pages(self, results: List[Tuple[Page, List[Tuple]]]) -> Set[str]:
+        """Replace (or append) the rows of freshly read pages. Returns the LPs touched. A failed read (batched reads
+        return errors as values) raises before anything is applied: skipping it would lose the rows for good once
+        `block` moves past their logs, while raising inside `advance` rolls the sync back for a retry."""
+        failed = next((rows for _, rows in results if isinstance(rows, Exception)), None)
+        if failed is not None: raise failed
+        touched = set()
+        for page, rows in results:
+            for row in rows:
+                lp = normalize_address(row[0])
+                if lp in self.index: self.rows[self.index[lp]] = row
+                else:
+                    self.index[lp] = len(self.rows)
+                    self.rows.append(row)
+                self.pages[lp] = page
+                touched.add(lp)
+        return touched
+
+    def pages_for(self, lps: Set[str]) -> List[Page]: return sorted({self.pages[lp] for lp in lps if lp in self.pages})
+
+    def new_pages(self, count: int, limit: int) -> List[Page]:
+        """Pages covering pools created since the last sync (with the same +10 slack as `get_pool_paginator`)."""
+        return [(offset, limit) for offset in range(self.count, count + 10, limit)] if count > self.count else []
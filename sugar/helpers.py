@@ -1,4 +1,4 @@
-__all__ = ['ADDRESS_ZERO', 'MAX_UINT256', 'MAX_UINT128', 'MAX_ABS_TICK', 'normalize_address', 'chunk', 'amount_to_k_string',
+__all__ = ['ADDRESS_ZERO', 'MAX_UINT256', 'MAX_UINT128', 'MAX_ABS_TICK', 'normalize_address', 'address_key', 'chunk', 'amount_to_k_string',
            'format_currency', 'format_percentage', 'amount_to_m_string', 'float_to_uint256', 'get_future_timestamp',
            'apply_slippage', 'price_to_tick', 'tick_to_price', 'nearest_tick', 'sqrt_ratio_x96_from_price',
            'parse_ether', 'get_unique_str', 'get_salt', 'to_bytes32', 'to_bytes32_str', 'Pair', 'find_all_paths',
@@ -10,12 +10,25 @@ from typing import List, Tuple, Optional, Callable
 from decimal import Decimal, getcontext
 from datetime import datetime, timedelta
 from dataclasses import dataclass
-import networkx as nx
-import math, time, asyncio, decimal, secrets, socket
+from functools import lru_cache
+import math, sys, time, asyncio, decimal, secrets, socket
 from contextlib import contextmanager, asynccontextmanager
 from fastcore.test import test_eq
+from .route import RouteIndex
 
-def normalize_address(address: str) -> str: return Web3.to_checksum_address(address.lower())
+# distinct addresses remembered by `normalize_address` / `address_key` (a chain has a few thousand pools and tokens)
+ADDRESS_CACHE_SIZE = 1 << 16
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def normalize_address(address: str) -> str:
+    """Checksummed `address`. Memoized (checksumming hashes with keccak) and interned, so the same
+    address parsed from different rows is one string object: dict lookups and `==` hit the identity fast path."""
+    return sys.intern(Web3.to_checksum_address(address.lower()))
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def address_key(address: str) -> bytes:
+    """Case-insensitive 20-byte canonical form of `address`, for hashing/comparing without checksumming."""
+    return bytes.fromhex(address[2:] if address[:2] in ("0x", "0X") else address)
 
 ADDRESS_ZERO = constants.ADDRESS_ZERO
 MAX_UINT256 = Web3.to_int(hexstr='0x' + 'f' * 64)
@@ -132,61 +145,12 @@ def to_bytes32(val: str) -> bytes:
 
 def to_bytes32_str(val: str) -> str: return f"0x{to_bytes32(val).hex()}"
 
-# Claude 3.7 sonnet made this
-
 @dataclass
 class Pair: token0: str; token1: str; pool: str
 
 def find_all_paths(pairs: List[Pair], start_token: str, end_token: str, cutoff=3) -> List[List[Tuple]]:
-    # MultiGraph required to support parallel edges
-    # same tokens can be present in different pools, hence parallel edges
-    # specific pool identifier is stored inside edge attribute
-    G, complete_paths = nx.MultiGraph(), []
-    for pair in pairs: G.add_edge(pair.token0, pair.token1, pool=pair.pool)
-    node_paths =  [p for p in nx.all_simple_paths(G, source=start_token, target=end_token, cutoff=cutoff)]
-    for path in node_paths:
-        edge_path = []
-        # For each consecutive pair of nodes in the path
-        for i in range(len(path) - 1):
-            current = path[i]
-            next_node = path[i + 1]
-            
-            # Get all edges between these nodes
-            edges = G.get_edge_data(current, next_node)
-            
-            # There might be multiple edges (pools) between these nodes
-            # Add all possible edges to create different complete paths
-            current_paths = [] if not edge_path else edge_path.copy()
-            new_edge_paths = []
-            
-            # If this is the first segment, initialize with empty path
-            if not current_paths:
-                current_paths = [[]]
-                
-            # For each possible edge between current and next_node
-            for edge_key, edge_attrs in edges.items():
-                pool = edge_attrs['pool']
-                for current_path in current_paths:
-                    # Create a new path that includes this edge
-                    new_path = current_path + [(current, next_node, pool)]
-                    new_edge_paths.append(new_path)
-            
-            edge_path = new_edge_paths
-        
-        # Add all possible edge paths to the complete paths
-        complete_paths.extend(edge_path)
-    
-    # seen is a list of strings that look like this ["pool1-pool2-pool3", ...]
-    uniques, seen = [], []
-
-    for path in complete_paths:
-        p = '-'.join(map(lambda x: x[2], path))
-        if p not in seen:
-            uniques.append(path)
-            seen.append(p)
-
-    # remove duplicates
-    return uniques
+    # one-off search; callers quoting repeatedly over the same pools should keep a RouteIndex around
+    return RouteIndex(pairs).find_paths(start_token, end_token, cutoff=cutoff)
 
 # TODO: get rid of ICACallData, use tuples instead
 @dataclass(frozen=True)
@@ -0,0 +1,66 @@
+__all__ = ['TokenIndex', 'PoolIndex']
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from .helpers import normalize_address
+from .token import Token
+
+class TokenIndex:
+    """Dict lookups over a chain's token list, built once per `get_all_tokens` result.
+
+    Tokens are keyed by checksum address, lowercase symbol and (for the native token) wrapped
+    address. Where several tokens share a key the first one in list order wins, like the linear
+    scans these replace."""
+
+    def __init__(self, tokens: Iterable[Token]):
+        self.tokens: List[Token] = list(tokens)
+        self.by_address: Dict[str, Token] = {}
+        self.by_symbol: Dict[str, Token] = {}
+        self.by_wrapped_address: Dict[str, Token] = {}
+        for t in self.tokens:
+            self.by_address.setdefault(t.token_address, t)
+            self.by_symbol.setdefault(t.symbol.lower(), t)
+            if t.wrapped_token_address: self.by_wrapped_address.setdefault(normalize_address(t.wrapped_token_address), t)
+
+    def __len__(self) -> int: return len(self.tokens)
+
+    def find_by_address(self, address: str) -> Optional[Token]: return self.by_address.get(normalize_address(address))
+
+    def find_by_symbol(self, symbol: str) -> Optional[Token]: return self.by_symbol.get(symbol.lower())
+
+    def find_by_wrapped_address(self, address: str) -> Optional[Token]: return self.by_wrapped_address.get(normalize_address(address))
+
+    def find(self, ref: Union[str, int]) -> Optional[Token]:
+        """Resolve a 0x address, symbol (case-insensitive) or int (hex address as integer)."""
+        if not ref: return None
+        if isinstance(ref, int): ref = '0x' + format(ref, '040x')
+        return self.find_by_address(ref) if ref.startswith("0x") else self.find_by_symbol(ref)
+
+class PoolIndex:
+    """Positions of raw `Sugar.all` rows by LP address and by token pair.
+
+    Rows are read through the list the index was built on, so pools patched in place (see
+    `refresh_pools`) resolve to their current row; the index has to be rebuilt when pools are added."""
+
+    def __init__(self, rows: List[Tuple]):
+        self.rows = rows
+        self.by_lp: Dict[str, int] = {}
+        self.by_pair: Dict[Tuple[str, str], List[int]] = {}
+        for i, r in enumerate(rows):
+            self.by_lp.setdefault(r[0].lower(), i)
+            self.by_pair.setdefault(self.pair_key(r[7], r[10]), []).append(i)
+
+    @staticmethod
+    def pair_key(token_a: str, token_b: str) -> Tuple[str, str]:
+        a, b = token_a.lower(), token_b.lower()
+        return (a, b) if a <= b else (b, a)
+
+    def __len__(self) -> int: return len(self.by_lp)
+
+    def find(self, lp: str) -> Optional[Tuple]:
+        """Row of the pool at `lp` (case-insensitive)."""
+        i = self.by_lp.get(lp.lower())
+        return None if i is None else self.rows[i]
+
+    def find_by_pair(self, token_a: str, token_b: str) -> List[Tuple]:
+        """Rows of every pool between the two tokens, in either order."""
+        return [self.rows[i] for i in self.by_pair.get(self.pair_key(token_a, token_b), [])]
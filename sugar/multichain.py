@@ -0,0 +1,115 @@
+__all__ = ['SUPPORTED_CHAIN_IDS', 'ChainResult', 'MultiChainResult', 'AsyncMultiChain']
+
+import asyncio
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Generic, List, Optional, TypeVar, Union
+from .chains import CHAIN_CLASSES, AsyncChain, get_async_chain
+from .token import Token
+from .pool import LiquidityPool, LiquidityPoolForSwap, LiquidityPoolEpoch
+from .position import Position
+from .price import Price
+
+# OP, Base, Lisk, Uni, Mode, Fraxtal, Ink, Soneium, Superseed, Celo
+SUPPORTED_CHAIN_IDS = list(CHAIN_CLASSES)
+
+T = TypeVar('T')
+
+@dataclass
+class ChainResult(Generic[T]):
+    """One chain's answer to a fanned-out call: its `value`, or the `error` it failed with."""
+    chain_id: str
+    chain_name: str
+    value: Optional[T] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool: return self.error is None
+
+@dataclass
+class MultiChainResult(Generic[T]):
+    """Per-chain results of an `AsyncMultiChain` call, in chain order. Chains that failed are kept (with their
+    error) instead of failing the whole call; `items` merges the successful lists. Every item is already tagged with
+    its chain (`chain_id` on tokens, pools and positions, via `token`/`pool` on prices and epochs)."""
+    results: List[ChainResult[List[T]]]
+
+    @property
+    def items(self) -> List[T]: return [item for r in self.results if r.ok for item in r.value]
+
+    @property
+    def by_chain(self) -> Dict[str, List[T]]: return {r.chain_id: r.value for r in self.results if r.ok}
+
+    @property
+    def errors(self) -> Dict[str, BaseException]: return {r.chain_id: r.error for r in self.results if not r.ok}
+
+    def __iter__(self): return iter(self.items)
+
+    def __len__(self) -> int: return len(self.items)
+
+class AsyncMultiChain:
+    """Query several chains at once: `async with AsyncMultiChain() as chains: pools = await chains.get_pools()`.
+
+    Each call runs on every chain concurrently, so the whole fan-out takes about as long as the slowest chain.
+    At most `max_concurrency` calls run on one chain at a time (further calls on that chain wait), and a chain
+    that errors or exceeds `timeout` seconds shows up in `MultiChainResult.errors` while the other chains'
+    data is returned. `kwargs` (e.g. `signer_address`) are passed to every chain."""
+
+    def __init__(self, chain_ids: Optional[List[str]] = None, max_concurrency: int = 4, timeout: Optional[float] = None, **kwargs):
+        self.chains: Dict[str, AsyncChain] = {cid: get_async_chain(cid, **kwargs) for cid in (chain_ids or SUPPORTED_CHAIN_IDS)}
+        self.max_concurrency, self.timeout = max_concurrency, timeout
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._stack: Optional[AsyncExitStack] = None
+
+    async def __aenter__(self):
+        stack = AsyncExitStack()
+        try:
+            for chain in self.chains.values(): await stack.enter_async_context(chain)
+        except BaseException:
+            await stack.aclose()
+            raise
+        self._stack = stack
+        # semaphores belong to the running loop, so they are made per context
+        self._limits = {cid: asyncio.Semaphore(self.max_concurrency) for cid in self.chains}
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        stack, self._stack = self._stack, None
+        return await stack.__aexit__(exc_type, exc_val, exc_tb)
+
+    async def _call(self, chain: AsyncChain, call: Callable[[AsyncChain], Awaitable[T]]) -> ChainResult[T]:
+        try:
+            async with self._limits[chain.chain_id]:
+                return ChainResult(chain.chain_id, chain.name, value=await asyncio.wait_for(call(chain), self.timeout))
+        except Exception as e: return ChainResult(chain.chain_id, chain.name, error=e)
+
+    async def fan_out(self, call: Callable[[AsyncChain], Awaitable[List[T]]]) -> MultiChainResult[T]:
+        """Run `call(chain)` on every chain concurrently."""
+        if self._stack is None: raise RuntimeError("AsyncMultiChain methods can only be accessed within 'async with' block")
+        return MultiChainResult(list(await asyncio.gather(*[self._call(c, call) for c in self.chains.values()])))
+
+    async def get_pools(self, for_swaps: bool = False) -> MultiChainResult[Union[LiquidityPool, LiquidityPoolForSwap]]:
+        return await self.fan_out(lambda c: c.get_pools(for_swaps=for_swaps))
+
+    async def get_all_tokens(self, listed_only: bool = False) -> MultiChainResult[Token]:
+        return await self.fan_out(lambda c: c.get_all_tokens(listed_only=listed_only))
+
+    async def get_prices(self, tokens: Optional[List[Token]] = None) -> MultiChainResult[Price]:
+        """Prices of `tokens` (grouped by their `chain_id`; chains without any are skipped), or of every token on every chain."""
+        if tokens is None: return await self.fan_out(lambda c: self._all_prices(c))
+        by_chain: Dict[str, List[Token]] = {}
+        for t in tokens: by_chain.setdefault(t.chain_id, []).append(t)
+        async def prices(c: AsyncChain) -> List[Price]: return await c.get_prices(by_chain[c.chain_id]) if c.chain_id in by_chain else []
+        return await self.fan_out(prices)
+
+    @staticmethod
+    async def _all_prices(chain: AsyncChain) -> List[Price]: return await chain.get_prices(await chain.get_all_tokens())
+
+    async def get_latest_pool_epochs(self) -> MultiChainResult[LiquidityPoolEpoch]:
+        return await self.fan_out(lambda c: c.get_latest_pool_epochs())
+
+    async def get_positions(self, owner: Optional[str] = None) -> MultiChainResult[Position]:
+        return await self.fan_out(lambda c: c.get_positions(owner))
+
+    def __getitem__(self, chain_id: str) -> AsyncChain: return self.chains[chain_id]
+
+    def __iter__(self): return iter(self.chains.values())
@@ -0,0 +1,70 @@
+__all__ = ['PageSizer']
+
+from dataclasses import dataclass
+from typing import ClassVar, Dict, List, Optional, Tuple
+from .cache import DiskCache
+from .config import ChainSettings
+
+@dataclass
+class PageSizer:
+    """Sugar page size and requests per JSON-RPC batch an endpoint handles well, learned from batch
+    latency and errors: fast batches grow pages, slow ones shrink them, a failing page is split in half
+    and a failing batch is retried as smaller batches. One sizer per `rpc_uri` and sizing settings is shared
+    by every chain in the process and, with `cache_dir` set, persisted across restarts."""
+
+    rpc_uri: str
+    min_size: int
+    max_size: int
+    # seconds; 0 keeps the static page size from `calculate_optimal_batch_size`
+    target_latency: float
+    # learned page size, None until the first observation
+    page_size: Optional[int] = None
+    batch_size: int = 5
+    max_batch_size: int = 20
+    store: Optional[DiskCache] = None
+
+    _sizers: ClassVar[Dict[Tuple, "PageSizer"]] = {}
+
+    @classmethod
+    def for_settings(cls, settings: ChainSettings, store: Optional[DiskCache] = None) -> "PageSizer":
+        # chains on one endpoint but with other bounds/targets get their own sizer, not the first one's
+        args = (settings.rpc_uri, settings.pool_pagination_min_size, settings.pool_pagination_max_size,
+                settings.pool_pagination_target_latency_ms / 1000)
+        sizer = cls._sizers.get(args)
+        if sizer is None:
+            sizer = cls(*args, store=store)
+            learned = store.get(sizer.key) if store else None
+            if learned: sizer.page_size, sizer.batch_size = learned["page_size"], learned["batch_size"]
+            cls._sizers[args] = sizer
+        return sizer
+
+    @property
+    def adaptive(self) -> bool: return self.target_latency > 0
+
+    @property
+    def key(self) -> str: return f"pagination:{self.rpc_uri}:{self.min_size}:{self.max_size}:{self.target_latency}"
+
+    def observe(self, pages: List[Tuple[int, int]], latency: float):
+        """A batch of `(offset, limit)` pages came back in `latency` seconds."""
+        if not self.adaptive or not pages: return
+        limit = max(limit for _, limit in pages)
+        if latency <= self.target_latency / 2:
+            self._update(max(self.page_size or 0, limit * 5 // 4, limit + 1), self.batch_size + 1)
+        elif latency > self.target_latency:
+            self._update(limit * 3 // 4, self.batch_size)
+
+    def page_failed(self, limit: int) -> List[int]:
+        """A page of `limit` rows failed; returns the limits to retry it with (empty when it can't be split)."""
+        if limit <= 1: return []
+        if self.adaptive: self._update(min(self.page_size or limit, limit // 2), self.batch_size)
+        return [limit // 2, limit - limit // 2]
+
+    def batch_failed(self, size: int):
+        if self.adaptive: self._update(self.page_size, max(1, min(self.batch_size, size // 2)))
+
+    def _update(self, page_size: Optional[int], batch_size: int):
+        page_size = None if page_size is None else max(self.min_size, min(page_size, self.max_size))
+        batch_size = max(1, min(batch_size, self.max_batch_size))
+        if (page_size, batch_size) == (self.page_size, self.batch_size): return
+        self.page_size, self.batch_size = page_size, batch_size
+        if self.store: self.store.set(self.key, {"page_size": page_size, "batch_size": batch_size}, pinned=True)
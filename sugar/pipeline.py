@@ -0,0 +1,107 @@
+__all__ = ['QuoteBatchSizer', 'QuoteBatchError', 'CallList', 'run_pipelined']
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import Callable, ClassVar, Dict, Iterable, List, Tuple, TypeVar
+from .config import ChainSettings
+
+T, P, R = TypeVar('T'), TypeVar('P'), TypeVar('R')
+
+class CallList(list):
+    """Collects contract calls like a `RequestBatcher` (`add`), so they can be built ahead of the batch that sends them."""
+    def add(self, call): self.append(call)
+
+@dataclass
+class QuoteBatchError:
+    """A quoter batch that failed, after being retried as two halves."""
+    size: int
+    error: BaseException
+
+    def __str__(self) -> str: return f"{self.size} quotes: {type(self.error).__name__}: {self.error}"
+
+@dataclass
+class QuoteBatchSizer:
+    """Quoter calls per JSON-RPC batch and batches in flight that an endpoint handles well, learned from batch
+    latency like `PageSizer`: fast batches grow batches and the in-flight window, slow ones shrink them and a
+    failing batch halves the size. One sizer per `rpc_uri` and sizing settings is shared by every chain in the process."""
+
+    rpc_uri: str
+    # seconds; 0 keeps `batch_size` and `concurrency` as configured
+    target_latency: float
+    batch_size: int
+    max_concurrency: int
+    concurrency: int = 0
+    min_batch_size: int = 25
+    max_batch_size: int = 2000
+
+    _sizers: ClassVar[Dict[Tuple, "QuoteBatchSizer"]] = {}
+
+    def __post_init__(self):
+        self.concurrency = self.concurrency or self.max_concurrency
+
+    @classmethod
+    def for_settings(cls, settings: ChainSettings) -> "QuoteBatchSizer":
+        args = (settings.rpc_uri, settings.quote_batch_target_latency_ms / 1000, settings.quote_batch_size, settings.threading_max_workers)
+        sizer = cls._sizers.get(args)
+        if sizer is None: sizer = cls._sizers[args] = cls(*args)
+        return sizer
+
+    @property
+    def adaptive(self) -> bool: return self.target_latency > 0
+
+    def observe(self, size: int, latency: float):
+        """A batch of `size` quotes came back in `latency` seconds."""
+        if not self.adaptive: return
+        if latency <= self.target_latency / 2:
+            self.batch_size = min(self.max_batch_size, max(self.batch_size, size * 5 // 4))
+            self.concurrency = min(self.max_concurrency, self.concurrency + 1)
+        elif latency > self.target_latency:
+            self.batch_size = max(self.min_batch_size, size * 3 // 4)
+            self.concurrency = max(1, self.concurrency - 1)
+
+    def batch_failed(self, size: int):
+        if self.adaptive: self.batch_size = max(self.min_batch_size, min(self.batch_size, size // 2))
+
+def _timed(execute: Callable[[P], List[R]], prepared: P) -> Tuple[float, List[R]]:
+    start = time.perf_counter()
+    out = execute(prepared)
+    return time.perf_counter() - start, out
+
+def run_pipelined(items: Iterable[T], prepare: Callable[[List[T]], P], execute: Callable[[P], List[R]],
+                  sizer: QuoteBatchSizer) -> Tuple[List[R], List[QuoteBatchError]]:
+    """Cut `items` into batches of `sizer.batch_size`, `prepare` each one (e.g. encode its calls) on the calling thread
+    and `execute` it (send it) on a worker thread, keeping up to `sizer.concurrency` batches in flight. `items` is
+    consumed lazily, so producing the items, preparing batches and waiting for responses overlap.
+
+    A failing batch is retried once as two halves; what still fails comes back as `QuoteBatchError`s next to the
+    results of every batch that worked."""
+    results: List[R] = []
+    errors: List[QuoteBatchError] = []
+    pending = iter(items)
+    in_flight: Dict[Future, Tuple[List[T], bool]] = {}
+    with ThreadPoolExecutor(max_workers=sizer.max_concurrency) as executor:
+        def submit(batch: List[T], retry: bool): in_flight[executor.submit(_timed, execute, prepare(batch))] = (batch, retry)
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < sizer.concurrency:
+                batch = list(islice(pending, sizer.batch_size))
+                if batch: submit(batch, False)
+                else: exhausted = True
+            if not in_flight: break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch, retry = in_flight.pop(future)
+                try: latency, out = future.result()
+                except Exception as e:
+                    sizer.batch_failed(len(batch))
+                    if retry or len(batch) < 2: errors.append(QuoteBatchError(len(batch), e))
+                    else:
+                        half = len(batch) // 2
+                        submit(batch[:half], True)
+                        submit(batch[half:], True)
+                    continue
+                sizer.observe(len(batch), latency)
+                results.extend(out)
+    return results, errors
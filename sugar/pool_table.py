@@ -0,0 +1,134 @@
+__all__ = ['PoolTable']
+
+from dataclasses import dataclass, fields, replace
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from .token import Token
+from .helpers import address_key, normalize_address
+from .pool import LiquidityPool, Price
+
+def _address_bytes(addresses: Iterable[str]) -> np.ndarray: return np.array([address_key(a) for a in addresses], dtype="S20")
+
+@dataclass(eq=False)
+class PoolTable:
+    """Columnar view of raw `Sugar.all` rows for analytics over many pools.
+
+    Addresses are fixed-width bytes, amounts float arrays and tokens indices into `tokens`; `tvl`,
+    `total_fees`, `volume` and `apr` are computed over whole columns and match the `LiquidityPool`
+    properties, except that they're NaN where a token isn't priced (the object would hold a None `Amount`).
+    `LiquidityPool` objects are only built on row access (`table[i]`, iteration). Rows whose tokens are
+    unknown are dropped, as `prepare_pools` does."""
+
+    chain_id: str
+    chain_name: str
+    tokens: List[Token]
+    prices: Dict[str, Price]
+    rows: List[Tuple]
+    lp: np.ndarray
+    gauge: np.ndarray
+    type: np.ndarray
+    gauge_alive: np.ndarray
+    # indices into `tokens`
+    token0: np.ndarray
+    token1: np.ndarray
+    emissions_token: np.ndarray
+    # raw on-chain amounts as floats
+    total_supply: np.ndarray
+    gauge_total_supply: np.ndarray
+    pool_fee: np.ndarray
+    reserve0: np.ndarray
+    reserve1: np.ndarray
+    token0_fees: np.ndarray
+    token1_fees: np.ndarray
+    emissions: np.ndarray
+    # per token; NaN price = not priced (the matching `Amount` would be None)
+    token_decimals: np.ndarray
+    token_prices: np.ndarray
+
+    @classmethod
+    def from_tuples(cls, rows: List[Tuple], tokens: List[Token], prices: List[Price], chain_id: str, chain_name: str) -> "PoolTable":
+        token_ids = {t.token_address.lower(): i for i, t in enumerate(tokens)}
+        prices_d = {p.token.token_address: p for p in prices}
+        t0, t1 = (np.array([token_ids.get(r[i].lower(), -1) for r in rows], dtype=np.int32) for i in (7, 10))
+        keep = (t0 >= 0) & (t1 >= 0)
+        rows = [r for r, k in zip(rows, keep) if k]
+        def column(i: int) -> np.ndarray: return np.array([float(r[i]) for r in rows], dtype=np.float64)
+        return cls(
+            chain_id=chain_id, chain_name=chain_name, tokens=tokens, prices=prices_d, rows=rows,
+            lp=_address_bytes(r[0] for r in rows),
+            gauge=_address_bytes(r[13] for r in rows),
+            type=np.array([r[4] for r in rows], dtype=np.int32),
+            gauge_alive=np.array([r[15] for r in rows], dtype=bool),
+            token0=t0[keep], token1=t1[keep],
+            emissions_token=np.array([token_ids.get(r[20].lower(), -1) for r in rows], dtype=np.int32),
+            total_supply=column(3), gauge_total_supply=column(14), pool_fee=column(22),
+            reserve0=column(8), reserve1=column(11), token0_fees=column(24), token1_fees=column(25), emissions=column(19),
+            token_decimals=np.array([t.decimals for t in tokens], dtype=np.float64),
+            token_prices=np.array([prices_d[t.token_address].price if t.token_address in prices_d else np.nan for t in tokens], dtype=np.float64),
+        )
+
+    def __len__(self) -> int: return len(self.rows)
+
+    def __getitem__(self, i: int) -> LiquidityPool:
+        return LiquidityPool.from_tuple(self.rows[i], self._tokens_d, self.prices, chain_id=self.chain_id, chain_name=self.chain_name)
+
+    def __iter__(self) -> Iterator[LiquidityPool]: return (self[i] for i in range(len(self)))
+
+    @cached_property
+    def _tokens_d(self) -> Dict[str, Token]: return {t.token_address: t for t in self.tokens}
+
+    def _in_stable(self, amounts: np.ndarray, token: np.ndarray) -> np.ndarray:
+        valid = token >= 0
+        idx = np.where(valid, token, 0)
+        return np.where(valid, amounts / 10 ** self.token_decimals[idx] * self.token_prices[idx], np.nan)
+
+    @cached_property
+    def tvl(self) -> np.ndarray: return self._in_stable(self.reserve0, self.token0) + self._in_stable(self.reserve1, self.token1)
+
+    @cached_property
+    def total_fees(self) -> np.ndarray:
+        # unpriced fees count as 0, like a missing fee `Amount`
+        return np.nan_to_num(self._in_stable(self.token0_fees, self.token0)) + np.nan_to_num(self._in_stable(self.token1_fees, self.token1))
+
+    @cached_property
+    def volume(self) -> np.ndarray:
+        """Volume implied by fees; NaN for pools without a fee (where `LiquidityPool.volume` divides by zero)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.pool_fee > 0, 10000 / self.pool_fee * self.total_fees, np.nan)
+
+    @cached_property
+    def apr(self) -> np.ndarray:
+        reward = np.nan_to_num(self._in_stable(self.emissions, self.emissions_token)) * 24 * 60 * 60
+        with np.errstate(divide="ignore", invalid="ignore"):
+            staked_tvl = self.tvl * np.where(self.total_supply != 0, self.gauge_total_supply / self.total_supply, 0)
+            return np.where(staked_tvl != 0, reward / staked_tvl * 100 * 365, 0)
+
+    def tvl_by_lp(self) -> Dict[str, float]:
+        """TVL per LP counting only the priced side(s), so partially priced pools still rank by liquidity (0 when neither is)."""
+        tvl = np.nan_to_num(self._in_stable(self.reserve0, self.token0)) + np.nan_to_num(self._in_stable(self.reserve1, self.token1))
+        return {normalize_address(r[0]): float(v) for r, v in zip(self.rows, tvl)}
+
+    def where(self, mask: np.ndarray) -> "PoolTable":
+        """Rows where `mask` is True, as a new table (shares tokens and prices)."""
+        columns = {f.name: getattr(self, f.name)[mask] for f in fields(self) if f.type is np.ndarray and not f.name.startswith("token_")}
+        return replace(self, rows=[r for r, k in zip(self.rows, mask) if k], **columns)
+
+    def token_mask(self, addresses: Iterable[str]) -> np.ndarray:
+        """Pools holding every token in `addresses` (either side)."""
+        ids = {t.token_address.lower(): i for i, t in enumerate(self.tokens)}
+        mask = np.ones(len(self), dtype=bool)
+        for a in addresses:
+            i = ids.get(a.lower(), -2)
+            mask &= (self.token0 == i) | (self.token1 == i)
+        return mask
+
+    def index_of(self, lp: str) -> Optional[int]:
+        hits = np.flatnonzero(self.lp == address_key(lp))
+        return int(hits[0]) if len(hits) else None
+
+    def to_dict(self) -> Dict[str, np.ndarray]:
+        """Columns (plus the derived metrics) keyed by name, e.g. for `pandas.DataFrame(table.to_dict())`."""
+        return {"lp": self.lp, "type": self.type, "token0": self.token0, "token1": self.token1, "reserve0": self.reserve0,
+                "reserve1": self.reserve1, "pool_fee": self.pool_fee, "tvl": self.tvl, "total_fees": self.total_fees,
+                "volume": self.volume, "apr": self.apr}
@@ -1,6 +1,8 @@
-__all__ = ['Price']
+__all__ = ['Price', 'rate_scale', 'normalize_rates', 'rates_to_prices']
 
 from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
 from .token import Token
 
 @dataclass(frozen=True)
@@ -16,3 +18,20 @@ class Price:
 
     @property
     def pretty_price(self) -> float: return round(self.price, 5)
+
+@lru_cache(maxsize=None)
+def rate_scale(decimals: int, eth_decimals: int) -> Tuple[int, int]:
+    """(multiplier, divisor) that take an oracle rate of a `decimals` token to `eth_decimals` decimals."""
+    if decimals >= eth_decimals: return 10 ** (decimals - eth_decimals), 1
+    return 1, 10 ** (eth_decimals - decimals)
+
+def normalize_rates(rates: Sequence[int], decimals: Sequence[int], eth_decimals: int) -> List[int]:
+    """Oracle rates (ETH-denominated, scaled by the token's decimals difference to ETH) at `eth_decimals` decimals.
+    Scale factors are looked up once per distinct decimals, not recomputed per token."""
+    scales: Dict[int, Tuple[int, int]] = {d: rate_scale(d, eth_decimals) for d in set(decimals)}
+    return [r * scales[d][0] // scales[d][1] for r, d in zip(rates, decimals)]
+
+def rates_to_prices(rates: Sequence[int], eth_usd_price: int, eth_decimals: int) -> List[float]:
+    """Normalized rates to stable prices, given the price of 1 ETH in stable at `eth_decimals` decimals."""
+    unit = 10 ** eth_decimals
+    return [r * eth_usd_price // unit / unit for r in rates]
@@ -0,0 +1,68 @@
+__all__ = ['ProviderPool', 'provider_pool']
+
+import asyncio, threading, weakref
+from typing import Dict, Sequence, Tuple
+from aiohttp import ClientSession, TCPConnector
+from requests import Session
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider, AsyncHTTPProvider
+from .transport import HedgedHTTPProvider, AsyncHedgedHTTPProvider
+
+class ProviderPool:
+    """Process-wide web3 HTTP providers keyed by `rpc_uri`, so short-lived chain contexts reuse warm
+    keep-alive connections instead of paying TCP+TLS setup on every `with` / `async with`.
+
+    Sessions are capped at `max_connections` per endpoint (per event loop for async; web3 keeps one
+    session per thread for sync). With extra endpoints the pool hands out a hedged provider over the pooled
+    per-endpoint ones (see `sugar.transport`). `hits`/`misses` count lookups served from / added to the pool."""
+
+    def __init__(self):
+        self._providers: Dict[Tuple[str, str], object] = {}
+        # event loops that already got a keep-alive session, per rpc_uri
+        self._loops: Dict[str, weakref.WeakSet] = {}
+        self._lock = threading.RLock()
+        self.hits, self.misses = 0, 0
+
+    def _lookup(self, kind: str, rpc_uri: str, make):
+        with self._lock:
+            provider = self._providers.get((kind, rpc_uri))
+            if provider is not None: self.hits += 1
+            else:
+                self.misses += 1
+                provider = self._providers[(kind, rpc_uri)] = make()
+            return provider
+
+    def get(self, rpc_uri: str, max_connections: int, extra_uris: Sequence[str] = ()) -> HTTPProvider:
+        if extra_uris:
+            uris = [rpc_uri, *extra_uris]
+            return self._lookup("sync", ",".join(uris), lambda: HedgedHTTPProvider([self.get(u, max_connections) for u in uris]))
+        def make():
+            session, adapter = Session(), HTTPAdapter(pool_connections=max_connections, pool_maxsize=max_connections)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            return HTTPProvider(rpc_uri, session=session)
+        return self._lookup("sync", rpc_uri, make)
+
+    async def get_async(self, rpc_uri: str, max_connections: int, extra_uris: Sequence[str] = ()) -> AsyncHTTPProvider:
+        if extra_uris:
+            # every endpoint needs its session set up on this loop, so resolve them before the hedged wrapper
+            providers = [await self.get_async(u, max_connections) for u in [rpc_uri, *extra_uris]]
+            return self._lookup("async-hedged", ",".join([rpc_uri, *extra_uris]), lambda: AsyncHedgedHTTPProvider(providers))
+        provider = self._lookup("async", rpc_uri, lambda: AsyncHTTPProvider(rpc_uri))
+        # web3's own async sessions close the connection after every request; hand it a keep-alive one per loop
+        loop, loops = asyncio.get_running_loop(), self._loops.setdefault(rpc_uri, weakref.WeakSet())
+        if loop not in loops:
+            loops.add(loop)
+            await provider.cache_async_session(ClientSession(raise_for_status=True, connector=TCPConnector(limit=max_connections)))
+        return provider
+
+    def stats(self) -> Dict[str, int]: return {"hits": self.hits, "misses": self.misses, "providers": len(self._providers)}
+
+    async def aclose(self):
+        """Close the async sessions (call once at shutdown; providers stay pooled and reopen on demand)."""
+        for (kind, rpc_uri), provider in list(self._providers.items()):
+            if kind == "async":
+                await provider.disconnect()
+                self._loops.pop(rpc_uri, None)
+
+provider_pool = ProviderPool()
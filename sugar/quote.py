@@ -1,9 +1,9 @@
 __all__ = ['QUOTER_STABLE_POOL_FILLER', 'QUOTER_VOLATILE_POOL_FILLER',
            'NEW_SLIPSTREAM_FACTORY_BITMASK', 'OLD_SLIPSTREAM_FACTORY_BITMASK',
-           'PreparedRoute', 'pack_path', 'QuoteInput', 'Quote',
-           'SuperswapQuote']
+           'ROUTE_CACHE_SIZE', 'PreparedRoute', 'pack_path', 'encode_path', 'QuoteInput', 'Quote',
+           'DepthQuotes', 'SplitQuote', 'SuperswapQuote']
 
-from functools import reduce
+from functools import cached_property, lru_cache
 from typing import List, Union, Tuple, Optional
 from eth_abi.packed import encode_packed
 from dataclasses import dataclass
@@ -16,13 +16,23 @@ QUOTER_STABLE_POOL_FILLER, QUOTER_VOLATILE_POOL_FILLER = 2097152, 4194304
 # quoter can resolve the pool against the right slipstream factory.
 NEW_SLIPSTREAM_FACTORY_BITMASK = 0x080000
 OLD_SLIPSTREAM_FACTORY_BITMASK = 0x100000
+# packed routes kept by `encode_path` / `QuoteInput.route` (one per distinct path and encoding)
+ROUTE_CACHE_SIZE = 1 << 15
+
+def _pack_value(t: str, v: Union[str, int, bool]) -> bytes:
+    if t == "address": return bytes.fromhex(v[2:])
+    if t == "int24": return v.to_bytes(3, "big", signed=True)
+    return b"\x01" if v else b"\x00"
 
 @dataclass
 class PreparedRoute:
     types: List[str]; values: List[Union[str, int, bool]]
 
-    @property
-    def encoded(self) -> bytes: return encode_packed(self.types, self.values)
+    @cached_property
+    def encoded(self) -> bytes:
+        # routes only hold addresses, int24 fillers and bools: packing them by hand matches `encode_packed` at a fraction of the cost
+        if not set(self.types) <= {"address", "int24", "bool"}: return encode_packed(self.types, self.values)
+        return b"".join(_pack_value(t, v) for t, v in zip(self.types, self.values))
 
 def pack_path(path: List[Tuple[LiquidityPoolForSwap, bool]], for_swap: bool = False,
               slipstream_factory_addr: Optional[str] = None,
@@ -31,7 +41,7 @@ def pack_path(path: List[Tuple[LiquidityPoolForSwap, bool]], for_swap: bool = Fa
     # and pool.factory is normalized in LiquidityPoolForSwap.from_tuple, so direct
     # string equality is safe here without re-normalization on the hot path.
     is_v2_swap = for_swap and any(pool.is_basic for pool, _ in path)
-    types, values = reduce(lambda s, pool: s + pool, [["address", "int24"] for i in range(len(path))], []) + ["address"], []
+    types, values = ["address", "int24"] * len(path) + ["address"], []
     for node in path:
         pool, reversed = node
         token0, token1 = pool.token0_address if not reversed else pool.token1_address, pool.token1_address if not reversed else pool.token0_address
@@ -50,7 +60,17 @@ def pack_path(path: List[Tuple[LiquidityPoolForSwap, bool]], for_swap: bool = Fa
             elif values[i] == QUOTER_VOLATILE_POOL_FILLER: values[i] = False
 
     return PreparedRoute(types=types, values=values)
-  
+
+@lru_cache(maxsize=ROUTE_CACHE_SIZE)
+def _pack_path_cached(path: Tuple[Tuple[LiquidityPoolForSwap, bool], ...], for_swap: bool,
+                      slipstream_factory_addr: Optional[str], old_slipstream_factory_addr: Optional[str]) -> PreparedRoute:
+    return pack_path(list(path), for_swap, slipstream_factory_addr, old_slipstream_factory_addr)
+
+def encode_path(path: List[Tuple[LiquidityPoolForSwap, bool]], for_swap: bool = False,
+                slipstream_factory_addr: Optional[str] = None,
+                old_slipstream_factory_addr: Optional[str] = None) -> bytes:
+    """`pack_path(...).encoded`, memoized per path: every amount and every quote over the same route shares one encoding."""
+    return _pack_path_cached(tuple(path), for_swap, slipstream_factory_addr, old_slipstream_factory_addr).encoded
 
 @dataclass
 class QuoteInput:
@@ -65,17 +85,14 @@ class QuoteInput:
         from_token, to_token, path, amount_in, amount_out = t
         return QuoteInput(from_token=from_token, to_token=to_token, path=list(path), amount_in=amount_in, amount_out=amount_out)
 
+    # shared, memoized routes: treat them as read-only
     @property
     def route(self) -> PreparedRoute:
-        return pack_path(self.path,
-                         slipstream_factory_addr=self.slipstream_factory_addr,
-                         old_slipstream_factory_addr=self.old_slipstream_factory_addr)
+        return _pack_path_cached(tuple(self.path), False, self.slipstream_factory_addr, self.old_slipstream_factory_addr)
 
     @property
     def route_for_swap(self) -> PreparedRoute:
-        return pack_path(self.path, for_swap=True,
-                         slipstream_factory_addr=self.slipstream_factory_addr,
-                         old_slipstream_factory_addr=self.old_slipstream_factory_addr)
+        return _pack_path_cached(tuple(self.path), True, self.slipstream_factory_addr, self.old_slipstream_factory_addr)
 
 @dataclass
 class Quote:
@@ -90,6 +107,37 @@ class Quote:
     @property
     def amount_in(self) -> int: return self.input.amount_in
 
+@dataclass
+class DepthQuotes:
+    """Quotes of one pair for several input amounts (`get_quotes`): `best[i]` is the best quote for `amounts[i]`.
+    With `with_matrix`, `matrix[i][j]` holds the quote of `amounts[i]` over `paths[j]` (None where it failed or wasn't sent)."""
+    amounts: List[int]; paths: List[List[Tuple]]; best: List[Optional[Quote]]
+    matrix: Optional[List[List[Optional[Quote]]]] = None
+
+    @property
+    def amounts_out(self) -> List[int]: return [q.amount_out if q is not None else 0 for q in self.best]
+
+    def __iter__(self): return iter(self.best)
+
+    def __len__(self) -> int: return len(self.best)
+
+@dataclass
+class SplitQuote:
+    """One swap split across several routes (`get_split_quote`): each quote sends its own `amount_in` through its
+    own path and the split pays out the sum. Build its txs with `swap_from_quote` like a single `Quote`."""
+    quotes: List[Quote]
+
+    @property
+    def from_token(self) -> Token: return self.quotes[0].from_token
+    @property
+    def to_token(self) -> Token: return self.quotes[0].to_token
+    @property
+    def amount_in(self) -> int: return sum(q.amount_in for q in self.quotes)
+    @property
+    def amount_out(self) -> int: return sum(q.amount_out for q in self.quotes)
+    @property
+    def shares(self) -> List[float]: return [q.amount_in / self.amount_in for q in self.quotes]
+
 @dataclass(frozen=True)
 class SuperswapQuote:
     from_token: Token
@@ -0,0 +1,131 @@
+__all__ = ['RouteIndex', 'rank_paths_by_liquidity', 'cap_parallel_pools']
+
+import heapq
+from itertools import product
+from typing import List, Tuple, Dict, Iterable, Iterator, Optional, Set
+
+class RouteIndex:
+    """Token graph over swap pools, built once per pool set and reused across quotes.
+
+    Tokens are interned to integer ids. `neighbors[i]` lists the token ids adjacent
+    to token `i`; `edges[i][j]` holds the ids of every pool (parallel edges) linking
+    `i` to `neighbors[i][j]`. Pool ids index into `pools` (LP addresses) and
+    `pool_tokens` (the pool's two token ids)."""
+
+    def __init__(self, pairs: Iterable):
+        self.tokens: List[str] = []
+        self.token_ids: Dict[str, int] = {}
+        self.pools: List[str] = []
+        self.pool_tokens: List[Tuple[int, int]] = []
+        self.neighbors: List[List[int]] = []
+        self.edges: List[List[List[int]]] = []
+        slots: List[Dict[int, int]] = []
+        seen = set()
+        for pair in pairs:
+            # duplicate LPs and self-paired pools can never be part of a simple path
+            if pair.pool in seen or pair.token0 == pair.token1: continue
+            seen.add(pair.pool)
+            a, b, pid = self._intern(pair.token0, slots), self._intern(pair.token1, slots), len(self.pools)
+            self.pools.append(pair.pool)
+            self.pool_tokens.append((a, b))
+            for u, v in ((a, b), (b, a)):
+                j = slots[u].get(v)
+                if j is None:
+                    j = slots[u][v] = len(self.neighbors[u])
+                    self.neighbors[u].append(v)
+                    self.edges[u].append([])
+                self.edges[u][j].append(pid)
+
+    def _intern(self, token: str, slots: List[Dict[int, int]]) -> int:
+        i = self.token_ids.get(token)
+        if i is None:
+            i = self.token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+            self.neighbors.append([])
+            self.edges.append([])
+            slots.append({})
+        return i
+
+    @classmethod
+    def from_pools(cls, pools: Iterable) -> "RouteIndex":
+        """Build from `LiquidityPoolForSwap`-shaped objects (token0_address, token1_address, lp)."""
+        return cls(_PoolPair(p.token0_address, p.token1_address, p.lp) for p in pools)
+
+    def __len__(self) -> int: return len(self.pools)
+
+    def find_paths(self, start_token: str, end_token: str, cutoff: int = 3,
+                   exclude_tokens: Optional[Set[str]] = None,
+                   match_tokens: Optional[Set[str]] = None,
+                   max_parallel: int = 0,
+                   pool_scores: Optional[Dict[str, float]] = None) -> List[List[Tuple[str, str, str]]]:
+        """All simple routes from `start_token` to `end_token` with at most `cutoff` hops.
+
+        Each route is a list of `(token_in, token_out, pool)` hops, one route per
+        combination of parallel pools. `exclude_tokens` may not appear as intermediate
+        hops; when `match_tokens` is given, only pools touching one of them are used
+        (the same rule as `CommonChain.filter_pools_for_swap`). With `max_parallel` > 0 only
+        that many parallel pools per hop are expanded, the ones with the highest `pool_scores`
+        (keyed by pool), which bounds the combinations before they are generated."""
+        return list(self.iter_paths(start_token, end_token, cutoff, exclude_tokens, match_tokens, max_parallel, pool_scores))
+
+    def iter_paths(self, start_token: str, end_token: str, cutoff: int = 3,
+                   exclude_tokens: Optional[Set[str]] = None,
+                   match_tokens: Optional[Set[str]] = None,
+                   max_parallel: int = 0,
+                   pool_scores: Optional[Dict[str, float]] = None) -> Iterator[List[Tuple[str, str, str]]]:
+        """`find_paths`, yielding routes as the search finds them (so they can be quoted while it goes on)."""
+        s, t = self.token_ids.get(start_token), self.token_ids.get(end_token)
+        if s is None or t is None or s == t: return
+        excluded = {self.token_ids[a] for a in (exclude_tokens or ()) if a in self.token_ids}
+        matched = None if match_tokens is None else {self.token_ids[a] for a in match_tokens if a in self.token_ids}
+        tokens, pools, pool_tokens = self.tokens, self.pools, self.pool_tokens
+        scores = pool_scores or {}
+
+        def usable(pids: List[int]) -> List[int]:
+            if matched is not None: pids = [p for p in pids if pool_tokens[p][0] in matched or pool_tokens[p][1] in matched]
+            if 0 < max_parallel < len(pids): pids = sorted(pids, key=lambda p: -scores.get(pools[p], 0.0))[:max_parallel]
+            return pids
+
+        hops, on_path = [], {s}
+
+        def visit(u: int) -> Iterator[List[Tuple[str, str, str]]]:
+            for v, pids in zip(self.neighbors[u], self.edges[u]):
+                if v in on_path: continue
+                pids = usable(pids)
+                if not pids: continue
+                hops.append((tokens[u], tokens[v], pids))
+                if v == t:
+                    for combo in product(*(h[2] for h in hops)):
+                        yield [(a, b, pools[p]) for (a, b, _), p in zip(hops, combo)]
+                elif len(hops) < cutoff and v not in excluded:
+                    on_path.add(v)
+                    yield from visit(v)
+                    on_path.discard(v)
+                hops.pop()
+
+        yield from visit(s)
+
+def _path_score(path: List[Tuple], pool_scores: Dict[str, float], hop_discount: float) -> float:
+    # the shallowest pool bounds what the route can carry; longer routes pay more fees and slippage
+    return min(pool_scores.get(h[2], 0.0) for h in path) * hop_discount ** (len(path) - 1)
+
+def rank_paths_by_liquidity(paths: List[List[Tuple]], pool_scores: Dict[str, float], top_k: int,
+                            hop_discount: float = 0.5) -> List[List[Tuple]]:
+    """The `top_k` routes whose shallowest pool scores highest in `pool_scores` (e.g. TVL by LP), each extra
+    hop discounting a route by `hop_discount`. Ties keep their order in `paths`; `top_k` <= 0 keeps every route."""
+    if top_k <= 0 or len(paths) <= top_k: return paths
+    return heapq.nlargest(top_k, paths, key=lambda p: _path_score(p, pool_scores, hop_discount))
+
+def cap_parallel_pools(paths: List[List[Tuple]], pool_scores: Dict[str, float], max_parallel: int) -> List[List[Tuple]]:
+    """`paths` restricted to the `max_parallel` best-scored pools between each pair of tokens, i.e. what
+    `RouteIndex.find_paths(..., max_parallel=...)` returns, applied to an already enumerated route list."""
+    if max_parallel <= 0: return paths
+    parallel: Dict[frozenset, Set[str]] = {}
+    for path in paths:
+        for a, b, pool in path: parallel.setdefault(frozenset((a, b)), set()).add(pool)
+    kept = {k: set(sorted(v, key=lambda p: -pool_scores.get(p, 0.0))[:max_parallel]) for k, v in parallel.items()}
+    return [path for path in paths if all(pool in kept[frozenset((a, b))] for a, b, pool in path)]
+
+class _PoolPair:
+    __slots__ = ('token0', 'token1', 'pool')
+    def __init__(self, token0: str, token1: str, pool: str): self.token0, self.token1, self.pool = token0, token1, pool
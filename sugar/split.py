@@ -0,0 +1,59 @@
+__all__ = ['curve_value', 'local_curve', 'optimize_split', 'split_amounts']
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from .amm import quote_path
+
+# (amount in, amount out) samples of one route, e.g. a `DepthQuotes.matrix` column or `local_curve`
+Curve = Sequence[Tuple[int, int]]
+
+def curve_value(curve: Curve, amount_in: float) -> float:
+    """Output of `curve` at `amount_in`, linear between samples (and from (0, 0)), flat past the last sample."""
+    prev_in, prev_out = 0, 0
+    for a, out in curve:
+        if amount_in <= a:
+            return prev_out + (out - prev_out) * (amount_in - prev_in) / (a - prev_in) if a > prev_in else out
+        prev_in, prev_out = a, out
+    return prev_out
+
+def local_curve(path: List[Tuple], amounts: Iterable[int], states: Dict) -> Optional[List[Tuple[int, int]]]:
+    """Samples of `path` from local AMM math (see `sugar.amm.quote_path`); None when a hop can't be simulated."""
+    samples = []
+    for a in amounts:
+        try: out = quote_path(path, a, states)
+        except (ValueError, ZeroDivisionError): out = None
+        if out is None: return None
+        samples.append((a, out))
+    return samples
+
+def optimize_split(curves: Sequence[Curve], amount: int, steps: int = 10, max_routes: int = 3,
+                   route_pools: Optional[Sequence[Iterable[str]]] = None) -> List[int]:
+    """Split `amount` in `steps` equal parts across at most `max_routes` of the sampled routes to maximize the total output.
+
+    Parts go one by one to the route whose output grows most from it, which is optimal when outputs are concave in the
+    input (they are for AMM pools). Routes sharing a pool (`route_pools[i]` lists route i's pools) would move each other's
+    prices, so only pool-disjoint routes are combined. If the best single route beats the split, everything goes there.
+    Returns the number of parts per route, in `curves` order."""
+    if not curves or amount <= 0 or steps <= 0: return [0] * len(curves)
+    unit, max_routes = amount / steps, max(1, max_routes)
+    pools = [frozenset(p) for p in route_pools] if route_pools is not None else [frozenset() for _ in curves]
+    values = [[curve_value(c, unit * k) for k in range(steps + 1)] for c in curves]
+    shares, used = [0] * len(curves), set()
+    for _ in range(steps):
+        best, best_gain = None, None
+        for i, v in enumerate(values):
+            if not shares[i] and (len(used) >= max_routes or any(pools[i] & pools[j] for j in used)): continue
+            gain = v[shares[i] + 1] - v[shares[i]]
+            if best_gain is None or gain > best_gain: best, best_gain = i, gain
+        shares[best] += 1
+        used.add(best)
+    single = max(range(len(curves)), key=lambda i: values[i][steps])
+    if values[single][steps] >= sum(values[i][s] for i, s in enumerate(shares)):
+        return [steps if i == single else 0 for i in range(len(curves))]
+    return shares
+
+def split_amounts(amount: int, shares: Sequence[int]) -> List[int]:
+    """Integer amounts proportional to `shares` that add up to `amount`; rounding goes to the largest share."""
+    total = sum(shares)
+    amounts = [amount * s // total for s in shares]
+    amounts[max(range(len(shares)), key=lambda i: shares[i])] += amount - sum(amounts)
+    return amounts
@@ -3,13 +3,15 @@ __all__ = ['domains_abi', 'supported_chains', 'get_domain_async', 'get_domain',
 
 import json, requests
 from dataclasses import dataclass
+from web3 import Web3, AsyncWeb3
 from .swap import build_super_swap_data, SuperSwapData, setup_planner, SuperSwapDataInput
 from .token import Token
 from .quote import SuperswapQuote
 from .helpers import get_salt, serialize_ica_calls
-from .config import hyperlane_relay_url, hyperlane_relayers
+from .config import hyperlane_relay_url, hyperlane_relayers, make_op_chain_settings
+from .providers import provider_pool
 from .chains import (
-    AsyncChain, AsyncOPChain, Chain, OPChain,
+    AsyncChain, Chain,
     get_async_chain_from_token, get_async_simnet_chain_from_token,
     get_chain_from_token, get_simnet_chain_from_token,
 )
@@ -58,19 +60,22 @@ domains_abi = [
 # TODO: remove this when domains are supported on all chains
 async def get_domain_async(chain_id: int) -> int:
     # TODO: remove chain_id arg when all chains support domains
-    async with AsyncOPChain() as op:
-        contract = op.web3.eth.contract(address=op.settings.message_module_contract_addr, abi=domains_abi)
-        domain = await contract.functions.domains(chain_id).call()
-        # TODO: remove fallback to chain_id when all chains support domains
-        return domain if domain != 0 else int(chain_id)
+    # one read doesn't need a whole chain context, just the shared OP provider
+    settings = make_op_chain_settings()
+    web3 = AsyncWeb3(await provider_pool.get_async(settings.rpc_uri, settings.rpc_max_connections))
+    contract = web3.eth.contract(address=settings.message_module_contract_addr, abi=domains_abi)
+    domain = await contract.functions.domains(chain_id).call()
+    # TODO: remove fallback to chain_id when all chains support domains
+    return domain if domain != 0 else int(chain_id)
 
 def get_domain(chain_id: int) -> int:
     # TODO: remove chain_id arg when all chains support domains
-    with OPChain() as op:
-        contract = op.web3.eth.contract(address=op.settings.message_module_contract_addr, abi=domains_abi)
-        domain = contract.functions.domains(chain_id).call()
-        # TODO: remove fallback to chain_id when all chains support domains
-        return domain if domain != 0 else int(chain_id)
+    settings = make_op_chain_settings()
+    web3 = Web3(provider_pool.get(settings.rpc_uri, settings.rpc_max_connections))
+    contract = web3.eth.contract(address=settings.message_module_contract_addr, abi=domains_abi)
+    domain = contract.functions.domains(chain_id).call()
+    # TODO: remove fallback to chain_id when all chains support domains
+    return domain if domain != 0 else int(chain_id)
 
 class SuperswapRelayer(ABC):
     @abstractmethod
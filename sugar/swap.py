@@ -1,10 +1,10 @@
 __all__ = ['FLAG_ALLOW_REVERT', 'ABI_DEFINITION', 'CONTRACT_BALANCE', 'CommandType', 'BridgeType', 'RoutePlanner',
-           'setup_planner', 'SuperSwapDataInput', 'SuperSwapData', 'build_super_swap_data']
+           'add_path_commands', 'setup_planner', 'setup_split_planner', 'SuperSwapDataInput', 'SuperSwapData', 'build_super_swap_data']
 
 import copy
 from dataclasses import dataclass
 from .config import XCHAIN_GAS_LIMIT_UPPERBOUND
-from .quote import Quote, SuperswapQuote, pack_path
+from .quote import Quote, SplitQuote, SuperswapQuote, encode_path
 from .helpers import apply_slippage, ICACallData, hash_ICA_calls, to_bytes32, to_bytes32_str, MAX_UINT256
 from .helpers import ADDRESS_ZERO
 from .token import Token
@@ -151,31 +151,14 @@ class RoutePlanner:
 # Constants
 CONTRACT_BALANCE = int("0x8000000000000000000000000000000000000000000000000000000000000000", 16)
 
-def setup_planner(quote: Quote, slippage: float, account: str, router_address: str,
-                  slipstream_factory_addr: Optional[str] = None,
-                  old_slipstream_factory_addr: Optional[str] = None) -> RoutePlanner:
-    """Setup route planner with the given quote and chain"""
-
-    route_planner = RoutePlanner()
-    min_amount_out = apply_slippage(quote.amount_out, slippage)
-    # fall back to QuoteInput's factory pair if caller didn't pass them
-    if slipstream_factory_addr is None: slipstream_factory_addr = quote.input.slipstream_factory_addr
-    if old_slipstream_factory_addr is None: old_slipstream_factory_addr = quote.input.old_slipstream_factory_addr
-    pp_kwargs = dict(slipstream_factory_addr=slipstream_factory_addr,
-                     old_slipstream_factory_addr=old_slipstream_factory_addr)
-
-    tokens_come_from_contract = quote.input.amount_in == CONTRACT_BALANCE
-    
-    # Handle wrapped native token if needed
-    if quote.from_token.wrapped_token_address:
-        # When trading from native token, wrap token first
-        route_planner.add_command(CommandType.WRAP_ETH, [router_address, quote.amount_in])
-        tokens_come_from_contract = True
-    
+def add_path_commands(planner: RoutePlanner, path: List[Tuple[LiquidityPoolForSwap, bool]], amount_in: int, min_amount_out: int,
+                      recipient: str, payer_is_user: bool, router_address: str, **pp_kwargs) -> RoutePlanner:
+    """Add the swap commands for one route: consecutive v2 (basic) and v3 (CL) pools go in one command each, and every
+    command but the last hands its output to the next one. The route's output goes to `recipient`."""
     # Group nodes by pool type (v2 or v3)
     grouped_nodes: List[List[Tuple[LiquidityPoolForSwap, bool]]] = []
 
-    for node in quote.path:
+    for node in path:
         if not grouped_nodes: grouped_nodes.append([node])
         elif node[0].type < 1:
             # Current node is a v2 pool
@@ -191,15 +174,14 @@ def setup_planner(quote: Quote, slippage: float, account: str, router_address: s
         nodes = grouped_nodes[0]
         is_v2_pool = float(nodes[0][0].type) < 1
         
-        route_planner.add_command(
+        planner.add_command(
             CommandType.V2_SWAP_EXACT_IN if is_v2_pool else CommandType.V3_SWAP_EXACT_IN,
             [
-                # Where should money go?
-                router_address if quote.to_token.wrapped_token_address else account,
-                quote.amount_in,
+                recipient,
+                amount_in,
                 min_amount_out,
-                pack_path(nodes, for_swap=True, **pp_kwargs).encoded,
-                not tokens_come_from_contract,
+                encode_path(nodes, for_swap=True, **pp_kwargs),
+                payer_is_user,
                 False, # isUni
             ]
         )
@@ -213,14 +195,14 @@ def setup_planner(quote: Quote, slippage: float, account: str, router_address: s
         is_first_batch_v2 = not first_batch[0][0].is_cl
         next_batch = rest[0] if rest else last_batch
         
-        route_planner.add_command(
+        planner.add_command(
             CommandType.V2_SWAP_EXACT_IN if is_first_batch_v2 else CommandType.V3_SWAP_EXACT_IN,
             [
                 router_address if is_first_batch_v2 else next_batch[0][0].lp,
-                quote.amount_in,
+                amount_in,
                 0,  # No expectations on min amount out for first batch
-                pack_path(first_batch, for_swap=True, **pp_kwargs).encoded,
-                not tokens_come_from_contract,
+                encode_path(first_batch, for_swap=True, **pp_kwargs),
+                payer_is_user,
                 False,  # isUni
             ]
         )
@@ -230,13 +212,13 @@ def setup_planner(quote: Quote, slippage: float, account: str, router_address: s
             is_batch_v2 = not batch[0][0].is_cl
             next_batch = rest[idx + 1] if idx + 1 < len(rest) else last_batch
             
-            route_planner.add_command(
+            planner.add_command(
                 CommandType.V2_SWAP_EXACT_IN if is_batch_v2 else CommandType.V3_SWAP_EXACT_IN,
                 [
                     router_address if is_batch_v2 else next_batch[0][0].lp,
                     0 if is_batch_v2 else CONTRACT_BALANCE,
                     0,  # No expectations for middle batches
-                    pack_path(batch, for_swap=True, **pp_kwargs).encoded,
+                    encode_path(batch, for_swap=True, **pp_kwargs),
                     False,  # Money comes from contract
                     False,  # isUni
                 ]
@@ -245,23 +227,80 @@ def setup_planner(quote: Quote, slippage: float, account: str, router_address: s
         # # Handle last batch
         is_last_batch_v2 = not last_batch[0][0].is_cl
         
-        route_planner.add_command(
+        planner.add_command(
             CommandType.V2_SWAP_EXACT_IN if is_last_batch_v2 else CommandType.V3_SWAP_EXACT_IN,
             [
-                router_address if quote.to_token.wrapped_token_address else account,
+                recipient,
                 0 if is_last_batch_v2 else CONTRACT_BALANCE,
                 min_amount_out,
-                pack_path(last_batch, for_swap=True, **pp_kwargs).encoded,
+                encode_path(last_batch, for_swap=True, **pp_kwargs),
                 False,  # Money comes from contract
                 False,  # isUni
             ]
         )
+
+    return planner
+
+def setup_planner(quote: Quote, slippage: float, account: str, router_address: str,
+                  slipstream_factory_addr: Optional[str] = None,
+                  old_slipstream_factory_addr: Optional[str] = None) -> RoutePlanner:
+    """Setup route planner with the given quote and chain"""
+
+    route_planner = RoutePlanner()
+    min_amount_out = apply_slippage(quote.amount_out, slippage)
+    # fall back to QuoteInput's factory pair if caller didn't pass them
+    if slipstream_factory_addr is None: slipstream_factory_addr = quote.input.slipstream_factory_addr
+    if old_slipstream_factory_addr is None: old_slipstream_factory_addr = quote.input.old_slipstream_factory_addr
+    pp_kwargs = dict(slipstream_factory_addr=slipstream_factory_addr,
+                     old_slipstream_factory_addr=old_slipstream_factory_addr)
+
+    tokens_come_from_contract = quote.input.amount_in == CONTRACT_BALANCE
+    
+    # Handle wrapped native token if needed
+    if quote.from_token.wrapped_token_address:
+        # When trading from native token, wrap token first
+        route_planner.add_command(CommandType.WRAP_ETH, [router_address, quote.amount_in])
+        tokens_come_from_contract = True
+    
+    # Where should money go?
+    recipient = router_address if quote.to_token.wrapped_token_address else account
+    add_path_commands(route_planner, quote.path, quote.amount_in, min_amount_out, recipient, not tokens_come_from_contract, router_address, **pp_kwargs)
     
     # Handle unwrapping WETH if needed
     if quote.to_token.wrapped_token_address: route_planner.add_command(CommandType.UNWRAP_WETH, [account, min_amount_out])
     
     return route_planner
 
+def setup_split_planner(quote: SplitQuote, slippage: float, account: str, router_address: str,
+                        slipstream_factory_addr: Optional[str] = None,
+                        old_slipstream_factory_addr: Optional[str] = None) -> RoutePlanner:
+    """Setup route planner for a swap split across routes. Every route pays out to the router and the slippage
+    check applies to the total: a final SWEEP (or UNWRAP_WETH for native output) sends it to `account`."""
+    if len(quote.quotes) == 1:
+        return setup_planner(quote.quotes[0], slippage, account, router_address, slipstream_factory_addr, old_slipstream_factory_addr)
+
+    route_planner = RoutePlanner()
+    min_amount_out = apply_slippage(quote.amount_out, slippage)
+    first = quote.quotes[0].input
+    if slipstream_factory_addr is None: slipstream_factory_addr = first.slipstream_factory_addr
+    if old_slipstream_factory_addr is None: old_slipstream_factory_addr = first.old_slipstream_factory_addr
+    pp_kwargs = dict(slipstream_factory_addr=slipstream_factory_addr,
+                     old_slipstream_factory_addr=old_slipstream_factory_addr)
+
+    tokens_come_from_contract = False
+    if quote.from_token.wrapped_token_address:
+        # wrap the whole input once; every route then spends its share from the router
+        route_planner.add_command(CommandType.WRAP_ETH, [router_address, quote.amount_in])
+        tokens_come_from_contract = True
+
+    for q in quote.quotes:
+        add_path_commands(route_planner, q.path, q.amount_in, 0, router_address, not tokens_come_from_contract, router_address, **pp_kwargs)
+
+    if quote.to_token.wrapped_token_address: route_planner.add_command(CommandType.UNWRAP_WETH, [account, min_amount_out])
+    else: route_planner.add_command(CommandType.SWEEP, [quote.to_token.token_address, account, min_amount_out])
+
+    return route_planner
+
 @dataclass(frozen=True)
 class SuperSwapDataInput:
     from_token: Token
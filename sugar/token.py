@@ -2,7 +2,7 @@ __all__ = ['Token']
 
 from typing import Tuple
 from dataclasses import dataclass
-from .helpers import normalize_address, float_to_uint256
+from .helpers import normalize_address, address_key, float_to_uint256
 
 @dataclass(frozen=True)
 class Token:
@@ -20,7 +20,7 @@ class Token:
     wrapped_token_address: str = None
 
     def __eq__(self, other):
-        t1, t2 = normalize_address(self.wrapped_token_address or self.token_address), normalize_address(other.wrapped_token_address or other.token_address)
+        t1, t2 = address_key(self.wrapped_token_address or self.token_address), address_key(other.wrapped_token_address or other.token_address)
         return  t1 == t2 and self.chain_id == other.chain_id
 
     def parse_units(self, value: float) -> int:
@@ -0,0 +1,151 @@
+__all__ = ['EndpointStats', 'HedgedHTTPProvider', 'AsyncHedgedHTTPProvider']
+
+import asyncio, itertools, threading, time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, List, Tuple
+from web3 import HTTPProvider, AsyncHTTPProvider
+
+class EndpointStats:
+    """Recent latencies and health of one RPC endpoint."""
+
+    # delay before hedging while there are too few samples for a p95
+    default_hedge_delay: float = 1.0
+    min_hedge_delay: float = 0.05
+    min_samples: int = 20
+    # consecutive failures that eject the endpoint, and for how long (seconds)
+    max_failures: int = 3
+    eject_seconds: float = 30.0
+
+    def __init__(self, uri: str, window: int = 100):
+        self.uri, self.latencies = uri, deque(maxlen=window)
+        self.failures, self.ejected_until = 0, 0.0
+
+    @property
+    def healthy(self) -> bool: return time.monotonic() >= self.ejected_until
+
+    @property
+    def hedge_delay(self) -> float:
+        """How long to wait on this endpoint before asking another one: its p95 latency."""
+        if len(self.latencies) < self.min_samples: return self.default_hedge_delay
+        ordered = sorted(self.latencies)
+        return max(self.min_hedge_delay, ordered[int(len(ordered) * 0.95) - 1])
+
+    def succeeded(self, latency: float):
+        self.latencies.append(latency)
+        self.failures = 0
+
+    def failed(self):
+        self.failures += 1
+        if self.failures >= self.max_failures: self.ejected_until = time.monotonic() + self.eject_seconds
+
+class _BatchRejected(Exception):
+    # a whole batch answered with a single error object (rate limits, size caps): try another endpoint
+    def __init__(self, response): self.response = response
+
+def _check_batch(response):
+    if not isinstance(response, list): raise _BatchRejected(response)
+    return response
+
+class _Endpoints:
+    """Round-robin over healthy endpoints; ejected ones are only tried after every healthy one failed."""
+
+    def __init__(self, providers: List[Any]):
+        self.providers, self.stats = providers, [EndpointStats(str(p.endpoint_uri)) for p in providers]
+        self._next, self._lock = itertools.count(), threading.Lock()
+
+    def order(self) -> List[Tuple[Any, EndpointStats]]:
+        with self._lock: start = next(self._next) % len(self.providers)
+        rotated = [(self.providers[(start + i) % len(self.providers)], self.stats[(start + i) % len(self.providers)]) for i in range(len(self.providers))]
+        return [e for e in rotated if e[1].healthy] + [e for e in rotated if not e[1].healthy]
+
+def _unwrap(error: BaseException):
+    if isinstance(error, _BatchRejected): return error.response
+    raise error
+
+class HedgedHTTPProvider(HTTPProvider):
+    """`HTTPProvider` over several endpoints of one chain. Each request (or batch) goes to the next healthy
+    endpoint; when it hasn't answered within that endpoint's p95 latency the same request is also sent to
+    the next one, and whichever answers first wins. Failing endpoints are failed over and, after
+    `EndpointStats.max_failures` in a row, ejected for `EndpointStats.eject_seconds`."""
+
+    def __init__(self, providers: List[HTTPProvider], max_workers: int = 32):
+        super().__init__(providers[0].endpoint_uri)
+        self.endpoints = _Endpoints(providers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __str__(self) -> str: return f"HedgedHTTPProvider({', '.join(s.uri for s in self.endpoints.stats)})"
+
+    def _call(self, provider: HTTPProvider, stats: EndpointStats, call: Callable):
+        start = time.perf_counter()
+        try: result = call(provider)
+        except Exception:
+            stats.failed()
+            raise
+        stats.succeeded(time.perf_counter() - start)
+        return result
+
+    def _race(self, call: Callable):
+        endpoints, pending, error = self.endpoints.order(), set(), None
+        for i, (provider, stats) in enumerate(endpoints):
+            pending.add(self._executor.submit(self._call, provider, stats, call))
+            last = i == len(endpoints) - 1
+            while pending:
+                done, pending = wait(pending, timeout=None if last else stats.hedge_delay, return_when=FIRST_COMPLETED)
+                for f in done:
+                    if f.exception() is None: return f.result()
+                    error = f.exception()
+                # a slow or failed endpoint: bring in the next one
+                if not last: break
+        return _unwrap(error)
+
+    def make_request(self, method, params):
+        return self._race(lambda p: p.make_request(method, params))
+
+    def make_batch_request(self, batch_requests):
+        return self._race(lambda p: _check_batch(p.make_batch_request(batch_requests)))
+
+class AsyncHedgedHTTPProvider(AsyncHTTPProvider):
+    """Async `HedgedHTTPProvider`: same endpoint rotation, p95 hedging and ejection; losing requests are cancelled."""
+
+    def __init__(self, providers: List[AsyncHTTPProvider]):
+        super().__init__(providers[0].endpoint_uri)
+        self.endpoints = _Endpoints(providers)
+
+    def __str__(self) -> str: return f"AsyncHedgedHTTPProvider({', '.join(s.uri for s in self.endpoints.stats)})"
+
+    async def _call(self, provider: AsyncHTTPProvider, stats: EndpointStats, call: Callable):
+        start = time.perf_counter()
+        try: result = await call(provider)
+        except asyncio.CancelledError: raise
+        except Exception:
+            stats.failed()
+            raise
+        stats.succeeded(time.perf_counter() - start)
+        return result
+
+    async def _race(self, call: Callable):
+        endpoints, pending, error = self.endpoints.order(), set(), None
+        try:
+            for i, (provider, stats) in enumerate(endpoints):
+                pending.add(asyncio.ensure_future(self._call(provider, stats, call)))
+                last = i == len(endpoints) - 1
+                while pending:
+                    done, pending = await asyncio.wait(pending, timeout=None if last else stats.hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                    for t in done:
+                        if t.exception() is None: return t.result()
+                        error = t.exception()
+                    if not last: break
+            return _unwrap(error)
+        finally:
+            for t in pending: t.cancel()
+
+    async def make_request(self, method, params):
+        return await self._race(lambda p: p.make_request(method, params))
+
+    async def make_batch_request(self, batch_requests):
+        async def call(p): return _check_batch(await p.make_batch_request(batch_requests))
+        return await self._race(call)
+
+    async def disconnect(self) -> None:
+        for p in self.endpoints.providers: await p.disconnect()
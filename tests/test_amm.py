@@ -0,0 +1,85 @@
+"""Local basic-pool quoting (no network)."""
+from decimal import Decimal, getcontext
+
+from sugar.amm import BasicPoolState, get_amount_out_stable, get_amount_out_volatile, quote_path, rank_paths
+from sugar.chains import CommonChain
+from sugar.config import make_base_chain_settings
+from sugar.helpers import normalize_address
+from sugar.token import Token
+
+E18, E6 = 10 ** 18, 10 ** 6
+
+
+def _state(lp, t0, t1, r0, r1, *, stable=False, fee=30, d0=E18, d1=E18):
+    return BasicPoolState(lp=lp, token0_address=t0, token1_address=t1, reserve0=r0, reserve1=r1,
+                          decimals0=d0, decimals1=d1, stable=stable, fee=fee)
+
+
+def _stable_reference(amount_in, r_in, r_out):
+    # solve x3y+y3x = k for the new y in high precision decimals (all values 1e18-normalized)
+    getcontext().prec = 80
+    x, y, a = Decimal(r_in), Decimal(r_out), Decimal(amount_in)
+    k = x ** 3 * y + y ** 3 * x
+    x1, lo, hi = x + a, Decimal(0), y
+    for _ in range(300):
+        mid = (lo + hi) / 2
+        if x1 ** 3 * mid + mid ** 3 * x1 < k: lo = mid
+        else: hi = mid
+    return y - hi
+
+
+def test_volatile_matches_constant_product():
+    assert get_amount_out_volatile(10 * E18, 1000 * E18, 2000 * E18) == 10 * E18 * 2000 * E18 // (1010 * E18)
+    s = _state("0xP", "0xA", "0xB", 1000 * E18, 2000 * E18, fee=30)
+    net = 10 * E18 - 10 * E18 * 30 // 10_000
+    assert s.get_amount_out(10 * E18, "0xA") == net * 2000 * E18 // (1000 * E18 + net)
+    assert s.get_amount_out(10 * E18, "0xB") == net * 1000 * E18 // (2000 * E18 + net)
+
+
+def test_stable_close_to_curve():
+    for amount_in, r0, r1 in [(1_000 * E18, 1_000_000 * E18, 1_000_000 * E18), (50_000 * E18, 2_000_000 * E18, 1_500_000 * E18), (E18, 10 * E18, 12 * E18)]:
+        out = get_amount_out_stable(amount_in, True, r0, r1, E18, E18)
+        ref = _stable_reference(amount_in, r0, r1)
+        assert out <= ref + 2 and ref - out < Decimal(ref) * Decimal("1e-12") + 2
+
+
+def test_stable_mixed_decimals():
+    # USDC (6) / DAI (18) style pool: near 1:1 after normalization
+    out = get_amount_out_stable(1_000 * E6, True, 5_000_000 * E6, 5_000_000 * E18, E6, E18)
+    assert 999 * E18 < out < 1_000 * E18
+    back = get_amount_out_stable(out, False, 5_000_000 * E6, 5_000_000 * E18, E6, E18)
+    assert 998 * E6 < back < 1_000 * E6
+
+
+def test_stable_beats_volatile_near_peg():
+    r = 1_000_000 * E18
+    assert get_amount_out_stable(10_000 * E18, True, r, r, E18, E18) > get_amount_out_volatile(10_000 * E18, r, r)
+
+
+def test_from_tuple():
+    t = [0] * 32
+    t[0], t[4], t[7], t[8], t[10], t[11], t[22] = "0x" + "11" * 20, 0, "0x" + "aa" * 20, 5 * E6, "0x" + "bb" * 20, 7 * E18, 5
+    tok = lambda a, d: Token(chain_id="8453", chain_name="Base", token_address=a, symbol="X", decimals=d, listed=True)
+    a, b = "0x" + "Aa" * 20, "0x" + "bB" * 20
+    tokens = {normalize_address(a): tok(normalize_address(a), 6), normalize_address(b): tok(normalize_address(b), 18)}
+    s = BasicPoolState.from_tuple(tuple(t), tokens)
+    assert s.stable and s.fee == 5 and s.decimals0 == E6 and s.decimals1 == E18 and s.reserve0 == 5 * E6
+    t[4] = 100
+    assert BasicPoolState.from_tuple(tuple(t), tokens) is None
+
+
+def test_quote_path_and_rank():
+    states = {"p1": _state("p1", "A", "B", 1000 * E18, 1000 * E18), "p2": _state("p2", "A", "B", 10 * E18, 10 * E18),
+              "p3": _state("p3", "B", "C", 1000 * E18, 1000 * E18)}
+    deep, shallow, cl = [("A", "B", "p1"), ("B", "C", "p3")], [("A", "B", "p2"), ("B", "C", "p3")], [("A", "C", "cl1")]
+    assert quote_path(deep, E18, states) > quote_path(shallow, E18, states) > 0
+    assert quote_path(cl, E18, states) is None
+    assert rank_paths([shallow, cl, deep], E18, states, 1) == [deep, cl]
+
+
+def test_select_paths_respects_setting():
+    states, paths = {"p1": _state("p1", "A", "B", E18, E18)}, [[("A", "B", "p1")], [("A", "B", "p2")]]
+    assert CommonChain(make_base_chain_settings()).select_paths_for_quote(paths, E18, states) == paths
+    chain = CommonChain(make_base_chain_settings(quote_local_top_n=1))
+    assert chain.select_paths_for_quote(paths, E18, states) == paths
+    assert chain.select_paths_for_quote(paths + [[("A", "B", "p1")]], E18, {**states, "p2": _state("p2", "A", "B", 10, 10)}) == [paths[0]]
@@ -0,0 +1,349 @@
+"""Persistent disk cache, snapshot memo, quote and price caches (no network: paginated reads and quotes are stubbed)."""
+import asyncio, os, threading, time
+from types import SimpleNamespace
+
+from cachetools import TTLCache, cached
+
+from sugar.cache import DiskCache, PriceCache, QuoteCache, SnapshotMemo, amount_bucket
+from sugar.chains import AsyncBaseChain, BaseChain
+from sugar.config import make_base_chain_settings
+from sugar.pool import LiquidityPoolForSwap, Price
+from sugar.quote import Quote
+from sugar.route import RouteIndex
+from sugar.token import Token
+
+RAW_TOKEN = ("0x940181a94A35A4569E4529A3CDfB74e38FD98631", "AERO", 18, 0, True, False)
+
+
+def _cache(tmp_path, **kw): return DiskCache(os.path.join(tmp_path, "c.sqlite3"), kw.get("ttl", 60), kw.get("max_bytes", 1 << 20))
+
+
+def test_roundtrip_keeps_tuples(tmp_path):
+    c = _cache(tmp_path)
+    c.set("k", [RAW_TOKEN, (1, [2, (3, "x")])])
+    assert c.get("k") == [RAW_TOKEN, (1, [2, (3, "x")])]
+    assert isinstance(c.get("k")[0], tuple)
+    assert c.get("missing") is None
+
+
+def test_ttl_applies_to_latest_only(tmp_path, monkeypatch):
+    import sugar.cache
+    now = [1000.0]
+    monkeypatch.setattr(sugar.cache.time, "time", lambda: now[0])
+    c = _cache(tmp_path, ttl=10)
+    c.set("latest", [1])
+    c.set("pinned", [2], pinned=True)
+    now[0] += 11
+    assert c.get("latest") is None and c.get("pinned") == [2]
+
+
+def test_size_eviction_drops_least_recently_used(tmp_path, monkeypatch):
+    import sugar.cache
+    now = [0.0]
+    monkeypatch.setattr(sugar.cache.time, "time", lambda: now[0])
+    c = _cache(tmp_path, max_bytes=250)
+    for k in "abc":
+        now[0] += 1
+        c.set(k, ["x" * 100], pinned=True)
+        if k == "b":
+            now[0] += 1
+            assert c.get("a") is not None  # touch a, making b the oldest
+    assert c.get("b") is None and c.get("a") is not None and c.get("c") is not None
+
+
+def test_unserializable_values_skipped(tmp_path):
+    c = _cache(tmp_path)
+    c.set("k", [b"\x00"])
+    assert c.get("k") is None
+
+
+def test_keys_include_block():
+    assert DiskCache.make_key("10", "0xS", None, "all") == "10:0xS:latest:all"
+    assert DiskCache.make_key("10", "0xS", 5, "all") != DiskCache.make_key("10", "0xS", 6, "all")
+
+
+def test_disabled_by_default():
+    assert BaseChain().disk_cache is None
+
+
+def test_fresh_chain_reads_through_cache(tmp_path):
+    calls = []
+
+    def paginate(f):
+        calls.append(f)
+        return [RAW_TOKEN]
+
+    for _ in range(2):
+        with BaseChain(cache_dir=str(tmp_path)) as chain:
+            chain.paginate = paginate
+            tokens = chain.get_all_tokens()
+            assert "AERO" in [t.symbol for t in tokens]
+            with chain.at_block(1): chain.get_all_tokens()
+    # one "latest" and one pinned read on the first instance, both served from disk on the second
+    assert len(calls) == 2
+
+
+def test_snapshot_memo_keys_on_identity():
+    memo, rows, rates, builds = SnapshotMemo(maxsize=2), [1], [2], []
+    def build():
+        builds.append(1)
+        return object()
+    first = memo.get((rows, rates), build)
+    assert memo.get((rows, rates), build) is first and len(builds) == 1
+    # equal but different objects are a new snapshot
+    assert memo.get((rows, list(rates)), build) is not first and len(builds) == 2
+    assert memo.stats() == {"hits": 1, "misses": 2, "entries": 2}
+    memo.clear()
+    assert memo.get((rows, rates), build) is not first and memo.stats()["entries"] == 1
+
+
+def test_get_pools_reuses_prepared_pools_until_prices_change():
+    token = Token.from_tuple(RAW_TOKEN, "8453", "Base")
+    row = [0] * 32
+    row[0], row[4], row[7], row[10] = "0x" + "11" * 20, -1, token.token_address, token.token_address
+    row[13] = row[18] = row[20] = row[29] = row[30] = row[0]
+    tokens, rows = [token], [tuple(row)]
+    with BaseChain() as chain:
+        # like the real per-block caches, the same lists come back on every call
+        chain.get_all_tokens = lambda listed_only=False: tokens
+        chain._get_raw_pools = lambda for_swaps: rows
+        chain._get_prices = cached(TTLCache(ttl=60, maxsize=4))(lambda tokens: [10**18] * len(tokens))
+        chain.prepare_prices = lambda tokens, rates: [Price(token=t, price=r / 10**18) for t, r in zip(tokens, rates)]
+        pools = chain.get_pools()
+        assert len(pools) == 1 and chain.get_pools() is pools
+        assert chain.prepared_pools.stats()["hits"] == 1
+        chain.refresh()
+        assert chain.get_pools() is not pools and chain.prepared_pools.stats()["misses"] == 2
+
+
+def test_quote_cache_ttl_lru_and_counters():
+    now = [0.0]
+    c = QuoteCache(ttl=10, maxsize=2, clock=lambda: now[0])
+    assert c.get_routes("k", 100) is None
+    c.put_routes("k", ["r"], 100, "q")
+    assert c.get_routes("k", 100).quote == "q" and c.get_routes("k", 120).routes == ["r"]
+    c.put_routes("k2", [], 1, "q2")
+    c.put_routes("k3", [], 1, "q3")
+    assert c.get_routes("k", 100) is None and c.stats()["routes"] == 2
+    now[0] += 10
+    assert c.get_routes("k3", 1) is None
+    assert {k: c.stats()[k] for k in ("hits", "reverified", "misses")} == {"hits": 1, "reverified": 1, "misses": 3}
+    assert c.stats()["hit_rate"] == 0.4
+    assert amount_bucket(0) == -1 and amount_bucket(1) == 0 and amount_bucket(1000) == amount_bucket(600) != amount_bucket(1100)
+
+
+def test_quote_cache_paths_follow_snapshots():
+    c, index, builds = QuoteCache(ttl=1), object(), []
+    def build(): builds.append(1); return ["p"]
+    assert c.get_paths("k", (index, None), build) is c.get_paths("k", (index, None), build)
+    c.get_paths("k", (object(), None), build)
+    assert len(builds) == 2 and (c.path_hits, c.path_misses) == (1, 2)
+
+
+def test_get_quote_reuses_paths_and_reverifies_cached_routes():
+    settings = make_base_chain_settings()
+    a, b, x = settings.connector_tokens_addrs[:3]
+    def _t(addr): return Token(chain_id="8453", chain_name="Base", token_address=addr, symbol=addr[:6], decimals=18, listed=True)
+    pools = [LiquidityPoolForSwap(chain_id="8453", chain_name="Base", lp=f"0x{i:040x}", type=0, token0_address=t0, token1_address=t1, factory="0xF")
+             for i, (t0, t1) in enumerate([(a, b), (a, x), (x, b), (a, b)], start=1)]
+    # route quality per LP path: the second direct pool is best
+    rate = {(pools[0].lp,): 2, (pools[1].lp, pools[2].lp): 1, (pools[3].lp,): 3}
+    calls = []
+
+    def quote(batch, inputs):
+        calls.append(len(inputs))
+        return [Quote(input=q, amount_out=q.amount_in * rate[tuple(p.lp for p, _ in q.path)]) for q in inputs]
+
+    with BaseChain() as chain:
+        chain.quote_cache = QuoteCache(ttl=60)
+        chain.get_pools_for_swaps = lambda: pools
+        index = RouteIndex.from_pools(pools)
+        chain.get_route_index = lambda: index
+        chain._execute_quote_batch = quote
+        q = chain.get_quote(_t(a), _t(b), 1000)
+        assert q.amount_out == 3000 and calls == [3]
+        # same amount: cached; same bucket: only the cached best routes are re-quoted
+        assert chain.get_quote(_t(a), _t(b), 1000) is q and calls == [3]
+        assert chain.get_quote(_t(a), _t(b), 1010).amount_out == 3030 and calls == [3, 3]
+        # another bucket quotes every route again, on the memoized route set
+        assert chain.get_quote(_t(a), _t(b), 10**6).amount_out == 3 * 10**6 and calls == [3, 3, 3]
+        # filtered quotes bypass the cache
+        assert chain.get_quote(_t(a), _t(b), 1000, filter_quotes=lambda q: q.amount_out < 3000).amount_out == 2000
+        stats = chain.quote_cache.stats()
+        assert (stats["hits"], stats["reverified"], stats["misses"]) == (1, 1, 2)
+        assert (stats["path_hits"], stats["path_misses"]) == (2, 1)
+        chain.refresh()
+        assert chain.quote_cache.stats()["routes"] == 0
+
+
+def _tokens(*addrs): return [Token(chain_id="8453", chain_name="Base", token_address=a, symbol=a, decimals=18, listed=True) for a in addrs]
+
+
+def test_price_cache_fetches_only_missing_tokens_and_keeps_snapshots():
+    now, fetched = [0.0], []
+    c = PriceCache(ttl=5, clock=lambda: now[0])
+    def fetch(tokens):
+        fetched.append([t.token_address for t in tokens])
+        return [int(t.token_address[2:], 16) for t in tokens]
+    a, b, x = _tokens("0x1", "0x2", "0x3")
+    first = c.get_rates([a, b], fetch)
+    assert first == [1, 2] and c.get_rates([b, x, b], fetch) == [2, 3, 2]
+    assert fetched == [["0x1", "0x2"], ["0x3"]]
+    # unchanged rates come back as the same list, even after they were re-read
+    assert c.get_rates([a, b], fetch) is first
+    now[0] += 5
+    assert c.get_rates([a, b], fetch) is first and fetched[-1] == ["0x1", "0x2"]
+    assert {k: c.stats()[k] for k in ("hits", "misses", "fetches")} == {"hits": 3, "misses": 5, "fetches": 3}
+    c.clear()
+    assert c.get_rates([a, b], fetch) is not first
+
+
+def test_price_cache_single_flight_across_threads():
+    c, fetched, started, release = PriceCache(ttl=5), [], threading.Event(), threading.Event()
+    def fetch(tokens):
+        fetched.append({t.token_address for t in tokens})
+        started.set()
+        release.wait(5)
+        return [1] * len(tokens)
+    a, b, x = _tokens("0x1", "0x2", "0x3")
+    results = {}
+    first = threading.Thread(target=lambda: results.update(first=c.get_rates([a, b], fetch)))
+    first.start()
+    started.wait(5)
+    # arrives mid-fetch: waits for a, queues x for the next round run by the first caller
+    second = threading.Thread(target=lambda: results.update(second=c.get_rates([a, x], fetch)))
+    second.start()
+    while c.stats()["joined"] < 1: pass
+    release.set()
+    first.join(5), second.join(5)
+    assert results == {"first": [1, 1], "second": [1, 1]}
+    assert fetched == [{"0x1", "0x2"}, {"0x3"}] and c.stats()["joined"] == 1
+
+
+def test_price_cache_fetch_errors_reach_every_waiter():
+    c = PriceCache(ttl=5)
+    def fetch(tokens): raise RuntimeError("oracle down")
+    try: c.get_rates(_tokens("0x1"), fetch)
+    except RuntimeError as e: assert str(e) == "oracle down"
+    else: raise AssertionError("expected the fetch error")
+    assert c.get_rates(_tokens("0x1"), lambda tokens: [7]) == [7]
+
+
+def test_async_prices_coalesce_concurrent_callers():
+    fetched = []
+    async def fetch(tokens, block=None):
+        fetched.append(sorted(t.token_address for t in tokens))
+        await asyncio.sleep(0)
+        return [10**18] * len(tokens)
+    a, b, x = _tokens("0x1", "0x2", "0x3")
+    async def main():
+        async with AsyncBaseChain() as chain:
+            chain._get_prices = fetch
+            chain.prepare_prices = lambda tokens, rates: [Price(token=t, price=r / 10**18) for t, r in zip(tokens, rates)]
+            ps = await asyncio.gather(chain.get_prices([a, b]), chain.get_prices([b, x]), chain.get_prices([a]))
+            assert [[p.price for p in prices] for prices in ps] == [[1.0, 1.0], [1.0, 1.0], [1.0]]
+            await chain.get_prices([x, a])
+            return chain.price_cache.stats()
+    stats = asyncio.run(main())
+    assert fetched == [["0x1", "0x2", "0x3"]]
+    assert (stats["fetches"], stats["misses"], stats["joined"], stats["hits"]) == (1, 3, 2, 2)
+
+
+def test_price_cache_serves_stale_rates_to_a_refresher_and_refreshes_ahead():
+    now, fetched, woken = [0.0], [], []
+    c = PriceCache(ttl=5, clock=lambda: now[0], max_stale=3, idle_after=60)
+    def fetch(tokens):
+        fetched.append([t.token_address for t in tokens])
+        return [len(fetched)] * len(tokens)
+    a, b = _tokens("0x1", "0x2")
+    assert c.get_rates([a, b], fetch) == [1, 1]
+    # expired: without a refresher the caller waits for a fresh read
+    now[0] = 5
+    assert c.get_rates([a], fetch) == [2] and c.stats()["stale"] == 0
+    # with one, a rate within `max_stale` is served and queued for it
+    c.wake = lambda: woken.append(1)
+    now[0] = 7
+    assert c.get_rates([b], fetch) == [1] and woken == [1] and fetched == [["0x1", "0x2"], ["0x1"]]
+    assert c.stats()["stale"] == 1 and c.stats()["max_age"] == 7
+    # the refresher reads what's queued plus what expires within its horizon
+    c.refresh(fetch, horizon=4)
+    assert fetched[-1] == ["0x2", "0x1"] and c.get_rates([a, b], fetch) == [3, 3]
+    # past `max_stale` callers wait again; tokens nobody asks for stop being refreshed
+    now[0] = 20
+    assert c.get_rates([a], fetch) == [4]
+    now[0] = 70
+    c.refresh(fetch, horizon=4)
+    assert fetched[-1] == ["0x1"] and c.stats()["tracked"] == 1
+
+
+def test_async_chain_refreshes_prices_in_background():
+    now, fetched = [0.0], []
+    async def fetch(tokens, block=None):
+        fetched.append(len(tokens))
+        return [len(fetched)] * len(tokens)
+    async def main():
+        async with AsyncBaseChain(pricing_cache_timeout_seconds=60, price_max_stale_seconds=30, price_refresh_interval_seconds=3600) as chain:
+            assert chain._price_refresher is not None
+            chain._get_prices, chain.price_cache.clock = fetch, lambda: now[0]
+            assert await chain._get_rates(_tokens("0x1")) == [1]
+            # an expired rate is served at once and re-read by the refresher
+            now[0] = 70
+            assert await chain._get_rates(_tokens("0x1")) == [1]
+            for _ in range(100):
+                if len(fetched) == 2: break
+                await asyncio.sleep(0)
+            assert await chain._get_rates(_tokens("0x1")) == [2]
+        assert chain._price_refresher is None and chain.price_cache.wake is None
+    asyncio.run(main())
+
+
+def test_sync_chain_refresher_thread_starts_and_stops():
+    with BaseChain() as chain:
+        calls = []
+        chain._get_prices = lambda tokens: calls.append(len(tokens)) or [1] * len(tokens)
+        chain.price_cache.ttl = 0
+        chain.price_cache.get_rates(_tokens("0x1", "0x2"), chain._get_prices)
+        chain.start_price_refresher(0.01)
+        thread = chain._price_refresher[0]
+        deadline = time.monotonic() + 5
+        while len(calls) < 2 and time.monotonic() < deadline: time.sleep(0.01)
+        assert calls[:2] == [2, 2]
+    assert not thread.is_alive() and chain.price_cache.wake is None
+
+
+def test_oracle_reads_name_their_block():
+    blocks = []
+    class Batch:
+        def __init__(self): self.requests = []
+        def __enter__(self): return self
+        def __exit__(self, *a): return None
+        def add(self, request): self.requests.append(request)
+        def execute(self): return [[1] * n for n in self.requests]
+    def rates(tokens, *a):
+        return SimpleNamespace(call=lambda block_identifier: blocks.append(block_identifier) or len(tokens))
+    with BaseChain() as chain:
+        chain.web3.batch_requests = Batch
+        chain.prices = SimpleNamespace(functions=SimpleNamespace(getManyRatesToEthWithCustomConnectors=rates))
+        with chain.at_block(123):
+            # the refresher's fetch: "latest" although another caller pinned the chain meanwhile
+            assert chain._get_prices(_tokens("0x1")) == [1]
+            assert chain._get_rates(_tokens("0x1")) == [1]
+        assert blocks == ["latest", 123]
+
+
+def test_async_disk_cache_io_runs_off_the_event_loop(tmp_path):
+    threads = []
+    async def main():
+        async with AsyncBaseChain(cache_dir=str(tmp_path)) as chain:
+            cache = chain.disk_cache
+            get, set_ = cache.get, cache.set
+            cache.get = lambda *a: threads.append(threading.get_ident()) or get(*a)
+            cache.set = lambda *a, **kw: threads.append(threading.get_ident()) or set_(*a, **kw)
+            async def pages(f):
+                yield 0, [("a", 1)]
+            chain.aiter_pages = pages
+            assert await chain.apaginate_cached("rows", None, "0x1") == [("a", 1)]
+            assert [p async for p in chain.aiter_pages_cached("rows", None, "0x1")] == [(0, [("a", 1)])]
+            return threading.get_ident()
+    loop_thread = asyncio.run(main())
+    assert len(threads) == 3 and loop_thread not in threads
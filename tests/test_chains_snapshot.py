@@ -0,0 +1,91 @@
+"""Block-pinned reads via `at_block` / `snapshot` (no network: contract calls are stubbed)."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from sugar.chains import AsyncBaseChain, BaseChain
+
+
+def _stub_sugar(chain, calls):
+    # `count().call()` echoes the block it was issued at, like a pinned eth_call would
+    def count():
+        def call():
+            calls.append(chain.web3.eth.default_block)
+            return chain.web3.eth.default_block
+        return SimpleNamespace(call=call)
+    return SimpleNamespace(functions=SimpleNamespace(count=count))
+
+
+def _stub_async_sugar(chain, calls):
+    def count():
+        async def call():
+            calls.append(chain.web3.eth.default_block)
+            return chain.web3.eth.default_block
+        return SimpleNamespace(call=call)
+    return SimpleNamespace(functions=SimpleNamespace(count=count))
+
+
+def test_at_block_pins_and_restores():
+    with BaseChain() as chain:
+        assert chain.block is None and chain.web3.eth.default_block == "latest"
+        with chain.at_block(123) as block:
+            assert block == 123 and chain.block == 123 and chain.web3.eth.default_block == 123
+            with chain.at_block(100):
+                assert chain.web3.eth.default_block == 100
+            assert chain.web3.eth.default_block == 123
+        assert chain.block is None and chain.web3.eth.default_block == "latest"
+
+
+def test_at_block_restores_on_error():
+    with BaseChain() as chain:
+        with pytest.raises(ValueError):
+            with chain.at_block(5): raise ValueError("boom")
+        assert chain.block is None and chain.web3.eth.default_block == "latest"
+
+
+def test_at_block_requires_context():
+    with pytest.raises(RuntimeError):
+        with BaseChain().at_block(1): pass
+
+
+def test_cached_getters_keyed_by_block():
+    calls = []
+    with BaseChain() as chain:
+        chain.sugar = _stub_sugar(chain, calls)
+        assert chain.get_pool_count() == "latest"
+        with chain.at_block(42):
+            assert chain.get_pool_count() == 42
+            assert chain.get_pool_count() == 42
+        with chain.at_block(43): assert chain.get_pool_count() == 43
+        assert chain.get_pool_count() == "latest"
+    assert calls == ["latest", 42, 43]
+
+
+def test_async_cached_getters_keyed_by_block():
+    calls = []
+
+    async def run():
+        async with AsyncBaseChain() as chain:
+            chain.sugar = _stub_async_sugar(chain, calls)
+            assert await chain.get_pool_count() == "latest"
+            with chain.at_block(7):
+                assert await chain.get_pool_count() == 7
+                assert await chain.get_pool_count() == 7
+            assert await chain.get_pool_count() == "latest"
+
+    asyncio.run(run())
+    assert calls == ["latest", 7]
+
+
+def test_cached_getters_are_cleared_per_instance():
+    calls_a, calls_b = [], []
+    with BaseChain() as a, BaseChain() as b:
+        a.sugar, b.sugar = _stub_sugar(a, calls_a), _stub_sugar(b, calls_b)
+        with b.at_block(42): b.get_pool_count()
+        a.get_pool_count()
+        # `refresh_pools` on one chain must not drop another's cache, pinned snapshots included
+        a.clear_block_caches(a.get_pool_count)
+        a.get_pool_count()
+        with b.at_block(42): b.get_pool_count()
+    assert calls_a == ["latest", "latest"] and calls_b == [42]
@@ -0,0 +1,121 @@
+"""Off-chain CL swap simulation (no network).
+
+Golden vectors are the TickMath/SwapMath reference values from Uniswap v3-core, which Slipstream pools inherit unchanged."""
+from decimal import Decimal, getcontext
+
+import pytest
+
+from sugar.chains import CommonChain
+from sugar.clmm import (MAX_SQRT_RATIO, MAX_TICK, MIN_SQRT_RATIO, MIN_TICK, CLPoolState, compute_swap_step, get_sqrt_ratio_at_tick,
+                        get_tick_at_sqrt_ratio, next_initialized_tick_within_one_word)
+from sugar.config import make_base_chain_settings
+
+getcontext().prec = 80
+E18, Q96 = 10 ** 18, 2 ** 96
+T0, T1 = "0x" + "0" * 39 + "a", "0x" + "0" * 39 + "b"
+
+
+def encode_price_sqrt(reserve1, reserve0): return int((Decimal(reserve1) / Decimal(reserve0)).sqrt() * Q96)
+
+
+def _pool(ticks, *, tick=0, liquidity=10 ** 21, fee=500, spacing=10):
+    s = CLPoolState(lp="0xCL", token0_address=T0, token1_address=T1, tick_spacing=spacing, fee=fee,
+                    sqrt_ratio=get_sqrt_ratio_at_tick(tick), tick=tick, liquidity=liquidity)
+    return s.with_ticks([(t, 0, net, abs(net)) for t, net in ticks])
+
+
+def _reference_out(pool, amount_in, zero_for_one):
+    # continuous piecewise-liquidity swap in high precision, ignoring bitmap word steps
+    remaining, out, L = Decimal(amount_in) * (1_000_000 - pool.fee) / 1_000_000, Decimal(0), Decimal(pool.liquidity)
+    sqrt_p, ticks = Decimal(pool.sqrt_ratio) / Q96, [t for t in pool.ticks if (t[0] <= pool.tick if zero_for_one else t[0] > pool.tick)]
+    for tick, net in (reversed(ticks) if zero_for_one else ticks):
+        edge = Decimal(get_sqrt_ratio_at_tick(tick)) / Q96
+        need = L * (1 / edge - 1 / sqrt_p) if zero_for_one else L * (edge - sqrt_p)
+        if need >= remaining: break
+        out += L * (sqrt_p - edge) if zero_for_one else L * (1 / sqrt_p - 1 / edge)
+        remaining, sqrt_p, L = remaining - need, edge, L - net if zero_for_one else L + net
+    if zero_for_one:
+        new = 1 / (1 / sqrt_p + remaining / L)
+        return out + L * (sqrt_p - new)
+    new = sqrt_p + remaining / L
+    return out + L * (1 / sqrt_p - 1 / new)
+
+
+def test_tick_math_goldens():
+    assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_RATIO
+    assert get_sqrt_ratio_at_tick(0) == Q96
+    assert get_sqrt_ratio_at_tick(50) == 79426470787362580746886972461
+    with pytest.raises(ValueError): get_sqrt_ratio_at_tick(MAX_TICK + 1)
+    assert get_tick_at_sqrt_ratio(MIN_SQRT_RATIO) == MIN_TICK and get_tick_at_sqrt_ratio(MAX_SQRT_RATIO - 1) == MAX_TICK - 1
+    for t in [-200_000, -1, 0, 1, 50, 123_456]:
+        assert get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(t)) == t
+        assert get_tick_at_sqrt_ratio(get_sqrt_ratio_at_tick(t) - 1) == t - 1
+
+
+def test_swap_step_goldens():
+    price, liquidity = encode_price_sqrt(1, 1), 2 * E18
+    capped = encode_price_sqrt(101, 100)
+    assert compute_swap_step(price, capped, liquidity, E18, 600) == (capped, 9975124224178055, 9925619580021728, 5988667735148)
+    sqrt_next, amount_in, amount_out, fee = compute_swap_step(price, encode_price_sqrt(1000, 100), liquidity, E18, 600)
+    assert (amount_in, amount_out, fee) == (999400000000000000, 666399946655997866, 600000000000000)
+    assert amount_in + fee == E18 and sqrt_next < encode_price_sqrt(1000, 100)
+    # entire input taken as fee
+    assert compute_swap_step(2413, 79887613182836312, 1985041575832132834610021537970, 10, 1872) == (2413, 0, 0, 10)
+
+
+@pytest.mark.parametrize("lte", [True, False])
+def test_next_initialized_tick_matches_sorted_search(lte):
+    ticks = [-2570, -2560, -100, -10, 0, 10, 70, 2550, 2560, 5110]
+    pool = _pool([(t, 1) for t in ticks], spacing=10)
+    for tick in range(-3000, 5200, 7):
+        nxt, initialized = next_initialized_tick_within_one_word(pool.bitmap, tick, 10, lte)
+        compressed = tick // 10
+        if lte:
+            word_start = (compressed >> 8) * 256 * 10
+            expected = max([t for t in ticks if word_start <= t <= compressed * 10], default=None)
+            assert (nxt, initialized) == ((expected, True) if expected is not None else (word_start, False))
+        else:
+            word_end = (((compressed + 1) >> 8) * 256 + 255) * 10
+            expected = min([t for t in ticks if compressed * 10 < t <= word_end], default=None)
+            assert (nxt, initialized) == ((expected, True) if expected is not None else (word_end, False))
+
+
+def test_swap_within_range_is_one_step():
+    pool = _pool([(-600, 10 ** 21), (600, -10 ** 21)])
+    _, _, out, _ = compute_swap_step(pool.sqrt_ratio, get_sqrt_ratio_at_tick(-600), pool.liquidity, 10 ** 16, pool.fee)
+    assert pool.get_amount_out(10 ** 16, T0) == out
+
+
+@pytest.mark.parametrize("zero_for_one", [True, False])
+def test_swap_across_ticks_matches_reference(zero_for_one):
+    ticks = [(-30000, 10 ** 20), (-6000, 9 * 10 ** 20), (-200, 10 ** 21), (300, -10 ** 21), (7000, -9 * 10 ** 20), (30000, -10 ** 20)]
+    pool = _pool(ticks, liquidity=2 * 10 ** 21)
+    for amount in [10 ** 15, 10 ** 19, 5 * 10 ** 19, 3 * 10 ** 20]:
+        got, ref = pool.get_amount_out(amount, T0 if zero_for_one else T1), _reference_out(pool, amount, zero_for_one)
+        assert got is not None and abs(Decimal(got) - ref) <= ref * Decimal("1e-15") + 10
+
+
+def test_window_and_unloaded():
+    pool = _pool([(-200, 10 ** 21), (200, -10 ** 21)])
+    assert pool.get_amount_out(10 ** 16, T0) is not None
+    # would need liquidity below the lowest loaded tick
+    assert pool.get_amount_out(10 ** 22, T0) is None
+    assert pool.get_amount_out(10 ** 22, T1) is None
+    assert CLPoolState(lp="0xCL", token0_address=T0, token1_address=T1, tick_spacing=10, fee=500,
+                       sqrt_ratio=Q96, tick=0, liquidity=10 ** 21).get_amount_out(10 ** 16, T0) is None
+    assert _pool([]).get_amount_out(10 ** 16, T0) is None
+
+
+def test_chain_local_states_and_tick_loading():
+    chain, t = CommonChain(make_base_chain_settings()), [0] * 32
+    t[0], t[3], t[4], t[5], t[6], t[7], t[10], t[22] = "0x" + "11" * 20, 10 ** 21, 100, 0, Q96, T0, T1, 500
+    states = chain.prepare_local_pool_states([tuple(t)], [])
+    cl = states[list(states)[0]]
+    assert isinstance(cl, CLPoolState) and cl.tick_spacing == 100 and cl.ticks is None
+    paths = [[(T0, T1, cl.lp)], [(T0, T1, "0xUnknown")]]
+    assert chain.get_unloaded_cl_states(states, paths) == [cl]
+    chain.apply_populated_ticks(states, [cl], [[(-100, 0, 10 ** 21, 10 ** 21), (100, 0, -10 ** 21, 10 ** 21)]])
+    assert states[cl.lp].ticks == ((-100, 10 ** 21), (100, -10 ** 21)) and chain.get_unloaded_cl_states(states, paths) == []
+    chain.apply_populated_ticks(states, [cl], [ValueError("boom")])
+    assert states[cl.lp].ticks == () and states[cl.lp].get_amount_out(10, T0) is None
@@ -0,0 +1,150 @@
+"""Log-driven pool refresh (no network: logs, Sugar pages and the head are stubbed)."""
+from types import SimpleNamespace
+
+import pytest
+
+from eth_abi import encode
+from hexbytes import HexBytes
+
+from sugar.chains import BaseChain
+from sugar.events import SYNC_TOPIC, CL_SWAP_TOPIC, LIQUIDITY_TOPICS, PoolSync, apply_pool_logs
+from sugar.helpers import normalize_address
+
+BASIC = normalize_address("0x" + "11" * 20)
+CL = normalize_address("0x" + "22" * 20)
+
+
+def _row(lp, type_, liquidity=0, tick=0, sqrt=0, r0=0, r1=0):
+    row = [0] * 30
+    row[0], row[3], row[4], row[5], row[6], row[8], row[11] = lp, liquidity, type_, tick, sqrt, r0, r1
+    return tuple(row)
+
+
+def _log(lp, topic, types=(), values=(), block=1, index=0):
+    return {"address": lp, "topics": [HexBytes(topic)], "data": HexBytes(encode(list(types), list(values))),
+            "blockNumber": block, "logIndex": index}
+
+
+def test_sync_and_cl_swap_patch_rows():
+    rows = [_row(BASIC, 0, r0=10, r1=20), _row(CL, 100, liquidity=5, tick=1, sqrt=7, r0=100, r1=100)]
+    index = {BASIC: 0, CL: 1}
+    logs = [
+        _log(BASIC, SYNC_TOPIC, ["uint256", "uint256"], [11, 19], block=2),
+        # applied out of order on purpose: the later Sync wins
+        _log(BASIC, SYNC_TOPIC, ["uint256", "uint256"], [12, 18], block=3),
+        _log(CL, CL_SWAP_TOPIC, ["int256", "int256", "uint160", "uint128", "int24"], [30, -20, 9, 6, -4], block=2, index=1),
+    ]
+    patched, dirty = apply_pool_logs(rows, index, list(reversed(logs)))
+    assert patched == {BASIC, CL} and dirty == set()
+    assert (rows[0][8], rows[0][11]) == (12, 18)
+    assert (rows[1][3], rows[1][5], rows[1][6], rows[1][8], rows[1][11]) == (6, -4, 9, 130, 80)
+
+
+def test_liquidity_events_and_unknown_pools():
+    rows = [_row(CL, 100)]
+    unknown = normalize_address("0x" + "33" * 20)
+    patched, dirty = apply_pool_logs(rows, {CL: 0}, [_log(CL, LIQUIDITY_TOPICS[2]), _log(unknown, SYNC_TOPIC, ["uint256", "uint256"], [1, 1])])
+    assert patched == set() and dirty == {CL}
+
+
+def test_pool_sync_pages():
+    # a failed page (returned as a value by batched reads) fails the whole read instead of dropping its pools
+    with pytest.raises(ValueError): PoolSync.from_pages(10, 2, [((0, 2), [_row(BASIC, 0, r0=1)]), ((2, 2), ValueError("boom"))])
+    sync = PoolSync.from_pages(10, 2, [((0, 2), [_row(BASIC, 0, r0=1)]), ((2, 2), [])])
+    assert sync.rows == [_row(BASIC, 0, r0=1)] and sync.pages_for({BASIC, CL}) == [(0, 2)]
+    touched = sync.apply_pages([((0, 2), [_row(BASIC, 0, r0=2), _row(CL, 100)])])
+    assert touched == {BASIC, CL} and sync.rows[0][8] == 2 and sync.index[CL] == 1
+    assert sync.new_pages(2, 5) == [] and sync.new_pages(4, 5) == [(2, 5), (7, 5), (12, 5)]
+
+
+def test_refresh_pools_reads_only_dirty_pages():
+    head, reads, log_filters = [100], [], []
+    logs = {101: [_log(BASIC, SYNC_TOPIC, ["uint256", "uint256"], [5, 6], block=101), _log(CL, LIQUIDITY_TOPICS[3], block=101)]}
+
+    def get_logs(f):
+        log_filters.append(f)
+        return [log for b in range(f["fromBlock"], f["toBlock"] + 1) for log in logs.get(b, [])]
+
+    def read_pages(pages):
+        reads.append(pages)
+        table = {(0, 10): [_row(BASIC, 0, r0=1, r1=1)], (10, 10): [_row(CL, 100, liquidity=len(reads))]}
+        return [(page, table[page]) for page in pages]
+
+    class Eth:
+        default_block = "latest"
+        block_number = property(lambda _: head[0])
+
+    with BaseChain(pool_pagination_min_size=10) as chain:
+        chain.web3 = SimpleNamespace(eth=Eth())
+        chain.web3.eth.get_logs = get_logs
+        chain.sugar = SimpleNamespace(functions=SimpleNamespace(count=lambda: SimpleNamespace(call=lambda: 1)))
+        chain._read_pool_pages = read_pages
+
+        rows = chain.refresh_pools()
+        assert chain.pool_sync.block == 100 and chain.get_raw_pools(False) is rows and len(rows) == 2
+
+        head[0] = 102
+        chain.refresh_pools()
+        # the Sync is patched in place; only the CL pool's page is re-read for its Burn
+        assert reads[-1] == [(10, 10)] and (rows[0][8], rows[0][11]) == (5, 6) and rows[1][3] == 2
+        assert [(f["fromBlock"], f["toBlock"]) for f in log_filters] == [(101, 102)]
+        assert chain.pool_sync.block == 102 and chain.web3.eth.default_block == "latest"
+
+
+@pytest.mark.parametrize("returned", [False, True])
+def test_refresh_pools_rolls_back_log_patches_when_a_page_read_fails(returned):
+    head, fail = [100], [False]
+    # the swap patches the CL pool; the burn makes the basic pool's page a re-read
+    logs = [_log(CL, CL_SWAP_TOPIC, ["int256", "int256", "uint160", "uint128", "int24"], [30, -20, 9, 6, -4], block=101),
+            _log(BASIC, LIQUIDITY_TOPICS[1], block=101, index=1)]
+
+    def read_pages(pages):
+        if fail[0] and not returned: raise ValueError("page read failed")
+        table = {(0, 10): [_row(BASIC, 0)], (10, 10): [_row(CL, 100, r0=100, r1=100)]}
+        # batched reads hand a failed call back as an Exception value
+        return [(page, ValueError("page read failed") if fail[0] else table[page]) for page in pages]
+
+    class Eth:
+        default_block = "latest"
+        block_number = property(lambda _: head[0])
+
+    with BaseChain(pool_pagination_min_size=10) as chain:
+        chain.web3 = SimpleNamespace(eth=Eth())
+        chain.web3.eth.get_logs = lambda f: logs
+        chain.sugar = SimpleNamespace(functions=SimpleNamespace(count=lambda: SimpleNamespace(call=lambda: 1)))
+        chain._read_pool_pages = read_pages
+        rows = chain.refresh_pools()
+
+        head[0], fail[0] = 101, True
+        with pytest.raises(ValueError): chain.refresh_pools()
+        # not synced past 100, so the swap is rolled back and the retry replays it once
+        assert chain.pool_sync.block == 100 and (rows[1][8], rows[1][11]) == (100, 100)
+        fail[0] = False
+        chain.refresh_pools()
+        assert chain.pool_sync.block == 101 and (rows[1][8], rows[1][11]) == (130, 80)
+
+
+def test_read_pool_pages_splits_failing_pages_and_groups_them_back():
+    log = []
+    class Batch:
+        # pages over 5 rows fail the way an oversized eth_call does
+        def __init__(self): self.requests = []
+        def __enter__(self): return self
+        def __exit__(self, *a): return None
+        def add(self, request): self.requests.append(request)
+        def execute(self):
+            log.append(list(self.requests))
+            return [ValueError("out of gas") if limit > 5 else [_row(normalize_address(f"0x{i:040x}"), 0) for i in range(offset, min(offset + limit, 12))]
+                    for limit, offset, _ in self.requests]
+
+    with BaseChain(rpc_uri="http://read-pool-pages", pool_pagination_min_size=2) as chain:
+        chain.web3 = SimpleNamespace(batch_requests=Batch)
+        chain.sugar = SimpleNamespace(functions=SimpleNamespace(all=lambda limit, offset, _: (limit, offset, _)))
+        chain.page_sizer.batch_size = 1
+        results = chain._read_pool_pages([(10, 10), (0, 10)])
+    # one page per batch, per the sizer; the 10-row pages were split and their rows kept under the page asked for
+    assert sorted(batch for batch in log if len(batch) == 1) == [[(10, 0, 0)], [(10, 10, 0)]]
+    assert [(5, 0, 0), (5, 5, 0)] in log and [(5, 10, 0), (5, 15, 0)] in log
+    assert [(page, len(rows)) for page, rows in results] == [((0, 10), 10), ((10, 10), 2)]
+    sync = PoolSync.from_pages(1, 12, results)
+    assert sync.pages_for({normalize_address(f"0x{7:040x}"), normalize_address(f"0x{11:040x}")}) == [(0, 10), (10, 10)]
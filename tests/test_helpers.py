@@ -4,9 +4,11 @@ from sugar.helpers import (
     ADDRESS_ZERO,
     ICACallData,
     MAX_ABS_TICK,
+    address_key,
     apply_slippage,
     hash_ICA_calls,
     nearest_tick,
+    normalize_address,
     parse_ether,
     price_to_tick,
     sqrt_ratio_x96_from_price,
@@ -50,6 +52,23 @@ def test_to_bytes32():
     assert to_bytes32_str("0x1217bfe6c773eec6cc4a38b5dc45b92292b6e189") == "0x0000000000000000000000001217bfe6c773eec6cc4a38b5dc45b92292b6e189"
 
 
+def test_normalize_address_is_memoized_and_interned():
+    velo = "0x9560e827aF36c94D2Ac33a39bCE1Fe78631088Db"
+    assert normalize_address(velo.lower()) == velo
+    # same address from two differently-cased inputs (and freshly built strings) is one object
+    assert normalize_address(velo.upper().replace("0X", "0x")) is normalize_address("".join(velo.lower()))
+    hits = normalize_address.cache_info().hits
+    normalize_address(velo.lower())
+    assert normalize_address.cache_info().hits == hits + 1
+    with pytest.raises(ValueError): normalize_address("0x1234")
+
+
+def test_address_key():
+    velo = "0x9560e827aF36c94D2Ac33a39bCE1Fe78631088Db"
+    assert address_key(velo) == address_key(velo.lower()) == bytes.fromhex(velo[2:]) and len(address_key(velo)) == 20
+    assert address_key(ADDRESS_ZERO) == bytes(20)
+
+
 def test_parse_ether():
     assert parse_ether("1") == 1000000000000000000
     assert parse_ether("0.5") == 500000000000000000
@@ -0,0 +1,64 @@
+"""Token / pool lookup indexes and the chain lookups built on them (no network: reads are stubbed)."""
+from sugar.chains import BaseChain
+from sugar.helpers import normalize_address
+from sugar.index import PoolIndex, TokenIndex
+from sugar.pool import Price
+from sugar.token import Token
+
+A, B, C, WETH = (normalize_address("0x" + c * 40) for c in "abc4")
+ETH = Token.make_native_token("ETH", WETH, 18, "8453", "Base")
+TOKENS = [ETH, Token("8453", "Base", A, "USDC", 6, True), Token("8453", "Base", B, "VELO", 18, True),
+          Token("8453", "Base", C, "usdc", 6, False), Token("8453", "Base", WETH, "WETH", 18, True)]
+
+
+def _row(lp, t0, t1):
+    row = [0] * 32
+    row[0], row[4], row[7], row[10], row[13], row[18], row[20], row[29], row[30] = lp, -1, t0, t1, lp, lp, t0, lp, lp
+    return tuple(row)
+
+
+LPS = [normalize_address("0x" + f"{i:02x}" * 20) for i in range(1, 4)]
+ROWS = [_row(LPS[0], A, B), _row(LPS[1], B, A), _row(LPS[2], A, C)]
+
+
+def test_token_index_matches_linear_lookups():
+    index = TokenIndex(TOKENS)
+    assert index.find(A.lower()) is TOKENS[1] and index.find(int(B, 16)) is TOKENS[2]
+    # symbols are case-insensitive and the first token listed wins
+    assert index.find("USDC") is index.find("usdc") is TOKENS[1]
+    assert index.find("eth") is ETH and index.find_by_wrapped_address(WETH.lower()) is ETH
+    assert index.find(WETH) is TOKENS[4]
+    assert index.find("nope") is None and index.find("") is None and index.find(None) is None
+
+
+def test_pool_index_by_lp_and_pair():
+    rows = list(ROWS)
+    index = PoolIndex(rows)
+    assert index.find(LPS[1].lower()) == ROWS[1] and index.find("0x" + "ff" * 20) is None
+    assert index.find_by_pair(B, A) == ROWS[:2] and index.find_by_pair(C, A) == [ROWS[2]] and index.find_by_pair(B, C) == []
+    # rows patched in place are read through
+    rows[0] = _row(LPS[0], A, B)[:8] + (5,) + _row(LPS[0], A, B)[9:]
+    assert index.find(LPS[0])[8] == 5
+
+
+def test_chain_lookups_use_cached_indexes():
+    calls = {"tokens": 0, "pools": 0}
+
+    def get_all_tokens(listed_only=False):
+        calls["tokens"] += 1
+        return TOKENS
+
+    def get_raw_pools(for_swaps):
+        calls["pools"] += 1
+        return ROWS
+
+    with BaseChain() as chain:
+        chain.get_all_tokens, chain._get_raw_pools = get_all_tokens, get_raw_pools
+        chain.get_prices = lambda tokens: [Price(token=t, price=1.0) for t in tokens]
+        assert chain.get_token("VELO") is TOKENS[2] and chain.get_token(A) is TOKENS[1] and chain.get_token("nope") is None
+        assert chain.get_pool_by_address(LPS[2].lower()).lp == LPS[2] and chain.get_pool_by_address(WETH) is None
+        assert [p.lp for p in chain.get_pools_by_pair(TOKENS[2], TOKENS[1])] == LPS[:2]
+        assert calls["pools"] == 1
+        chain.clear_block_caches(chain.get_pool_index)
+        chain.get_pool_by_address(LPS[0])
+        assert calls["pools"] == 2
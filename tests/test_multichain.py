@@ -0,0 +1,63 @@
+"""Multi-chain fan-out (no network: per-chain reads are stubbed)."""
+import asyncio
+import time
+
+import pytest
+
+from sugar.chains import get_async_chain, get_chain
+from sugar.multichain import SUPPORTED_CHAIN_IDS, AsyncMultiChain
+
+
+def test_supported_chains_build():
+    m = AsyncMultiChain()
+    assert list(m.chains) == SUPPORTED_CHAIN_IDS and m["8453"].chain_id == "8453"
+    # the fan-out list and the chain factories share one mapping
+    assert all(get_chain(cid).chain_id == get_async_chain(cid).chain_id == cid for cid in SUPPORTED_CHAIN_IDS)
+    with pytest.raises(ValueError): get_chain("1")
+
+
+def test_fan_out_is_concurrent_and_keeps_partial_results():
+    async def run():
+        async with AsyncMultiChain(["10", "8453", "1135"], timeout=1) as chains:
+            async def pools(tag, delay):
+                await asyncio.sleep(delay)
+                return [tag, tag]
+            async def broken(): raise RuntimeError("rpc down")
+            async def hangs(): await asyncio.sleep(5)
+            chains["10"].get_pools = lambda for_swaps=False: pools("op", 0.2)
+            chains["8453"].get_pools = lambda for_swaps=False: pools("base", 0.2)
+            chains["1135"].get_pools = lambda for_swaps=False: broken()
+            start = time.perf_counter()
+            r = await chains.get_pools()
+            took = time.perf_counter() - start
+            chains["1135"].get_pools = lambda for_swaps=False: hangs()
+            timed_out = await chains.get_pools()
+        return r, took, timed_out
+
+    r, took, timed_out = asyncio.run(run())
+    assert took < 0.35
+    assert r.items == ["op", "op", "base", "base"] and list(r.by_chain) == ["10", "8453"]
+    assert list(r.errors) == ["1135"] and str(r.errors["1135"]) == "rpc down"
+    assert isinstance(timed_out.errors["1135"], asyncio.TimeoutError) and len(timed_out) == 4
+
+
+def test_per_chain_concurrency_cap():
+    running, peak = [0], [0]
+
+    async def run():
+        async with AsyncMultiChain(["10"], max_concurrency=2) as chains:
+            async def tokens(listed_only=False):
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+                await asyncio.sleep(0.05)
+                running[0] -= 1
+                return []
+            chains["10"].get_all_tokens = tokens
+            await asyncio.gather(*[chains.get_all_tokens() for _ in range(5)])
+
+    asyncio.run(run())
+    assert peak[0] == 2
+
+
+def test_requires_context():
+    with pytest.raises(RuntimeError): asyncio.run(AsyncMultiChain(["10"]).get_pools())
@@ -0,0 +1,173 @@
+"""Adaptive Sugar page sizing (no network: JSON-RPC batches are stubbed)."""
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from sugar.cache import DiskCache
+from sugar.chains import AsyncBaseChain, BaseChain
+from sugar.pagination import PageSizer
+
+
+def _sizer(**kw): return PageSizer("http://rpc", kw.pop("min_size", 10), kw.pop("max_size", 400), kw.pop("target_latency", 1.0), **kw)
+
+
+def test_fast_batches_grow_slow_ones_shrink():
+    s = _sizer()
+    s.observe([(0, 100), (100, 100)], 0.1)
+    assert (s.page_size, s.batch_size) == (125, 6)
+    s.observe([(0, 125)], 2.0)
+    assert (s.page_size, s.batch_size) == (93, 6)
+    s.observe([(0, 93)], 0.8)  # within target: unchanged
+    assert s.page_size == 93
+
+
+def test_sizes_stay_within_bounds():
+    s = _sizer(max_size=110)
+    for _ in range(5): s.observe([(0, 100)], 0.0)
+    assert s.page_size == 110 and s.batch_size == 10
+    for _ in range(10): s.observe([(0, s.page_size)], 5.0)
+    assert s.page_size == 10
+
+
+def test_failures_split():
+    s = _sizer()
+    assert s.page_failed(100) == [50, 50] and s.page_size == 50
+    assert s.page_failed(1) == []
+    s.batch_failed(6)
+    assert s.batch_size == 3
+
+
+def test_static_when_disabled():
+    s = _sizer(target_latency=0)
+    s.observe([(0, 100)], 0.0)
+    assert s.page_failed(9) == [4, 5]
+    assert s.page_size is None and s.batch_size == 5
+
+
+def test_learned_sizes_persist_per_rpc(tmp_path):
+    store = DiskCache(os.path.join(tmp_path, "c.sqlite3"), 60, 1 << 20)
+    _sizer(store=store).observe([(0, 100)], 0.0)
+    assert store.get("pagination:http://rpc:10:400:1.0") == {"page_size": 125, "batch_size": 6}
+    settings = SimpleNamespace(rpc_uri="http://persisted", pool_pagination_min_size=10, pool_pagination_max_size=400,
+                               pool_pagination_target_latency_ms=1000)
+    store.set("pagination:http://persisted:10:400:1.0", {"page_size": 77, "batch_size": 3}, pinned=True)
+    s = PageSizer.for_settings(settings, store)
+    assert (s.page_size, s.batch_size) == (77, 3) and PageSizer.for_settings(settings) is s
+    # other sizing settings on the same endpoint get their own sizer instead of the first one's
+    other = PageSizer.for_settings(SimpleNamespace(**{**vars(settings), "pool_pagination_target_latency_ms": 0}), store)
+    assert other is not s and not other.adaptive and other.page_size is None
+
+
+class _Batch:
+    # rejects pages over `max_rows` the way a provider rejects oversized responses
+    def __init__(self, log, max_rows): self.log, self.max_rows, self.requests = log, max_rows, []
+    def __enter__(self): return self
+    def __exit__(self, *a): return None
+    async def __aenter__(self): return self
+    async def __aexit__(self, *a): return None
+    def add(self, request): self.requests.append(request)
+    def execute(self):
+        self.log.append(list(self.requests))
+        return [ValueError("response too large") if limit > self.max_rows else list(range(offset, min(offset + limit, 25)))
+                for limit, offset in self.requests]
+    async def async_execute(self): return self.execute()
+
+
+def _stub(chain, log, max_rows):
+    chain.web3 = SimpleNamespace(batch_requests=lambda: _Batch(log, max_rows), provider=SimpleNamespace(disconnect=lambda: asyncio.sleep(0)))
+    chain.get_pool_count = lambda: 25
+
+
+def test_paginate_splits_failing_pages():
+    log = []
+    with BaseChain(rpc_uri="http://split-sync", pool_pagination_min_size=20, pool_pagination_target_latency_ms=1000) as chain:
+        _stub(chain, log, max_rows=10)
+        rows = chain.paginate(lambda limit, offset: (limit, offset))
+        assert sorted(rows) == list(range(25))
+        assert chain.page_sizer.page_size == 20  # halved, but clamped to the configured minimum
+        assert [(10, 0), (10, 10)] in log
+
+
+def test_apaginate_splits_failing_pages():
+    log = []
+
+    async def run():
+        async with AsyncBaseChain(rpc_uri="http://split-async", pool_pagination_min_size=20) as chain:
+            _stub(chain, log, max_rows=10)
+            chain.get_pool_count = lambda: asyncio.sleep(0, 25)
+            return await chain.apaginate(lambda limit, offset: (limit, offset))
+
+    assert asyncio.run(run()) == list(range(25))
+
+
+def test_failed_pages_raise_and_stay_out_of_the_disk_cache(tmp_path):
+    log = []
+    with BaseChain(rpc_uri="http://split-fail", pool_pagination_min_size=20, cache_dir=str(tmp_path)) as chain:
+        _stub(chain, log, max_rows=0)
+        chain.web3.eth = SimpleNamespace(default_block="latest")
+        with chain.at_block(7):
+            with pytest.raises(ValueError): chain.paginate_cached("rows", lambda limit, offset: (limit, offset), "0x1")
+            with pytest.raises(ValueError): list(chain.iter_pages_cached("rows", lambda limit, offset: (limit, offset), "0x1"))
+            # a pinned entry never expires: a truncated read stored here would be served for good
+            assert chain.disk_cache.get(DiskCache.make_key(chain.chain_id, "0x1", 7, "rows")) is None
+
+
+def test_iter_pages_stream_and_list_apis_keep_offset_order():
+    log = []
+    with BaseChain(rpc_uri="http://stream-sync", pool_pagination_min_size=5, pool_pagination_max_size=5) as chain:
+        _stub(chain, log, max_rows=100)
+        chain.page_sizer.page_size, chain.page_sizer.batch_size = 5, 1
+        pages = list(chain.iter_pages(lambda limit, offset: (limit, offset)))
+        # the paginator reads past the count; those pages are empty
+        assert sorted(offset for offset, rows in pages if rows) == [0, 5, 10, 15, 20]
+        assert all(rows == list(range(offset, min(offset + 5, 25))) for offset, rows in pages)
+        assert chain.paginate(lambda limit, offset: (limit, offset)) == list(range(25))
+
+
+def test_iter_tokens_native_first_then_pages(tmp_path):
+    raw = ("0x940181a94A35A4569E4529A3CDfB74e38FD98631", "AERO", 18, 0, True, False)
+
+    class TokenBatch(_Batch):
+        def execute(self):
+            self.log.append(list(self.requests))
+            return [[raw] if offset == 0 else [] for _, offset in self.requests]
+
+    async def run():
+        async with AsyncBaseChain(rpc_uri="http://stream-tokens", cache_dir=str(tmp_path)) as chain:
+            log = []
+            chain.web3 = SimpleNamespace(batch_requests=lambda: TokenBatch(log, 100))
+            chain.get_pool_count = lambda: asyncio.sleep(0, 25)
+            chain.sugar = SimpleNamespace(functions=SimpleNamespace(tokens=lambda limit, offset, *a: (limit, offset)))
+            streamed = [page async for page in chain.iter_tokens()]
+            batches = len(log)
+            # fully consumed: the pages were stored, so the next stream is a single cached page
+            cached = [page async for page in chain.iter_tokens()]
+            return streamed, cached, batches, len(log)
+
+    streamed, cached, batches, after = asyncio.run(run())
+    assert streamed[0][0].symbol == "ETH" and [t.symbol for page in streamed[1:] for t in page] == ["AERO"]
+    assert len(cached) == 2 and cached[1][0].symbol == "AERO" and after == batches
+
+
+def test_aiter_pages_early_exit_cancels_pending_batches():
+    log = []
+
+    class SlowBatch(_Batch):
+        async def async_execute(self):
+            if self.requests[0][1] > 0: await asyncio.sleep(10)
+            return self.execute()
+
+    async def run():
+        async with AsyncBaseChain(rpc_uri="http://stream-cancel", pool_pagination_min_size=5) as chain:
+            chain.web3 = SimpleNamespace(batch_requests=lambda: SlowBatch(log, 100))
+            chain.page_sizer.page_size, chain.page_sizer.batch_size = 5, 1
+            chain.get_pool_count = lambda: asyncio.sleep(0, 25)
+            pages = chain.aiter_pages(lambda limit, offset: (limit, offset))
+            async for _ in pages: break
+            await pages.aclose()
+            await asyncio.sleep(0)
+            return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    assert asyncio.run(run()) == []
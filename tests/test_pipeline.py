@@ -0,0 +1,108 @@
+"""Pipelined quoter batches and their adaptive sizing (no network: batches are stubbed)."""
+import threading
+import time
+
+import pytest
+
+from sugar.chains import BaseChain
+from sugar.config import make_base_chain_settings
+from sugar.pipeline import QuoteBatchSizer, run_pipelined
+from sugar.pool import LiquidityPoolForSwap
+from sugar.quote import Quote
+from sugar.token import Token
+
+
+def _sizer(batch_size=10, concurrency=2, target=0.0): return QuoteBatchSizer("test", target, batch_size, concurrency)
+
+
+def test_run_pipelined_keeps_order_and_consumes_lazily():
+    produced = []
+    def items():
+        for i in range(25):
+            produced.append(i)
+            yield i
+    prepared = []
+    def prepare(batch):
+        # batches are prepared while the items after them haven't been produced yet
+        prepared.append((list(batch), len(produced)))
+        return batch
+    results, errors = run_pipelined(items(), prepare, lambda batch: [i * 2 for i in batch], _sizer(batch_size=10, concurrency=1))
+    assert sorted(results) == [i * 2 for i in range(25)] and errors == []
+    assert [len(b) for b, _ in prepared] == [10, 10, 5]
+    assert [n for _, n in prepared][:2] == [10, 20]
+
+
+def test_run_pipelined_caps_batches_in_flight():
+    lock, running, peak = threading.Lock(), [0], [0]
+    def execute(batch):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.01)
+        with lock: running[0] -= 1
+        return batch
+    results, _ = run_pipelined(range(100), lambda b: b, execute, _sizer(batch_size=5, concurrency=3))
+    assert sorted(results) == list(range(100)) and 1 < peak[0] <= 3
+
+
+def test_run_pipelined_retries_failed_batch_in_halves():
+    seen = []
+    def execute(batch):
+        seen.append(list(batch))
+        if 3 in batch: raise ValueError("bad call")
+        return batch
+    results, errors = run_pipelined(range(8), lambda b: b, execute, _sizer(batch_size=8, concurrency=1))
+    # the half holding the bad call fails again and is reported, the other half goes through
+    assert sorted(results) == [4, 5, 6, 7]
+    assert [e.size for e in errors] == [4] and isinstance(errors[0].error, ValueError)
+    assert sorted(map(len, seen)) == [4, 4, 8]
+
+
+def test_sizer_grows_when_fast_and_shrinks_when_slow():
+    s = _sizer(batch_size=100, concurrency=4, target=1.0)
+    s.concurrency = 2
+    s.observe(100, 0.1)
+    assert (s.batch_size, s.concurrency) == (125, 3)
+    s.observe(125, 0.8)
+    assert (s.batch_size, s.concurrency) == (125, 3)
+    s.observe(125, 2.0)
+    assert (s.batch_size, s.concurrency) == (93, 2)
+    s.batch_failed(93)
+    assert s.batch_size == 46
+    for _ in range(20): s.observe(s.batch_size, 5.0)
+    assert (s.batch_size, s.concurrency) == (s.min_batch_size, 1)
+    fixed = _sizer(batch_size=100, target=0.0)
+    fixed.observe(100, 0.0), fixed.batch_failed(100)
+    assert fixed.batch_size == 100
+
+
+def test_sizer_is_shared_per_rpc_uri():
+    settings = make_base_chain_settings(rpc_uri="http://sizer.test", quote_batch_size=321)
+    assert QuoteBatchSizer.for_settings(settings).batch_size == 321
+    assert QuoteBatchSizer.for_settings(settings) is QuoteBatchSizer.for_settings(settings)
+
+
+def _pools_and_tokens():
+    settings = make_base_chain_settings()
+    a, b = settings.connector_tokens_addrs[:2]
+    def _t(addr): return Token(chain_id="8453", chain_name="Base", token_address=addr, symbol=addr[:6], decimals=18, listed=True)
+    pools = [LiquidityPoolForSwap(chain_id="8453", chain_name="Base", lp=f"0x{i:040x}", type=0, token0_address=a, token1_address=b, factory="0xF")
+             for i in range(1, 5)]
+    return pools, _t(a), _t(b)
+
+
+def test_get_quote_keeps_partial_results_and_raises_when_all_batches_fail():
+    pools, a, b = _pools_and_tokens()
+    with BaseChain() as chain:
+        chain.get_pools_for_swaps = lambda: pools
+        chain.quote_sizer = _sizer(batch_size=2, concurrency=2)
+        def flaky(batch, inputs):
+            if any(p.lp == pools[0].lp for q in inputs for p, _ in q.path): raise ValueError("bad call")
+            return [Quote(input=q, amount_out=q.amount_in * int(q.path[0][0].lp, 16)) for q in inputs]
+        chain._execute_quote_batch = flaky
+        assert chain.get_quote(a, b, 10).amount_out == 40
+        assert [e.size for e in chain.quote_errors] == [1]
+        def broken(batch, inputs): raise ValueError("rpc down")
+        chain._execute_quote_batch = broken
+        with pytest.raises(RuntimeError, match="quoter batches failed"): chain.get_quote(a, b, 10)
+        assert chain.quote_errors
@@ -0,0 +1,71 @@
+"""Columnar pool table vs the per-pool `LiquidityPool` math."""
+import math
+
+import numpy as np
+import pytest
+
+from sugar.helpers import normalize_address
+from sugar.pool import LiquidityPool, Price
+from sugar.pool_table import PoolTable
+from sugar.token import Token
+
+A, B, C, UNKNOWN = (normalize_address("0x" + c * 40) for c in "abcd")
+TOKENS = [Token("10", "OP", A, "A", 18, True), Token("10", "OP", B, "B", 6, True), Token("10", "OP", C, "C", 8, True)]
+PRICES = [Price(token=TOKENS[0], price=2.5), Price(token=TOKENS[1], price=1.0)]
+
+
+def _row(lp, type_, t0, t1, r0, r1, fees=(0, 0), fee=30, supply=10**18, gauge_supply=5 * 10**17, emissions=0, emissions_token=A):
+    row = [0] * 32
+    row[0], row[3], row[4], row[7], row[8], row[10], row[11] = lp, supply, type_, t0, r0, t1, r1
+    row[13], row[14], row[15], row[18], row[19], row[20], row[22] = lp, gauge_supply, True, lp, emissions, emissions_token, fee
+    row[24], row[25], row[29], row[30] = fees[0], fees[1], lp, lp
+    return tuple(row)
+
+
+ROWS = [
+    _row(normalize_address("0x" + "01" * 20), -1, A, B, 3 * 10**18, 7 * 10**6, fees=(10**16, 2 * 10**4), emissions=10**15),
+    _row(normalize_address("0x" + "02" * 20), 100, B, C, 5 * 10**6, 10**8, fee=500, gauge_supply=0),
+    _row(normalize_address("0x" + "03" * 20), 0, A, UNKNOWN, 1, 1),
+    _row(normalize_address("0x" + "04" * 20), 0, A, B, 10**18, 10**6, fee=0, supply=0, emissions_token=UNKNOWN),
+]
+
+
+@pytest.fixture
+def table(): return PoolTable.from_tuples(ROWS, TOKENS, PRICES, "10", "OP")
+
+
+def _pools():
+    tokens, prices = {t.token_address: t for t in TOKENS}, {p.token.token_address: p for p in PRICES}
+    return [p for p in (LiquidityPool.from_tuple(r, tokens, prices, "10", "OP") for r in ROWS) if p is not None]
+
+
+def test_unknown_tokens_dropped(table):
+    assert len(table) == 3 and [p.lp for p in table] == [p.lp for p in _pools()]
+
+
+def test_metrics_match_liquidity_pool(table):
+    pools = _pools()
+    assert table.tvl[0] == pytest.approx(pools[0].tvl) and table.apr[0] == pytest.approx(pools[0].apr)
+    assert table.total_fees[0] == pytest.approx(pools[0].total_fees) and table.volume[0] == pytest.approx(pools[0].volume)
+    # C isn't priced: the object's reserve Amount is None, the table says NaN
+    assert pools[1].reserve1 is None and math.isnan(table.tvl[1])
+    assert math.isnan(table.apr[1]) and table.apr[2] == pools[2].apr == 0
+    # no pool fee: volume is undefined
+    assert math.isnan(table.volume[2])
+
+
+def test_filters_and_lookup(table):
+    sub = table.where(table.token_mask([B.lower()]) & (table.type < 0))
+    assert len(sub) == 1 and sub[0].lp == ROWS[0][0] and sub.tvl[0] == pytest.approx(table.tvl[0])
+    assert table.token_mask([A, B]).tolist() == [True, False, True]
+    assert table.token_mask([UNKNOWN]).tolist() == [False, False, False]
+    assert table.index_of(ROWS[1][0]) == 1 and table.index_of(ROWS[2][0]) is None
+    assert table.lp.dtype == np.dtype("S20") and table.to_dict()["tvl"] is table.tvl
+
+
+def test_tvl_by_lp_counts_priced_sides(table):
+    tvl = table.tvl_by_lp()
+    assert list(tvl) == [r[0] for r in ROWS[:2] + ROWS[3:]]
+    assert tvl[ROWS[0][0]] == pytest.approx(table.tvl[0])
+    # C is unpriced: only the B side counts
+    assert tvl[ROWS[1][0]] == pytest.approx(5.0)
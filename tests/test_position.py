@@ -43,3 +43,98 @@ def test_position_from_tuple():
     unknown_lp = normalize_address("0x9999999999999999999999999999999999999999")
     t_unknown = (1, unknown_lp, 100, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, ADDRESS_ZERO, 0, ADDRESS_ZERO)
     assert Position.from_tuple(t_unknown, pools, "10", "Optimism") is None
+
+
+def _row(lp, kind, token0, token1, gauge=ADDRESS_ZERO, nfpm=ADDRESS_ZERO, alm=ADDRESS_ZERO):
+    row = [0] * 32
+    row[0], row[4], row[7], row[10], row[13], row[29], row[30] = lp, kind, token0, token1, gauge, nfpm, alm
+    row[1], row[16], row[17], row[18], row[20], row[31] = "P", ADDRESS_ZERO, ADDRESS_ZERO, ADDRESS_ZERO, token0, ADDRESS_ZERO
+    return tuple(row)
+
+
+def _addr(n): return normalize_address(f"0x{n:040x}")
+
+
+def _wallet_positions(rpc_uri, extra_pools=0, max_rows=None, **settings):
+    """`get_wallet_positions` over five pools (and `extra_pools` more past them) with every read stubbed:
+    returns the positions, the `(offset, limit)` position pages read and the tokens priced."""
+    from sugar.chains import BaseChain
+    from sugar.pool import Price
+    from sugar.token import Token
+
+    owner, nfpm = _addr(0xABC), _addr(0xF00)
+    tokens = [Token(chain_id="8453", chain_name="Base", token_address=_addr(t), symbol=str(t), decimals=18, listed=True) for t in range(1, 9)]
+    t = [tk.token_address for tk in tokens]
+    rows = [_row(_addr(100), 0, t[0], t[1]),                          # held through the LP token
+            _row(_addr(101), -1, t[2], t[3], gauge=_addr(201)),         # nothing held
+            _row(_addr(102), 100, t[4], t[5], nfpm=nfpm),              # unstaked NFT
+            _row(_addr(103), 200, t[4], t[5], gauge=_addr(203), nfpm=nfpm),  # staked NFT (counted by its gauge)
+            _row(_addr(104), 100, t[6], t[7], nfpm=nfpm)]              # nothing held
+    held, pages, priced = {_addr(100), _addr(203)}, [], []
+
+    def batch_call(items, make):
+        out = []
+        for item in items:
+            if isinstance(item, dict):
+                assert item["data"][-20:] == bytes.fromhex(owner[2:])
+                out.append(int(item["to"] in held).to_bytes(32, "big"))
+                continue
+            f = make(item)
+            if f.fn_name == "balanceOf": out.append(1)
+            elif f.fn_name == "tokenOfOwnerByIndex": out.append(7)
+            else:
+                assert f.address == nfpm
+                out.append((0, ADDRESS_ZERO, t[5], t[4], 100, -10, 10, 1, 0, 0, 0, 0))
+        return out
+
+    class PositionsBatch:
+        # `Sugar.positions` pages; pages over `max_rows` fail the way an oversized eth_call does
+        def __init__(self): self.requests = []
+        def __enter__(self): return self
+        def __exit__(self, *a): return None
+        def add(self, request): self.requests.append(request)
+        def execute(self):
+            out = []
+            for f in self.requests:
+                limit, offset, account = f.args
+                assert account == owner
+                pages.append((offset, limit))
+                if max_rows and limit > max_rows:
+                    out.append(ValueError("out of gas"))
+                    continue
+                out.append([(7 if rows[i][4] > 0 else 0, rows[i][0], 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, ADDRESS_ZERO, 0, ADDRESS_ZERO)
+                            for i in range(offset, min(offset + limit, len(rows))) if i in (0, 2, 3)])
+            return out
+
+    with BaseChain(rpc_uri=rpc_uri, **settings) as chain:
+        chain._batch_call = batch_call
+        chain.web3.batch_requests = PositionsBatch
+        chain._get_raw_pools = lambda for_swaps: rows
+        chain.get_pool_count = lambda: len(rows) + extra_pools
+        chain.get_all_tokens = lambda listed_only=False: tokens
+        chain._get_prices = lambda ts: priced.extend(x.token_address for x in ts) or [10**18] * len(ts)
+        chain.prepare_prices = lambda ts, rates: [Price(token=x, price=1.0) for x in ts]
+        chain.get_pools = None
+        positions = chain.get_wallet_positions(owner)
+    return chain, positions, pages, priced, t
+
+
+def test_wallet_positions_read_only_the_wallets_pools():
+    chain, positions, pages, priced, t = _wallet_positions("http://wallet-positions")
+    assert [p.pool.lp for p in positions] == [_addr(100), _addr(102), _addr(103)]
+    assert sorted(pages) == [(0, 1), (2, 2)]
+    assert set(priced) == {t[0], t[1], t[4], t[5]}
+    # windows grow by the slack and merge when they touch
+    assert chain.get_position_windows([5, 2, 3, 9], 1) == [(2, 5), (9, 2)]
+
+
+def test_wallet_positions_page_wide_windows():
+    # 1000 pools Sugar.all didn't return: the windows widen to ~1000 positions but are read in pages
+    chain, positions, pages, _, _ = _wallet_positions("http://wallet-positions-slack", extra_pools=1000, max_rows=50,
+                                                      pool_pagination_min_size=50, pool_pagination_max_size=100, pool_pagination_target_calls=1)
+    assert [p.pool.lp for p in positions] == [_addr(100), _addr(102), _addr(103)]
+    assert max(limit for _, limit in pages) == 100
+    read = sorted((offset, limit) for offset, limit in pages if limit <= 50)
+    # the oversized pages were split in halves and every position between them read exactly once
+    assert read[0][0] == 0 and sum(limit for _, limit in read) == 1004
+    assert all(a + la == b for (a, la), (b, _) in zip(read, read[1:]))
@@ -0,0 +1,48 @@
+"""Batch price normalization in `prepare_prices` / `prepare_price_array` (no network)."""
+import random
+
+import numpy as np
+
+from sugar.chains import CommonChain
+from sugar.config import make_base_chain_settings
+from sugar.price import normalize_rates, rate_scale
+from sugar.token import Token
+
+
+def _chain(): return CommonChain(make_base_chain_settings())
+
+
+def _tokens(chain, decimals):
+    s = chain.settings
+    native = Token.make_native_token(s.native_token_symbol, s.wrapped_native_token_addr, s.native_token_decimals, chain_id="8453", chain_name="Base")
+    stable = Token(chain_id="8453", chain_name="Base", token_address=s.stable_token_addr, symbol="USDC", decimals=6, listed=True)
+    return [native, stable] + [Token(chain_id="8453", chain_name="Base", token_address=f"0x{i:040x}", symbol=str(i), decimals=d, listed=True)
+                               for i, d in enumerate(decimals, start=1)]
+
+
+def _reference_prices(chain, tokens, rates):
+    # the per-token loop `prepare_prices` used to run
+    ed, norm = chain.settings.native_token_decimals, {}
+    for t, rate in zip(tokens, rates):
+        if t.decimals == ed: nr = rate
+        elif t.decimals < ed: nr = rate // (10 ** (ed - t.decimals))
+        else: nr = rate * (10 ** (t.decimals - ed))
+        norm[t.token_address] = nr
+    eth_usd = (norm[chain.settings.native_token_symbol] * 10 ** ed) // norm[chain.settings.stable_token_addr]
+    return [(norm[t.token_address] * eth_usd // 10 ** ed) / 10 ** ed for t in tokens]
+
+
+def test_rate_scale_and_normalize():
+    assert rate_scale(18, 18) == (1, 1) and rate_scale(6, 18) == (1, 10**12) and rate_scale(24, 18) == (10**6, 1)
+    assert normalize_rates([5 * 10**12, 7, 3], [6, 18, 20], 18) == [5, 7, 300]
+
+
+def test_batch_prices_match_per_token_math():
+    chain, rng = _chain(), random.Random(7)
+    tokens = _tokens(chain, [rng.choice([0, 2, 6, 8, 9, 12, 18, 24, 30]) for _ in range(200)])
+    rates = [10**18, 10**15 * 10**12] + [rng.randrange(0, 10**40) for _ in tokens[2:]]
+    expected = _reference_prices(chain, tokens, rates)
+    assert [p.price for p in chain.prepare_prices(tokens, rates)] == expected
+    array = chain.prepare_price_array(tokens, rates)
+    assert array.dtype == np.float64 and array.tolist() == expected
+    assert [p.token for p in chain.prepare_prices(tokens, rates)] == tokens
@@ -0,0 +1,49 @@
+"""Shared HTTP providers (no network: only provider/session bookkeeping is exercised)."""
+import asyncio
+
+from sugar.chains import AsyncBaseChain, BaseChain
+from sugar.providers import ProviderPool, provider_pool
+
+
+def test_sync_providers_shared_per_rpc():
+    pool = ProviderPool()
+    a, b = pool.get("http://a", 4), pool.get("http://a", 4)
+    assert a is b and pool.get("http://b", 4) is not a
+    assert pool.stats() == {"hits": 1, "misses": 2, "providers": 2}
+    session = a._request_session_manager.cache_and_return_session(a.endpoint_uri)
+    assert session.get_adapter("https://a")._pool_maxsize == 4
+
+
+def test_async_provider_gets_one_keep_alive_session_per_loop():
+    pool = ProviderPool()
+
+    async def run():
+        p = await pool.get_async("http://a", 3)
+        assert await pool.get_async("http://a", 3) is p
+        session = await p._request_session_manager.async_cache_and_return_session(p.endpoint_uri)
+        assert session.connector.limit == 3 and not session.connector.force_close
+        await pool.aclose()
+        return p
+
+    first, second = asyncio.run(run()), asyncio.run(run())
+    assert first is second and pool.stats()["hits"] == 3
+
+
+def test_chain_contexts_reuse_providers():
+    with BaseChain(rpc_uri="http://shared-sync") as a: pa = a.web3.provider
+    with BaseChain(rpc_uri="http://shared-sync") as b: assert b.web3.provider is pa
+
+    async def run():
+        async with AsyncBaseChain(rpc_uri="http://shared-async") as a: pa = a.web3.provider
+        async with AsyncBaseChain(rpc_uri="http://shared-async") as b: assert b.web3.provider is pa
+        await provider_pool.aclose()
+
+    asyncio.run(run())
+
+
+def test_extra_endpoints_get_a_hedged_provider_over_pooled_ones():
+    from sugar.transport import HedgedHTTPProvider
+    pool = ProviderPool()
+    hedged = pool.get("http://a", 4, ["http://b"])
+    assert isinstance(hedged, HedgedHTTPProvider) and pool.get("http://a", 4, ["http://b"]) is hedged
+    assert hedged.endpoints.providers == [pool.get("http://a", 4), pool.get("http://b", 4)]
@@ -1,6 +1,14 @@
 
+import asyncio
+
+from eth_abi.packed import encode_packed
+
+from sugar.chains import AsyncBaseChain, BaseChain
+from sugar.config import make_base_chain_settings
 from sugar.pool import LiquidityPoolForSwap
-from sugar.quote import pack_path
+from sugar.quote import QuoteInput, encode_path, pack_path
+from sugar.route import RouteIndex
+from sugar.token import Token
 
 
 def test_pack_path_forward():
@@ -46,3 +54,90 @@ def test_pack_path_for_swap_v2():
         False,
         "0x4200000000000000000000000000000000000042",
     ]
+
+
+def _depth_setup():
+    a, b, x = make_base_chain_settings().connector_tokens_addrs[:3]
+    tokens = [Token(chain_id="8453", chain_name="Base", token_address=t, symbol=t[:6], decimals=18, listed=True) for t in (a, b)]
+    pools = [LiquidityPoolForSwap(chain_id="8453", chain_name="Base", lp=f"0x{i:040x}", type=0, token0_address=t0, token1_address=t1, factory="0xF")
+             for i, (t0, t1) in enumerate([(a, b), (a, x), (x, b)], start=1)]
+    return tokens, pools, RouteIndex.from_pools(pools)
+
+
+def _stub_quoter(chain, pools, index, batches):
+    # direct route pays 2x up to 1000, the 2-hop route 1.5x at any size; one call fails
+    chain.get_pools_for_swaps, chain.get_route_index = (lambda: pools), (lambda: index)
+
+    def execute(from_token, to_token, path_pools, amounts, paths, calls):
+        batches.append(len(calls))
+        rs = []
+        for a, i in calls:
+            amount, direct = amounts[a], len(paths[i]) == 1
+            rs.append(ValueError("revert") if amount == 7 else [amount * 2 if direct and amount <= 1000 else amount * 3 // 2])
+        return [(c, QuoteInput(from_token=from_token, to_token=to_token, path=[(p, False) for p in path_pools[c[1]]], amount_in=amounts[c[0]]), r) for c, r in zip(calls, rs)]
+    return execute
+
+
+def test_get_quotes_one_search_shared_batches():
+    (a, b), pools, index = _depth_setup()
+    amounts, batches = [10, 1000, 10**6, 7] + list(range(100, 400)), []
+    with BaseChain() as chain:
+        chain._execute_quote_calls = _stub_quoter(chain, pools, index, batches)
+        curve = chain.get_quotes(a, b, amounts, with_matrix=True)
+        # 2 routes x 304 amounts in batches of 500
+        assert sorted(batches) == [108, 500] and len(curve.paths) == 2
+        assert curve.amounts_out[:4] == [20, 2000, 1500000, 0] and curve.best[3] is None
+        assert curve.matrix[2][[len(p) for p in curve.paths].index(1)].amount_out == 1500000
+        assert chain.get_quotes(a, b, [10], filter_quotes=lambda q: q.amount_out < 20).amounts_out == [15]
+        assert chain.get_quotes(a, b, [10]).matrix is None
+
+
+def test_async_get_quotes_matches_sync():
+    (a, b), pools, index = _depth_setup()
+
+    async def run():
+        async with AsyncBaseChain() as chain:
+            stub = _stub_quoter(chain, pools, index, [])
+            async def execute(*args): return stub(*args)
+            chain.get_pools_for_swaps, chain.get_route_index = (lambda: _ready(pools)), (lambda: _ready(index))
+            chain._execute_quote_calls = execute
+            return (await chain.get_quotes(a, b, [10, 2000, 7])).amounts_out
+
+    async def _ready(v): return v
+    assert asyncio.run(run()) == [20, 3000, 0]
+
+
+def test_multi_quote_batch_packs_each_route_once():
+    (a, b), pools, index = _depth_setup()
+
+    class Batcher(list):
+        def add(self, call): self.append(call)
+
+    with BaseChain() as chain:
+        paths = chain.get_quote_paths(a, b, pools, index, None)
+        calls = [(k, i) for k in range(3) for i in range(len(paths))]
+        batch, inputs = chain.prepare_multi_quote_batch(a, b, Batcher(), chain.paths_to_pools(pools, paths), [1, 2, 3], paths, calls)
+        assert len(batch) == len(inputs) == 6 and [q.amount_in for q in inputs] == [1, 1, 2, 2, 3, 3]
+        assert [q.route.encoded for q in inputs[:2]] == [q.route.encoded for q in inputs[2:4]]
+
+
+def test_get_split_quote_allocates_across_disjoint_routes():
+    (a, b), pools, index = _depth_setup()
+    with BaseChain() as chain:
+        chain._execute_quote_calls = _stub_quoter(chain, pools, index, [])
+        # the direct route stops paying 2x past 1000: the rest goes through the 2-hop route
+        split = chain.get_split_quote(a, b, 2000, max_routes=2, steps=10)
+        assert [len(q.path) for q in split.quotes] == [1, 2] and [q.amount_in for q in split.quotes] == [1000, 1000]
+        assert split.amount_in == 2000 and split.amount_out == 3500 and split.shares == [0.5, 0.5]
+        assert [len(q.path) for q in chain.get_split_quote(a, b, 500).quotes] == [1]
+
+
+def test_route_encoding_matches_encode_packed_and_is_shared():
+    (a, b), pools, _ = _depth_setup()
+    cl = LiquidityPoolForSwap(chain_id="8453", chain_name="Base", lp="0x" + "cc" * 20, type=200, token0_address=pools[2].token0_address,
+                              token1_address=pools[2].token1_address, factory="0xF")
+    for path, for_swap in [([(pools[0], False)], False), ([(pools[1], False), (cl, True)], False), ([(pools[1], False), (pools[2], False)], True)]:
+        route = pack_path(path, for_swap=for_swap)
+        assert route.encoded == encode_packed(route.types, route.values) == encode_path(path, for_swap=for_swap)
+    q1, q2 = (QuoteInput(from_token=a, to_token=b, path=[(pools[0], False)], amount_in=n) for n in (1, 2))
+    assert q1.route is q2.route and q1.route_for_swap is not q1.route
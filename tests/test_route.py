@@ -0,0 +1,111 @@
+"""Route search over the precomputed `RouteIndex` (no network)."""
+import random
+
+import pytest
+
+from sugar.chains import CommonChain
+from sugar.config import make_base_chain_settings
+from sugar.helpers import Pair, find_all_paths
+from sugar.pool import LiquidityPoolForSwap
+from sugar.route import RouteIndex, cap_parallel_pools, rank_paths_by_liquidity
+from sugar.token import Token
+
+
+def _pools(p): return [tuple(h[2] for h in path) for path in p]
+
+
+def _nx_paths(pairs, start, end, cutoff=3):
+    # reference: the networkx search `find_all_paths` used before RouteIndex
+    nx = pytest.importorskip("networkx")
+    G = nx.MultiGraph()
+    for pair in pairs: G.add_edge(pair.token0, pair.token1, pool=pair.pool)
+    if start not in G or end not in G: return set()
+    return {tuple(G.edges[e]["pool"] for e in path) for path in nx.all_simple_edge_paths(G, start, end, cutoff=cutoff)}
+
+
+def _random_pairs(n_tokens, n_pools, seed):
+    rnd = random.Random(seed)
+    return [Pair(*rnd.sample([f"T{i}" for i in range(n_tokens)], 2), f"P{i}") for i in range(n_pools)]
+
+
+def test_parallel_pools_expand():
+    idx = RouteIndex([Pair("A", "B", "p1"), Pair("A", "B", "p2"), Pair("B", "C", "p3")])
+    assert sorted(_pools(idx.find_paths("A", "C"))) == [("p1", "p3"), ("p2", "p3")]
+    assert idx.find_paths("A", "C")[0] == [("A", "B", "p1"), ("B", "C", "p3")]
+
+
+def test_cutoff_and_unknown_tokens():
+    idx = RouteIndex([Pair("A", "B", "p1"), Pair("B", "C", "p2"), Pair("C", "D", "p3"), Pair("D", "E", "p4")])
+    assert _pools(idx.find_paths("A", "D")) == [("p1", "p2", "p3")]
+    assert idx.find_paths("A", "E") == []
+    assert _pools(idx.find_paths("A", "E", cutoff=4)) == [("p1", "p2", "p3", "p4")]
+    assert idx.find_paths("A", "Z") == [] and idx.find_paths("A", "A") == []
+
+
+def test_duplicate_lps_ignored():
+    idx = RouteIndex([Pair("A", "B", "p1"), Pair("A", "B", "p1"), Pair("A", "A", "p2")])
+    assert len(idx) == 1 and _pools(idx.find_paths("A", "B")) == [("p1",)]
+
+
+def test_exclude_and_match_tokens():
+    idx = RouteIndex([Pair("A", "X", "p1"), Pair("X", "B", "p2"), Pair("A", "Y", "p3"), Pair("Y", "B", "p4"), Pair("A", "B", "p5")])
+    assert sorted(_pools(idx.find_paths("A", "B", exclude_tokens={"X"}))) == [("p3", "p4"), ("p5",)]
+    # pools must touch a matched token: X-B and Y-B qualify through B, A-X/A-Y only through A
+    assert sorted(_pools(idx.find_paths("A", "B", match_tokens={"X"}))) == [("p1", "p2")]
+    assert _pools(idx.find_paths("A", "B", match_tokens=set())) == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_networkx(seed):
+    pairs = _random_pairs(30, 120, seed)
+    for start, end in [("T0", "T1"), ("T2", "T3"), ("T4", "T29")]:
+        paths = find_all_paths(pairs, start, end)
+        assert len(paths) == len(set(_pools(paths)))
+        assert set(_pools(paths)) == _nx_paths(pairs, start, end)
+
+
+def test_chain_index_matches_filtered_search():
+    chain, settings = CommonChain(make_base_chain_settings()), make_base_chain_settings()
+    tokens = settings.connector_tokens_addrs[:3] + [f"0x{i:040x}" for i in range(1, 12)]
+    rnd = random.Random(7)
+    pools = [LiquidityPoolForSwap(chain_id="8453", chain_name="Base", lp=f"0xLP{i}", type=0,
+                                  token0_address=a, token1_address=b, factory="0xF")
+             for i, (a, b) in enumerate(rnd.sample(tokens, 2) for _ in range(80))]
+
+    def _t(addr): return Token(chain_id="8453", chain_name="Base", token_address=addr, symbol=addr, decimals=18, listed=True)
+
+    from_token, to_token, excluded = _t(tokens[5]), _t(tokens[6]), [tokens[7]]
+    filtered = chain.filter_pools_for_swap(pools, from_token, to_token)
+    expected = chain.get_paths_for_quote(from_token, to_token, filtered, excluded)
+    got = chain.get_paths_for_quote(from_token, to_token, pools, excluded, index=RouteIndex.from_pools(pools))
+    assert expected and sorted(_pools(got)) == sorted(_pools(expected))
+    assert all(tokens[7] not in (h[0] for h in p) for p in got)
+
+
+def test_max_parallel_keeps_deepest_pools():
+    idx = RouteIndex([Pair("A", "B", "p1"), Pair("A", "B", "p2"), Pair("A", "B", "p3"), Pair("B", "C", "p4"), Pair("B", "C", "p5")])
+    scores = {"p1": 1.0, "p2": 30.0, "p3": 20.0, "p4": 5.0}
+    assert sorted(_pools(idx.find_paths("A", "C", max_parallel=2, pool_scores=scores))) == [("p2", "p4"), ("p2", "p5"), ("p3", "p4"), ("p3", "p5")]
+    assert _pools(idx.find_paths("A", "C", max_parallel=1, pool_scores=scores)) == [("p2", "p4")]
+    assert len(idx.find_paths("A", "C", max_parallel=0, pool_scores=scores)) == 6
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_max_parallel_matches_post_hoc_cap(seed):
+    pairs = _random_pairs(12, 150, seed)
+    rnd = random.Random(seed)
+    scores = {p.pool: rnd.random() for p in pairs}
+    idx = RouteIndex(pairs)
+    for cap in (1, 2, 3):
+        capped = idx.find_paths("T0", "T1", max_parallel=cap, pool_scores=scores)
+        assert sorted(_pools(capped)) == sorted(_pools(cap_parallel_pools(idx.find_paths("T0", "T1"), scores, cap)))
+
+
+def test_rank_paths_by_liquidity():
+    direct, deep, shallow = [("A", "C", "p1")], [("A", "B", "p2"), ("B", "C", "p3")], [("A", "B", "p4"), ("B", "C", "p5")]
+    scores = {"p1": 10.0, "p2": 100.0, "p3": 30.0, "p4": 1000.0, "p5": 1.0}
+    # bottleneck 30 halved for the extra hop beats the direct pool's 10; p5 caps the other route at 1
+    assert rank_paths_by_liquidity([direct, deep, shallow], scores, 2) == [deep, direct]
+    assert rank_paths_by_liquidity([direct, deep, shallow], scores, 1, hop_discount=0.1) == [direct]
+    paths = [direct, deep, shallow]
+    assert rank_paths_by_liquidity(paths, scores, 0) is paths and rank_paths_by_liquidity(paths, scores, 5) is paths
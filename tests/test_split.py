@@ -0,0 +1,57 @@
+"""Split routing: allocating one swap across several sampled routes (no network)."""
+import pytest
+
+from sugar.amm import BasicPoolState
+from sugar.split import curve_value, local_curve, optimize_split, split_amounts
+
+
+def _pool_curve(reserve_in, reserve_out, amounts):
+    return [(a, reserve_out * a // (reserve_in + a)) for a in amounts]
+
+
+AMOUNTS = [100 * k for k in range(1, 11)]
+
+
+def test_curve_value_interpolates():
+    curve = [(100, 50), (200, 80)]
+    assert curve_value(curve, 50) == 25 and curve_value(curve, 150) == 65
+    assert curve_value(curve, 300) == 80 and curve_value([], 10) == 0
+
+
+def test_equal_pools_split_evenly():
+    curves = [_pool_curve(1000, 1000, AMOUNTS), _pool_curve(1000, 1000, AMOUNTS)]
+    assert optimize_split(curves, 1000, 10, 2) == [5, 5]
+    assert optimize_split(curves, 1000, 10, 1) == [10, 0]
+
+
+def test_split_follows_depth_and_route_limits():
+    curves = [_pool_curve(3000, 3000, AMOUNTS), _pool_curve(1000, 1000, AMOUNTS), _pool_curve(200, 200, AMOUNTS)]
+    shares = optimize_split(curves, 1000, 10, 3)
+    assert sum(shares) == 10 and shares[0] > shares[1] > 0
+    assert optimize_split(curves, 1000, 10, 2)[2] == 0
+
+
+def test_routes_sharing_a_pool_are_not_combined():
+    curves = [_pool_curve(1000, 1000, AMOUNTS), _pool_curve(1000, 1000, AMOUNTS), _pool_curve(900, 900, AMOUNTS)]
+    shares = optimize_split(curves, 1000, 10, 2, route_pools=[["a", "b"], ["b", "c"], ["d"]])
+    assert shares[1] == 0 and shares[0] > 0 and shares[2] > 0
+
+
+def test_single_route_wins_when_splitting_doesnt_pay():
+    # a deep route against one that pays out nothing
+    curves = [_pool_curve(10**9, 10**9, AMOUNTS), [(a, 0) for a in AMOUNTS]]
+    assert optimize_split(curves, 1000, 10, 2) == [10, 0]
+    assert optimize_split([], 1000) == [] and optimize_split(curves, 0) == [0, 0]
+
+
+def test_split_amounts_add_up():
+    assert split_amounts(1001, [5, 3, 2]) == [501, 300, 200]
+    assert sum(split_amounts(10**18 + 7, [1, 1, 1])) == 10**18 + 7
+
+
+def test_local_curve():
+    state = BasicPoolState(lp="p", token0_address="A", token1_address="B", reserve0=10**6, reserve1=10**6,
+                           decimals0=10**18, decimals1=10**18, stable=False, fee=0)
+    curve = local_curve([("A", "B", "p")], [100, 200], {"p": state})
+    assert [a for a, _ in curve] == [100, 200] and curve[1][1] == pytest.approx(2 * curve[0][1], rel=1e-2)
+    assert local_curve([("A", "B", "missing")], [100], {"p": state}) is None
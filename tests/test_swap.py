@@ -2,8 +2,10 @@ from typing import List, Tuple
 
 
 from sugar.pool import LiquidityPoolForSwap
-from sugar.quote import Quote, QuoteInput
-from sugar.swap import setup_planner
+from eth_abi import decode
+
+from sugar.quote import Quote, QuoteInput, SplitQuote
+from sugar.swap import ABI_DEFINITION, CommandType, setup_planner, setup_split_planner
 from sugar.token import Token
 
 
@@ -127,3 +129,36 @@ def test_planner_v3_v2_v3_v3_v2():
         '0x000000000000000000000000ec3d9098bd40ec741676fc04d4bd26bccf592aa38000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000c00000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000429560e827af36c94d2ac33a39bce1fe78631088db0000647f5c764cbc14f9669b88837ca1490cca17c316070000647f5c764cbc14f9669b88837ca1490cca17c31607000000000000000000000000000000000000000000000000000000000000',
         '0x000000000000000000000000533cf9fb379488ffe0b1065c42c744fbd4b0e1a30000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000a00000000000000000000000000000000000000000000000000000000000000c00000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000299560e827af36c94d2ac33a39bce1fe78631088db007f5c764cbc14f9669b88837ca1490cca17c316070000000000000000000000000000000000000000000000',
     ]
+
+
+def _split_legs(from_token: Token, to_token: Token):
+    t0 = from_token.wrapped_token_address or from_token.token_address
+    to = to_token.wrapped_token_address or to_token.token_address
+    v2 = LiquidityPoolForSwap(chain_id="10", chain_name="OP", lp='0xec3d9098BD40ec741676fc04D4bd26BCCF592aa3', type=-1, token0_address=t0, token1_address=to)
+    cl = LiquidityPoolForSwap(chain_id="10", chain_name="OP", lp='0x02A130b6D35611bC2D90e20f2ceA45431c0A9a8d', type=100, token0_address=t0, token1_address=to)
+    return SplitQuote([_quote([(v2, False)], from_token, to_token, 60, 100), _quote([(cl, False)], from_token, to_token, 40, 80)])
+
+
+def test_split_planner_single_leg_matches_planner():
+    split = _split_legs(_velo, _usdc)
+    planner = setup_split_planner(SplitQuote(split.quotes[:1]), slippage=0.01, account=_ACCOUNT, router_address=_ROUTER)
+    assert (planner.get_encoded_commands(), planner.get_pretty_encoded_inputs()) == _plan(split.quotes[0])
+
+
+def test_split_planner_erc20_sweeps_total():
+    split = _split_legs(_velo, _usdc)
+    planner = setup_split_planner(split, slippage=0.01, account=_ACCOUNT, router_address=_ROUTER)
+    assert planner.get_encoded_commands() == '0x080004'
+    legs = [decode(ABI_DEFINITION[CommandType.V2_SWAP_EXACT_IN], i) for i in planner.inputs[:2]]
+    # every leg pulls its own share from the user and pays out to the router, with no per-leg minimum
+    assert [(leg[0].lower(), leg[1], leg[2], leg[4]) for leg in legs] == [(_ROUTER.lower(), 60, 0, True), (_ROUTER.lower(), 40, 0, True)]
+    token, recipient, min_out = decode(ABI_DEFINITION[CommandType.SWEEP], planner.inputs[2])
+    assert (token.lower(), recipient.lower(), min_out) == (_usdc.token_address.lower(), _ACCOUNT, 179)
+
+
+def test_split_planner_native_in_and_out():
+    split = _split_legs(_eth, _eth)
+    assert setup_split_planner(split, slippage=0.01, account=_ACCOUNT, router_address=_ROUTER).get_encoded_commands() == '0x0b08000c'
+    planner = setup_split_planner(_split_legs(_eth, _usdc), slippage=0.01, account=_ACCOUNT, router_address=_ROUTER)
+    wrap, legs = decode(ABI_DEFINITION[CommandType.WRAP_ETH], planner.inputs[0]), planner.inputs[1:3]
+    assert wrap[1] == 100 and [decode(ABI_DEFINITION[CommandType.V2_SWAP_EXACT_IN], i)[4] for i in legs] == [False, False]
@@ -0,0 +1,102 @@
+"""Hedged multi-endpoint providers (no network: endpoints are fakes with scripted latency/failures)."""
+import asyncio
+import time
+
+import pytest
+
+from sugar.transport import AsyncHedgedHTTPProvider, EndpointStats, HedgedHTTPProvider
+
+
+class Fake:
+    def __init__(self, uri, delay=0.0, fail=False, batch_error=False):
+        self.endpoint_uri, self.delay, self.fail, self.batch_error, self.calls = uri, delay, fail, batch_error, 0
+
+    def _answer(self, method):
+        self.calls += 1
+        if self.fail: raise ConnectionError(self.endpoint_uri)
+        return {"result": (self.endpoint_uri, method)}
+
+    def make_request(self, method, params):
+        time.sleep(self.delay)
+        return self._answer(method)
+
+    def make_batch_request(self, requests):
+        time.sleep(self.delay)
+        self.calls += 1
+        return {"error": "batch too large"} if self.batch_error else [{"result": (self.endpoint_uri, m)} for m, _ in requests]
+
+
+class AsyncFake(Fake):
+    async def make_request(self, method, params):
+        await asyncio.sleep(self.delay)
+        return self._answer(method)
+
+    async def make_batch_request(self, requests):
+        await asyncio.sleep(self.delay)
+        self.calls += 1
+        return {"error": "batch too large"} if self.batch_error else [{"result": (self.endpoint_uri, m)} for m, _ in requests]
+
+
+def _hedged(cls, fakes, delay=0.02):
+    p = cls(fakes)
+    for s in p.endpoints.stats: s.default_hedge_delay = delay
+    return p
+
+
+def test_hedge_delay_tracks_p95():
+    s = EndpointStats("a")
+    assert s.hedge_delay == EndpointStats.default_hedge_delay
+    for i in range(1, 101): s.succeeded(i / 100)
+    assert s.hedge_delay == pytest.approx(0.95)
+
+
+def test_ejects_after_repeated_failures():
+    s = EndpointStats("a")
+    for _ in range(EndpointStats.max_failures - 1): s.failed()
+    assert s.healthy
+    s.failed()
+    assert not s.healthy
+
+
+def test_slow_endpoint_is_hedged():
+    slow, fast = Fake("slow", delay=0.5), Fake("fast")
+    p = _hedged(HedgedHTTPProvider, [slow, fast])
+    start = time.perf_counter()
+    assert p.make_request("eth_call", [])["result"][0] == "fast"
+    assert time.perf_counter() - start < 0.4
+
+
+def test_requests_rotate_and_fail_over():
+    a, b = Fake("a", fail=True), Fake("b")
+    p = _hedged(HedgedHTTPProvider, [a, b])
+    answers = [p.make_request("eth_call", [])["result"][0] for _ in range(6)]
+    assert answers == ["b"] * 6
+    # `a` is ejected after three failures and no longer tried first
+    assert a.calls == EndpointStats.max_failures
+
+
+def test_rejected_batches_fail_over():
+    p = _hedged(HedgedHTTPProvider, [Fake("a", batch_error=True), Fake("b")])
+    assert [r["result"][0] for r in p.make_batch_request([("eth_call", []), ("eth_call", [])])] == ["b", "b"]
+    p = _hedged(HedgedHTTPProvider, [Fake("a", batch_error=True), Fake("b", batch_error=True)])
+    assert p.make_batch_request([("eth_call", [])]) == {"error": "batch too large"}
+
+
+def test_all_endpoints_failing_raises():
+    p = _hedged(HedgedHTTPProvider, [Fake("a", fail=True), Fake("b", fail=True)])
+    with pytest.raises(ConnectionError): p.make_request("eth_call", [])
+
+
+def test_async_hedge_cancels_the_loser():
+    slow, fast = AsyncFake("slow", delay=5), AsyncFake("fast")
+    p = _hedged(AsyncHedgedHTTPProvider, [slow, fast])
+
+    async def run():
+        start = time.perf_counter()
+        r = await p.make_batch_request([("eth_call", [])])
+        return r, time.perf_counter() - start
+
+    r, took = asyncio.run(run())
+    assert r[0]["result"][0] == "fast" and took < 1
+    # the cancelled request isn't held against the slow endpoint
+    assert p.endpoints.stats[0].failures == 0
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Address normalization benchmark: per-pool `LiquidityPool.from_tuple` parse time
+with the memoized `normalize_address` vs plain per-call checksumming.
+
+Builds synthetic `Sugar.all` rows over a small token set (so token addresses
+repeat across pools, like on a real chain) and parses them repeatedly — the
+shape of `prepare_pools` running on every `get_pools()`. No network access needed.
+
+    python tools/address_benchmark.py --pools 5000 --rounds 5
+"""
+
+import argparse
+import random
+import statistics
+import time
+from contextlib import contextmanager
+
+from web3 import Web3
+
+import sugar.pool
+from sugar.helpers import normalize_address
+from sugar.pool import LiquidityPool, Price
+from sugar.token import Token
+
+
+def random_address(rnd: random.Random) -> str: return "0x" + "".join(rnd.choice("0123456789abcdef") for _ in range(40))
+
+
+def synthetic_rows(n_pools: int, n_tokens: int = 300, seed: int = 42):
+    rnd = random.Random(seed)
+    token_addresses = [random_address(rnd) for _ in range(n_tokens)]
+    tokens = {normalize_address(a): Token("10", "OP", normalize_address(a), f"T{i}", 18, True) for i, a in enumerate(token_addresses)}
+    prices = {a: Price(token=t, price=rnd.random()) for a, t in tokens.items()}
+    rows = []
+    for _ in range(n_pools):
+        row = [0] * 32
+        t0, t1 = rnd.sample(token_addresses, 2)
+        row[0], row[13], row[18], row[29], row[30] = (random_address(rnd) for _ in range(5))
+        row[4], row[7], row[10], row[20] = rnd.choice([-1, 0, 100]), t0, t1, token_addresses[0]
+        row[3], row[8], row[11], row[14], row[19], row[22] = 10**18, 10**18, 10**18, 10**17, 10**12, 30
+        rows.append(tuple(row))
+    return rows, tokens, prices
+
+
+@contextmanager
+def uncached():
+    """Swap the pool module's `normalize_address` for the original per-call checksum."""
+    original = sugar.pool.normalize_address
+    sugar.pool.normalize_address = lambda a: Web3.to_checksum_address(a.lower())
+    try: yield
+    finally: sugar.pool.normalize_address = original
+
+
+def parse_round(rows, tokens, prices) -> float:
+    start = time.perf_counter()
+    for r in rows: LiquidityPool.from_tuple(r, tokens, prices, "10", "OP")
+    return (time.perf_counter() - start) / len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pools", type=int, default=5_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows, tokens, prices = synthetic_rows(args.pools, seed=args.seed)
+    print(f"🧪 LiquidityPool.from_tuple: {args.pools} pools, {len(tokens)} tokens, {args.rounds} rounds")
+    print("=" * 60)
+
+    with uncached(): before = [parse_round(rows, tokens, prices) for _ in range(args.rounds)]
+    normalize_address.cache_clear()
+    after = [parse_round(rows, tokens, prices) for _ in range(args.rounds)]
+
+    print(f"  per-call checksum   mean: {statistics.mean(before) * 1e6:.1f}µs/pool")
+    print(f"  memoized (1st run)      : {after[0] * 1e6:.1f}µs/pool")
+    print(f"  memoized (warm)     mean: {statistics.mean(after[1:] or after) * 1e6:.1f}µs/pool")
+    print(f"  Speedup (warm): {statistics.mean(before) / max(statistics.mean(after[1:] or after), 1e-12):.1f}x")
+    print(f"  {normalize_address.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Cold vs warm start with the persistent disk cache.
+
+Each run opens a FRESH chain instance (empty in-memory caches), the way a CLI
+invocation would. The first run starts with an empty cache directory and pays
+the full Sugar pagination; the following runs read tokens and pools from disk.
+
+    python tools/disk_cache_benchmark.py --chain 10 --runs 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+from sugar.chains import get_async_chain
+
+
+async def timed_run(chain_id: str, cache_dir: str) -> dict:
+    timings = {}
+    async with get_async_chain(chain_id, cache_dir=cache_dir) as chain:
+        for name, call in [("get_all_tokens", chain.get_all_tokens), ("get_pools_for_swaps", chain.get_pools_for_swaps)]:
+            start = time.perf_counter()
+            await call()
+            timings[name] = time.perf_counter() - start
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chain", default="10")
+    parser.add_argument("--runs", type=int, default=3, help="warm runs after the cold one")
+    args = parser.parse_args()
+
+    print(f"🧪 Disk cache: chain {args.chain}")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cold = await timed_run(args.chain, cache_dir)
+        warm = [await timed_run(args.chain, cache_dir) for _ in range(args.runs)]
+
+    for name, cold_time in cold.items():
+        warm_time = statistics.mean(w[name] for w in warm)
+        print(f"  {name:<20} cold: {cold_time:.4f}s  warm: {warm_time:.4f}s  ({cold_time / max(warm_time, 1e-9):.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Route search benchmark: RouteIndex vs the previous networkx search.
+
+Builds a synthetic swap-pool graph (10k pools by default) shaped like a real
+chain — a handful of connector tokens holding most of the liquidity plus a long
+tail of tokens paired against them — and times path discovery for a batch of
+random token pairs. No network access needed; networkx is a dev requirement.
+
+    python tools/route_benchmark.py --pools 10000 --queries 50
+"""
+
+import argparse
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+import networkx as nx
+
+from sugar.helpers import Pair
+from sugar.route import RouteIndex
+
+
+def nx_find_all_paths(pairs: List[Pair], start_token: str, end_token: str, cutoff=3) -> List[List[Tuple]]:
+    """The networkx implementation `find_all_paths` used before RouteIndex (graph rebuilt per call)."""
+    G, complete_paths = nx.MultiGraph(), []
+    for pair in pairs: G.add_edge(pair.token0, pair.token1, pool=pair.pool)
+    for path in nx.all_simple_paths(G, source=start_token, target=end_token, cutoff=cutoff):
+        edge_paths = [[]]
+        for current, next_node in zip(path, path[1:]):
+            edges = G.get_edge_data(current, next_node)
+            edge_paths = [p + [(current, next_node, attrs['pool'])] for attrs in edges.values() for p in edge_paths]
+        complete_paths.extend(edge_paths)
+    uniques, seen = [], []
+    for path in complete_paths:
+        p = '-'.join(map(lambda x: x[2], path))
+        if p not in seen:
+            uniques.append(path)
+            seen.append(p)
+    return uniques
+
+
+def synthetic_pairs(n_pools: int, n_connectors: int = 8, seed: int = 42) -> Tuple[List[Pair], List[str]]:
+    rnd = random.Random(seed)
+    connectors = [f"C{i}" for i in range(n_connectors)]
+    tail = [f"T{i}" for i in range(max(1, n_pools // 3))]
+    pairs = []
+    for i in range(n_pools):
+        r = rnd.random()
+        if r < 0.05: a, b = rnd.sample(connectors, 2)
+        elif r < 0.9: a, b = rnd.choice(tail), rnd.choice(connectors)
+        else: a, b = rnd.sample(tail, 2)
+        pairs.append(Pair(a, b, f"P{i}"))
+    used = {t for p in pairs for t in (p.token0, p.token1)}
+    return pairs, [t for t in connectors + tail if t in used]
+
+
+def timed(fn, *args) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pools", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    pairs, tokens = synthetic_pairs(args.pools, seed=args.seed)
+    rnd = random.Random(args.seed)
+    queries = [tuple(rnd.sample(tokens, 2)) for _ in range(args.queries)]
+
+    print(f"🧪 Route search: {args.pools} pools, {len(tokens)} tokens, {args.queries} queries")
+    print("=" * 60)
+
+    build_time, index = timed(RouteIndex, pairs)
+    print(f"  RouteIndex build (once per pool set): {build_time:.4f}s")
+
+    nx_times, idx_times, total_paths = [], [], 0
+    for start, end in queries:
+        t_nx, nx_paths = timed(nx_find_all_paths, pairs, start, end)
+        t_idx, idx_paths = timed(index.find_paths, start, end)
+        assert sorted(tuple(h[2] for h in p) for p in nx_paths) == sorted(tuple(h[2] for h in p) for p in idx_paths), (start, end)
+        nx_times.append(t_nx)
+        idx_times.append(t_idx)
+        total_paths += len(idx_paths)
+
+    print(f"  Paths found: {total_paths} (identical for both searches)")
+    print(f"  networkx   mean: {statistics.mean(nx_times):.4f}s  max: {max(nx_times):.4f}s")
+    print(f"  RouteIndex mean: {statistics.mean(idx_times):.4f}s  max: {max(idx_times):.4f}s")
+    print(f"  Speedup (per query, excluding one-off build): {statistics.mean(nx_times) / max(statistics.mean(idx_times), 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Route encoding benchmark: packing quoter/swapper paths per call vs memoized.
+
+Builds synthetic 1-3 hop paths over a mix of basic and CL pools (10k by default)
+and times encoding every path the way `prepare_quote_batch` did before
+(`reduce` type lists + `encode_packed` on every access), the hand-packed
+`pack_path` cold, and `encode_path` / `QuoteInput.route` warm — what every
+further amount or quote over the same routes costs. No network access needed.
+
+    python tools/route_encoding_benchmark.py --paths 10000 --amounts 5
+"""
+
+import argparse
+import random
+import time
+from functools import reduce
+from typing import List, Tuple
+
+from eth_abi.packed import encode_packed
+
+from sugar.pool import LiquidityPoolForSwap
+from sugar.quote import QUOTER_STABLE_POOL_FILLER, QUOTER_VOLATILE_POOL_FILLER, _pack_path_cached, encode_path, pack_path
+
+
+def legacy_encode(path: List[Tuple[LiquidityPoolForSwap, bool]]) -> bytes:
+    """`pack_path(...).encoded` as it was before memoization (quoter form)."""
+    types, values = reduce(lambda s, pool: s + pool, [["address", "int24"] for i in range(len(path))], []) + ["address"], []
+    for pool, reversed in path:
+        token0, token1 = (pool.token1_address, pool.token0_address) if reversed else (pool.token0_address, pool.token1_address)
+        filler = pool.type if pool.type > 0 else QUOTER_STABLE_POOL_FILLER if pool.is_stable else QUOTER_VOLATILE_POOL_FILLER
+        values = [token0, filler, token1] if not values else values + [filler, token1]
+    return encode_packed(types, values)
+
+
+def synthetic_paths(n_paths: int, seed: int = 42) -> List[List[Tuple[LiquidityPoolForSwap, bool]]]:
+    rnd = random.Random(seed)
+    tokens = [f"0x{rnd.getrandbits(160):040x}" for _ in range(200)]
+    paths = []
+    for i in range(n_paths):
+        hops = rnd.choice([1, 2, 2, 3])
+        route = rnd.sample(tokens, hops + 1)
+        path = []
+        for j, (a, b) in enumerate(zip(route, route[1:])):
+            pool = LiquidityPoolForSwap(chain_id="10", chain_name="OP", lp=f"0x{i:020x}{j:020x}", type=rnd.choice([-1, 0, 1, 100, 200]),
+                                        token0_address=min(a, b), token1_address=max(a, b), factory="0xF")
+            path.append((pool, a != pool.token0_address))
+        paths.append(path)
+    return paths
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--amounts", type=int, default=5, help="quotes per path, e.g. a get_quotes depth curve")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    paths = synthetic_paths(args.paths, args.seed)
+    assert all(legacy_encode(p) == encode_path(p) for p in paths[:500])
+    _pack_path_cached.cache_clear()
+
+    print(f"🧪 Route encoding: {args.paths} paths x {args.amounts} amounts")
+    print("=" * 60)
+    legacy = timed(lambda: [legacy_encode(p) for _ in range(args.amounts) for p in paths])
+    packed = timed(lambda: [pack_path(p).encoded for p in paths])
+    cold = timed(lambda: [encode_path(p) for p in paths])
+    warm = timed(lambda: [encode_path(p) for _ in range(args.amounts) for p in paths])
+    calls = args.paths * args.amounts
+    print(f"  reduce + encode_packed per call: {legacy:.3f}s  ({legacy / calls * 1e6:.1f}µs/call)")
+    print(f"  pack_path, hand-packed (once):   {packed:.3f}s  ({packed / args.paths * 1e6:.1f}µs/path)")
+    print(f"  encode_path cold (first amount): {cold:.3f}s  ({cold / args.paths * 1e6:.1f}µs/path)")
+    print(f"  encode_path warm (every amount): {warm:.3f}s  ({warm / calls * 1e6:.1f}µs/call)")
+    # first amount encodes cold, the others hit the memo
+    memoized = cold + warm * (args.amounts - 1) / args.amounts
+    print(f"  Speedup, {args.amounts} amounts per path: {legacy / memoized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
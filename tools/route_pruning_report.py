@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Route pruning report: how often the liquidity-pruned route set still holds the
+best quote.
+
+`record` quotes every route of a few swaps on a live chain (exhaustive search,
+no pruning) and stores the routes, their on-chain `amount_out` and the pool TVL
+scores as a JSON fixture. `report` replays fixtures offline for a grid of
+`quote_max_paths` / `quote_max_parallel_pools` values and prints, per setting,
+how often the pruned best equals the exhaustive best, the worst amount ratio and
+the share of quoter calls saved.
+
+    python tools/route_pruning_report.py record --chain 10 --out fixtures/op.json \\
+        --swap VELO:USDC:1000000000000000000000 --swap WETH:OP:1000000000000000000
+    python tools/route_pruning_report.py report fixtures/*.json --top-k 10 25 50 --max-parallel 0 2 3
+"""
+
+import argparse
+import json
+import statistics
+from itertools import product
+from typing import Dict, List, Tuple
+
+from sugar.route import cap_parallel_pools, rank_paths_by_liquidity
+
+
+def record(chain_id: str, swaps: List[str], out: str):
+    from sugar.chains import get_chain
+    cases = []
+    with get_chain(chain_id) as chain:
+        liquidity = chain.get_pool_liquidity()
+        pools, index = chain.get_pools_for_swaps(), chain.get_route_index()
+        for swap in swaps:
+            from_ref, to_ref, amount = swap.split(":")
+            from_token, to_token = chain.get_token(from_ref), chain.get_token(to_ref)
+            if from_token is None or to_token is None: raise SystemExit(f"unknown token in {swap}")
+            paths = chain.get_paths_for_quote(from_token, to_token, pools, chain.settings.excluded_tokens_addrs, index=index)
+            quotes = [q for i in range(0, len(paths), 500)
+                      for q in chain._get_quotes_for_paths(from_token, to_token, int(amount), pools, paths[i:i + 500]) if q is not None]
+            amounts = {tuple(p.lp for p, _ in q.input.path): q.amount_out for q in quotes}
+            cases.append({"swap": swap, "paths": [[list(h) for h in p] for p in paths],
+                          "amount_out": [amounts.get(tuple(h[2] for h in p), 0) for p in paths]})
+            print(f"  {swap}: {len(paths)} routes, {len(quotes)} quoted")
+        scores = {lp: liquidity.get(lp, 0.0) for case in cases for p in case["paths"] for _, _, lp in p}
+    with open(out, "w") as f: json.dump({"chain_id": chain_id, "liquidity": scores, "cases": cases}, f)
+    print(f"✅ wrote {len(cases)} swaps to {out}")
+
+
+def replay(case: Dict, liquidity: Dict[str, float], top_k: int, max_parallel: int) -> Tuple[bool, float, int]:
+    paths = [[tuple(h) for h in p] for p in case["paths"]]
+    amounts = {tuple(h[2] for h in p): a for p, a in zip(paths, case["amount_out"])}
+    pruned = rank_paths_by_liquidity(cap_parallel_pools(paths, liquidity, max_parallel), liquidity, top_k)
+    best = max(amounts.values(), default=0)
+    pruned_best = max((amounts[tuple(h[2] for h in p)] for p in pruned), default=0)
+    return pruned_best == best, (pruned_best / best if best else 1.0), len(paths) - len(pruned)
+
+
+def report(fixtures: List[str], top_ks: List[int], max_parallels: List[int]):
+    loaded = []
+    for path in fixtures:
+        with open(path) as f: loaded.append(json.load(f))
+    cases = [(case, fx["liquidity"]) for fx in loaded for case in fx["cases"] if any(case["amount_out"])]
+    total = sum(len(case["paths"]) for case, _ in cases)
+    print(f"🧪 Route pruning: {len(cases)} swaps, {total} routes quoted exhaustively")
+    print("=" * 72)
+    print(f"  {'top-K':>6} {'max parallel':>13} {'best kept':>10} {'worst ratio':>12} {'mean ratio':>11} {'calls saved':>12}")
+    for top_k, max_parallel in product(top_ks, max_parallels):
+        results = [replay(case, liquidity, top_k, max_parallel) for case, liquidity in cases]
+        if not results: break
+        kept, ratios, saved = zip(*results)
+        print(f"  {top_k:>6} {max_parallel:>13} {sum(kept) / len(kept):>9.1%} {min(ratios):>12.6f} "
+              f"{statistics.mean(ratios):>11.6f} {sum(saved) / max(total, 1):>11.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="quote every route of the given swaps on a live chain")
+    rec.add_argument("--chain", default="10")
+    rec.add_argument("--swap", action="append", required=True, help="FROM:TO:AMOUNT (symbols or addresses, raw amount)")
+    rec.add_argument("--out", required=True)
+    rep = sub.add_parser("report", help="replay recorded fixtures against pruning settings")
+    rep.add_argument("fixtures", nargs="+")
+    rep.add_argument("--top-k", type=int, nargs="+", default=[10, 25, 50, 100])
+    rep.add_argument("--max-parallel", type=int, nargs="+", default=[0, 2, 3])
+    args = parser.parse_args()
+    if args.command == "record": record(args.chain, args.swap, args.out)
+    else: report(args.fixtures, args.top_k, args.max_parallel)
+
+
+if __name__ == "__main__":
+    main()